@@ -3,60 +3,322 @@ ImageCon v2.0 - Production-ready image converter
 Complete error handling, security, and performance optimization
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+import time
+import_start = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, send_file, g
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import io
 import base64
+import binascii
 import hashlib
 import tempfile
+import shutil
+import mmap
+import struct
+import zlib
 import zipfile
 import logging
-import traceback
+import logging.handlers
+import queue
+import random
+import atexit
+import math
+import json
+import sys
+import re
+import uuid
+import copy
 from datetime import datetime
 from functools import wraps
-from threading import Lock
+from threading import Lock, Condition, Thread
 import gc
 
 from PIL import Image, ImageFile, ExifTags
-import pillow_heif
+from limits import parse as parse_limit
+
+from state import create_backend, CACHE_MAX_ITEM_BYTES
+
+# 시작 프로파일 (콜드 스타트/첫 요청 지연 측정)
+startup_report = {
+    'import_ms': round((time.perf_counter() - import_start) * 1000, 1),
+    'warmup': {},
+    'warmup_ms': None,
+    'ready_ms': None,
+    'first_request_ms': None
+}
 
 # PIL 설정
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 Image.MAX_IMAGE_PIXELS = 200000000  # 200MP 제한
 
-# HEIF 지원 등록
-pillow_heif.register_heif_opener()
+# HEIF 디코더 스레드 수 (libheif 내부 스레드가 다른 변환 작업과 CPU를 다투지 않도록 제한)
+HEIF_DECODE_THREADS = int(os.environ.get('HEIF_DECODE_THREADS', max(1, (os.cpu_count() or 1) // 2)))
+
+# HEIF 지원은 첫 HEIF 입력 시 등록 (자주 쓰지 않는 코덱은 지연 로딩)
+HEIF_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1'}
+heif_lock = Lock()
+heif_registered = False
+
+# 워밍업 설정 (트래픽 받기 전 형식별 합성 변환)
+WARMUP_ENABLED = os.environ.get('WARMUP', 'true').lower() == 'true'
+WARMUP_FORMATS = [f.strip().lower() for f in os.environ.get('WARMUP_FORMATS', 'jpeg,png,webp').split(',') if f.strip()]
 
 # Flask 앱 설정
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB
 app.config['JSON_SORT_KEYS'] = False
+# 부하 테스트에서 처리 용량만 측정할 때 false (요청 수/작업량 제한 모두 해제)
+app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
 
 # CORS 설정
 CORS(app, origins=["*"])
 
+# 공유 상태 (요청 제한 카운터, 동시 처리 슬롯, 결과 캐시)
+# 워커가 여럿이면 sqlite:// 또는 redis://로 워커 간 공유 (memory://는 워커마다 따로)
+STATE_URL = os.environ.get('STATE_URL', 'memory://')
+shared_state = create_backend(STATE_URL)
+
 # Rate limiting
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
+    default_limits=["200 per day", "50 per hour"],
+    storage_uri=shared_state.limiter_uri
 )
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 로깅 설정 (요청 스레드는 레코드를 큐에 넣기만 하고 포맷/출력은 리스너 스레드에서)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # json | text
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))  # 성공한 이미지 기록 비율 (오류는 항상 기록)
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON (extra={'fields': {...}}의 필드를 함께 기록)"""
+    
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """기존 텍스트 형식 + 구조화 필드 JSON"""
+    
+    def formatMessage(self, record):
+        text = super().formatMessage(record)
+        fields = getattr(record, 'fields', None)
+        return f"{text} {json.dumps(fields, ensure_ascii=False, default=str)}" if fields else text
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """메시지/필드 포맷을 리스너 스레드로 미루는 큐 핸들러 (기본 prepare는 호출 스레드에서 전체를 포맷)
+    
+    트레이스백만 호출 스레드에서 문자열(exc_text)로 만들고 exc_info는 비움: 예외 객체가 프레임과
+    지역 변수(디코딩된 이미지 등)를 큐에 머무는 동안 붙잡지 않도록
+    """
+    exception_formatter = logging.Formatter()
+    
+    def prepare(self, record):
+        if record.exc_info:
+            record = copy.copy(record)  # 같은 레코드를 받는 다른 핸들러에 영향 없도록
+            record.exc_text = self.exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+log_output = logging.StreamHandler()
+log_output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else
+                        TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_handler = DeferredQueueHandler(queue.SimpleQueue())
+log_listener = None
+
+def start_log_listener():
+    """로그 리스너 시작 (포크된 워커에는 리스너 스레드가 없으므로 워커에서 다시 호출)"""
+    global log_listener
+    log_handler.queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_handler.queue, log_output)
+    log_listener.start()
+
+def stop_log_listener():
+    """남은 로그 출력 후 리스너 종료"""
+    if log_listener is not None and log_listener._thread is not None:
+        log_listener.stop()
+
+logging.basicConfig(level=logging.INFO, handlers=[log_handler])
+start_log_listener()
+atexit.register(stop_log_listener)
 logger = logging.getLogger(__name__)
 
+def log_sampled():
+    """성공 레코드 샘플링 여부"""
+    return random.random() < LOG_SAMPLE_RATE
+
 # 전역 변수
 processing_lock = Lock()
+processing_slots = Condition(processing_lock)
 active_processes = 0
 MAX_CONCURRENT_PROCESSES = 5
 
+# 우선순위 클래스: 작은 대화형 변환은 예약 슬롯과 짧은 대기를, 대량 배치는 나머지 슬롯만 사용
+PRIORITY_CLASSES = ('interactive', 'bulk')
+INTERACTIVE_RESERVED = int(os.environ.get('INTERACTIVE_RESERVED', 2))  # 워커별 대화형 전용 슬롯
+INTERACTIVE_MAX_IMAGES = int(os.environ.get('INTERACTIVE_MAX_IMAGES', 4))
+INTERACTIVE_MAX_BYTES = int(os.environ.get('INTERACTIVE_MAX_MB', 20)) * 1024 * 1024
+INTERACTIVE_WAIT_MS = int(os.environ.get('INTERACTIVE_WAIT_MS', 1000))  # 빈 슬롯을 기다리는 최대 시간
+BULK_WAIT_MS = int(os.environ.get('BULK_WAIT_MS', 500))  # 대량 요청은 짧게 기다린 뒤 낮은 노력으로 처리
+INTERACTIVE_SLO_MS = int(os.environ.get('INTERACTIVE_SLO_MS', 3000))
+
+def parse_api_key_priorities(value):
+    """API_KEY_PRIORITIES 해석 ({"키": "bulk"}, 알 수 없는 우선순위는 요청 처리 중이 아닌 시작 시 오류)"""
+    mapping = json.loads(value)
+    if not isinstance(mapping, dict):
+        raise ValueError('API_KEY_PRIORITIES는 {"API 키": "우선순위"} 형식의 JSON 객체여야 합니다')
+    priorities = {str(key): str(priority).lower() for key, priority in mapping.items()}
+    invalid = sorted({priority for priority in priorities.values() if priority not in PRIORITY_CLASSES})
+    if invalid:
+        raise ValueError(f"API_KEY_PRIORITIES의 알 수 없는 우선순위: {', '.join(invalid)} "
+                         f"(가능: {', '.join(PRIORITY_CLASSES)})")
+    return priorities
+
+API_KEY_PRIORITIES = parse_api_key_priorities(os.environ.get('API_KEY_PRIORITIES', '{}'))
+LATENCY_EWMA_ALPHA = 0.2
+
+# 우선순위별 처리 중/거부 수, 대화형 처리 시간 지수 이동 평균
+scheduler_stats = {
+    'active': {priority: 0 for priority in PRIORITY_CLASSES},
+    'shed': {priority: 0 for priority in PRIORITY_CLASSES},
+    'degraded': 0,
+    'interactive_latency_ms': 0.0
+}
+
+# 전체 워커 합계 동시 처리 수 (공유 상태 백엔드 기준)
+MAX_CONCURRENT_TOTAL = int(os.environ.get(
+    'MAX_CONCURRENT_TOTAL', MAX_CONCURRENT_PROCESSES * int(os.environ.get('WEB_CONCURRENCY', 1))))
+# 슬롯 임대 시간: 처리 중에는 SLOT_TTL/3마다 연장하므로 처리 시간과 무관하고 (ASGI 워커에는 요청 시간 제한이 없음)
+# 워커가 죽으면 연장이 멈춰 SLOT_TTL 뒤에 만료
+SLOT_TTL = int(os.environ.get('SLOT_TTL', 60))
+if SLOT_TTL < 3:
+    raise ValueError(f'SLOT_TTL은 3초 이상이어야 합니다 (현재 {SLOT_TTL})')
+held_slots = set()  # 이 워커가 잡고 있는 공유 슬롯 토큰 (processing_lock 안에서 변경)
+slot_renewer = None
+BULK_CONCURRENT_TOTAL = max(1, MAX_CONCURRENT_TOTAL - INTERACTIVE_RESERVED * int(os.environ.get('WEB_CONCURRENCY', 1)))
+
+# 작업량 기준 요청 제한 (클라이언트별 변환 CPU 초, 요청 수 제한과 같은 저장소 사용)
+WORK_LIMIT = parse_limit(os.environ.get('WORK_LIMIT', '120 per minute'))
+
+# 결과 캐시 (같은 입력+옵션의 재요청/재시도는 변환 없이 응답, 0이면 사용 안 함)
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 600))
+
+# 대용량 이미지 스트립 처리 설정
+# 디코딩 예상 크기가 예산을 넘으면 스트립 단위로 합성/리사이즈
+LARGE_IMAGE_BUDGET = int(os.environ.get('LARGE_IMAGE_BUDGET_MB', 128)) * 1024 * 1024
+STRIP_MIN_ROWS = 16
+LANCZOS_SUPPORT = 3  # LANCZOS 필터 반경 (출력 픽셀 기준)
+
+# 대용량 페이로드 디스크 스풀링 기준 (디코딩 후 바이트)
+SPOOL_THRESHOLD = int(os.environ.get('SPOOL_THRESHOLD_MB', 8)) * 1024 * 1024
+SPOOL_CHUNK_CHARS = 4 * 256 * 1024  # Base64 1MB 단위 (4의 배수)
+
+# 분할 업로드 (세션을 만들고 조각을 오프셋으로 PUT, 끊기면 받은 위치부터 재개)
+# 조각은 워커 간에 공유되는 디스크 디렉터리에 기록
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'imagecon-uploads'))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_MB', 4)) * 1024 * 1024
+UPLOAD_MAX_BYTES = 100 * 1024 * 1024  # 이미지당 최대 크기와 동일
+UPLOAD_TTL = int(os.environ.get('UPLOAD_TTL', 3600))
+# 클라이언트별 열린 세션 수 / 업로드 디렉터리 전체 예약 바이트 (선언 크기 기준, 공유 상태 백엔드에서 집계)
+UPLOAD_MAX_SESSIONS = int(os.environ.get('UPLOAD_MAX_SESSIONS', 5))
+UPLOAD_DIR_MAX_BYTES = int(os.environ.get('UPLOAD_DIR_MAX_MB', 1024)) * 1024 * 1024
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# 리사이즈 엔진 (목표 크기가 필요한 모드)
+TARGET_RESIZE_MODES = {'cover', 'contain', 'pad', 'exact'}
+RESIZE_REDUCING_GAP = 3.0  # reduce()로 정수배 축소 후 LANCZOS 마무리 (품질 차이 없음)
+MAX_TARGET_SIZE = 10000
+
+# 서버 측 크기 프리셋 (RESIZE_PRESETS 환경 변수에 JSON으로 추가/변경)
+RESIZE_PRESETS = {
+    'square800': {'mode': 'cover', 'width': 800, 'height': 800},
+    'square1000': {'mode': 'cover', 'width': 1000, 'height': 1000},
+    'link1200': {'mode': 'cover', 'width': 1200, 'height': 628},
+    'portrait1080': {'mode': 'cover', 'width': 1080, 'height': 1350},
+    'story1080': {'mode': 'cover', 'width': 1080, 'height': 1920}
+}
+
+def parse_resize_presets(value):
+    """RESIZE_PRESETS 해석 ({"이름": {"mode", "width", "height"}}, 잘못된 프리셋은 요청 처리 중이 아닌 시작 시 오류)"""
+    presets = json.loads(value)
+    if not isinstance(presets, dict):
+        raise ValueError('RESIZE_PRESETS는 {"프리셋": {"mode": ..., "width": ..., "height": ...}} 형식의 JSON 객체여야 합니다')
+    
+    parsed = {}
+    for name, preset in presets.items():
+        if not isinstance(preset, dict) or preset.get('mode') not in TARGET_RESIZE_MODES:
+            raise ValueError(f"RESIZE_PRESETS의 프리셋 {name}: mode는 {', '.join(sorted(TARGET_RESIZE_MODES))} 중 하나여야 합니다")
+        width, height = preset.get('width'), preset.get('height')
+        if not all(type(side) is int and 1 <= side <= MAX_TARGET_SIZE for side in (width, height)):
+            raise ValueError(f"RESIZE_PRESETS의 프리셋 {name}: width/height는 1~{MAX_TARGET_SIZE} 정수여야 합니다")
+        parsed[str(name)] = {'mode': preset['mode'], 'width': width, 'height': height}
+    return parsed
+
+RESIZE_PRESETS.update(parse_resize_presets(os.environ.get('RESIZE_PRESETS', '{}')))
+
+# 스마트 크롭 설정
+CROP_STRATEGIES = {'center', 'edge', 'entropy'}
+CROP_PROXY_SIZE = 256  # 분석용 축소본의 긴 변
+CROP_CENTER_BIAS = 0.05  # 중앙에서 멀어질수록 감점 (비슷하면 중앙 유지)
+CROP_ENTROPY_STEPS = 32  # 엔트로피 후보 창 수 (축마다)
+
+# 자동 품질 (quality: 'auto') - 목표 SSIM을 만족하는 가장 낮은 품질
+AUTO_QUALITY_SSIM = float(os.environ.get('AUTO_QUALITY_SSIM', 0.98))
+AUTO_QUALITY_RANGE = (40, 95)
+AUTO_QUALITY_PROXY_SIZE = 512  # 시험 인코딩은 긴 변 512px 축소본에서
+SSIM_WINDOW = 8
+
+# 자동 형식 (format: 'auto') - 후보 형식은 AUTO_FORMATS로 제한 가능 (예: 구형 브라우저용 'jpg,png')
+AUTO_FORMATS = [f.strip() for f in os.environ.get('AUTO_FORMATS', 'jpg,png,webp').split(',') if f.strip()]
+AUTO_FORMAT_PROXY_SIZE = 512
+AUTO_FORMAT_MAX_COLORS = 256  # 이 이하의 색 수는 그래픽으로 분류
+AUTO_FORMAT_FLAT_RATIO = 0.6  # 인접 픽셀과 같은 값의 비율이 이 이상이면 그래픽
+AUTO_FORMAT_TRIAL_SIZE = 256  # 시험 인코딩 크롭 크기
+# PNG로 저장할 수 있는 모드 (그 외 CMYK/YCbCr/LAB 등은 분류와 시험 인코딩 전에 RGB(A)로 변환)
+PNG_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I', 'I;16')
+
+# PNG 팔레트(PNG8) 양자화 - auto는 색 수가 팔레트에 들어가거나 양자화 SSIM이 기준 이상일 때만 적용
+PNG_PALETTE_MODES = {'off', 'auto', 'on'}
+PNG_PALETTE_SSIM = float(os.environ.get('PNG_PALETTE_SSIM', 0.97))
+
+# 헤더 프로브 비용 모델 (픽셀당 ns, 대략적인 실측치)
+DECODE_NS_PER_PIXEL = {'JPEG': 8, 'PNG': 15, 'WEBP': 20, 'HEIF': 45, 'GIF': 10}
+DEFAULT_DECODE_NS_PER_PIXEL = 12
+RESIZE_NS_PER_PIXEL = 6
+ENCODE_NS_PER_PIXEL = {'jpg': 12, 'png': 45, 'webp': 150}
+
+# HEIF 단계별 처리 시간 누적 (ms)
+heif_stats_lock = Lock()
+heif_stats = {'count': 0, 'decode': 0.0, 'resize': 0.0, 'convert': 0.0, 'encode': 0.0}
+
+# 메타데이터 모드 (strip: 모두 제거, minimal: 촬영 시각/저작권만, srgb: 모두 제거 + ICC를 sRGB로 변환,
+# preserve: 원본 EXIF/ICC 유지)
+METADATA_MODES = {'strip', 'minimal', 'srgb', 'preserve'}
+DEFAULT_METADATA = os.environ.get('METADATA_MODE', 'strip')
+MINIMAL_EXIF_TAGS = (0x0132, 0x013B, 0x8298)  # DateTime, Artist, Copyright
+MINIMAL_EXIF_IFD_TAGS = (0x9003,)  # DateTimeOriginal
+
+# ICC -> sRGB 변환 캐시 (프로필별 변환 생성 비용이 커서 재사용)
+ICC_TRANSFORM_CACHE_SIZE = 32
+icc_transform_lock = Lock()
+icc_transforms = {}  # (sha1(ICC), 모드) -> ImageCms 변환 (sRGB/변환 불가면 None)
+icc_stats = {'hits': 0, 'misses': 0}
+
 # 지원 형식
 SUPPORTED_INPUT_FORMATS = {
     'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 
@@ -64,30 +326,149 @@ SUPPORTED_INPUT_FORMATS = {
 }
 
 SUPPORTED_OUTPUT_FORMATS = {
-    'jpg': {'mime': 'image/jpeg', 'pil': 'JPEG'},
-    'png': {'mime': 'image/png', 'pil': 'PNG'},
-    'webp': {'mime': 'image/webp', 'pil': 'WEBP'}
+    'jpg': {'mime': 'image/jpeg', 'pil': 'JPEG', 'alpha': False},
+    'png': {'mime': 'image/png', 'pil': 'PNG', 'alpha': True},
+    'webp': {'mime': 'image/webp', 'pil': 'WEBP', 'alpha': True}
 }
 
+def request_priority():
+    """요청 우선순위 (API 키 설정 > 요청 크기/이미지 수 > X-Priority: bulk 헤더)"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key in API_KEY_PRIORITIES:
+        return API_KEY_PRIORITIES[api_key]
+    
+    # 헤더로는 스스로 낮추는 것만 허용
+    if request.headers.get('X-Priority', '').lower() == 'bulk':
+        return 'bulk'
+    
+    size = request.content_length or 0
+    upload_id = (request.view_args or {}).get('upload_id')
+    if upload_id:
+        size += (load_upload(upload_id) or {}).get('size', 0)
+    if size > INTERACTIVE_MAX_BYTES:
+        return 'bulk'
+    
+    if request.mimetype == 'multipart/form-data':
+        count = len(request.files.getlist('images'))
+    else:
+        count = len((request.get_json(silent=True) or {}).get('images') or [])
+    return 'bulk' if count > INTERACTIVE_MAX_IMAGES else 'interactive'
+
+def is_overloaded(limit=MAX_CONCURRENT_PROCESSES):
+    """과부하 판단 (우선순위의 슬롯이 모두 찼거나 대화형 처리 시간이 SLO를 넘음, processing_lock 안에서 호출)"""
+    return (active_processes >= limit or
+            scheduler_stats['interactive_latency_ms'] > INTERACTIVE_SLO_MS)
+
+def renew_held_slots():
+    """잡고 있는 공유 슬롯의 임대를 주기적으로 연장 (데몬 스레드)"""
+    while True:
+        time.sleep(SLOT_TTL / 3)
+        with processing_lock:
+            tokens = list(held_slots)
+        if not tokens:
+            continue
+        try:
+            shared_state.renew_slots(tokens, SLOT_TTL)
+        except Exception as e:
+            logger.warning("공유 슬롯 연장 실패", extra={'fields': {'slots': len(tokens), 'error': str(e)}})
+
+def ensure_slot_renewer():
+    """연장 스레드 시작 (포크된 워커에는 스레드가 없으므로 처음 슬롯을 잡을 때 다시 시작)"""
+    global slot_renewer
+    if slot_renewer is None or not slot_renewer.is_alive():
+        slot_renewer = Thread(target=renew_held_slots, name='slot-renewer', daemon=True)
+        slot_renewer.start()
+
 def safe_process(func):
-    """데코레이터: 안전한 프로세스 실행"""
+    """데코레이터: 안전한 프로세스 실행
+    
+    대화형 요청은 모든 슬롯을 쓸 수 있고 빈 슬롯을 잠시 기다리며, 대량 요청은 예약분을 뺀 슬롯만
+    쓰고 더 짧게 기다린 뒤 거부. 도착 시점에 과부하였던 요청은 인코더 노력을 낮춰 처리 (g.effort)
+    """
     @wraps(func)
     def wrapper(*args, **kwargs):
         global active_processes
         
-        with processing_lock:
-            if active_processes >= MAX_CONCURRENT_PROCESSES:
-                return jsonify({
-                    'error': '서버가 바쁩니다. 잠시 후 다시 시도해주세요.',
-                    'code': 'SERVER_BUSY'
-                }), 503
-            active_processes += 1
+        priority = request_priority()
         
+        def busy():
+            with processing_lock:
+                scheduler_stats['shed'][priority] += 1
+            response = jsonify({
+                'error': '서버가 바쁩니다. 잠시 후 다시 시도해주세요.',
+                'code': 'SERVER_BUSY',
+                'priority': priority
+            })
+            response.headers['Retry-After'] = '1' if priority == 'interactive' else '5'
+            return response, 503
+        
+        if priority == 'interactive':
+            limit, total_limit = MAX_CONCURRENT_PROCESSES, MAX_CONCURRENT_TOTAL
+            deadline = time.monotonic() + INTERACTIVE_WAIT_MS / 1000
+        else:
+            limit, total_limit = max(1, MAX_CONCURRENT_PROCESSES - INTERACTIVE_RESERVED), BULK_CONCURRENT_TOTAL
+            deadline = time.monotonic() + BULK_WAIT_MS / 1000
+        
+        with processing_slots:
+            # 슬롯을 잡기 전에 판단해야 기다렸다 들어온 요청도 모두 낮은 노력으로 처리됨
+            overloaded = is_overloaded(limit)
+            while active_processes >= limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                processing_slots.wait(remaining)
+            else:
+                active_processes += 1
+                scheduler_stats['active'][priority] += 1
+                g.priority = priority
+                g.effort = 'fast' if overloaded else 'normal'
+                if g.effort == 'fast':
+                    scheduler_stats['degraded'] += 1
+        
+        if 'priority' not in g:
+            return busy()
+        
+        def release():
+            global active_processes
+            with processing_slots:
+                active_processes -= 1
+                scheduler_stats['active'][priority] -= 1
+                # 우선순위마다 슬롯 한도가 달라 하나만 깨우면 들어갈 수 없는 요청이 깨어날 수 있음
+                processing_slots.notify_all()
+        
+        # 워커 간 공유 슬롯 (백엔드 장애 시에는 워커별 제한만 적용)
+        slot = None
+        try:
+            slot = shared_state.acquire_slot(total_limit, SLOT_TTL)
+            while slot is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+                slot = shared_state.acquire_slot(total_limit, SLOT_TTL)
+            if slot is None:
+                release()
+                return busy()
+            with processing_lock:
+                held_slots.add(slot)
+                ensure_slot_renewer()
+        except Exception as e:
+            logger.warning("공유 슬롯 획득 실패", extra={'fields': {'error': str(e)}})
+        
+        start = time.perf_counter()
         try:
             return func(*args, **kwargs)
         finally:
-            with processing_lock:
-                active_processes -= 1
+            if slot is not None:
+                with processing_lock:
+                    held_slots.discard(slot)
+                try:
+                    shared_state.release_slot(slot)
+                except Exception as e:
+                    logger.warning("공유 슬롯 반환 실패", extra={'fields': {'error': str(e)}})
+            release()
+            if priority == 'interactive':
+                elapsed = (time.perf_counter() - start) * 1000
+                with processing_lock:
+                    latency = scheduler_stats['interactive_latency_ms']
+                    scheduler_stats['interactive_latency_ms'] = latency + LATENCY_EWMA_ALPHA * (elapsed - latency)
             gc.collect()
     
     return wrapper
@@ -105,23 +486,195 @@ def validate_image_data(img_data):
     if not filename or '..' in filename or '/' in filename or '\\' in filename:
         return False, "잘못된 파일명"
     
-    # Base64 데이터 검증
+    # Base64 데이터 검증 (multipart 업로드는 원본 bytes)
     base64_str = img_data['data']
     if not base64_str:
         return False, "이미지 데이터 없음"
     
     # 데이터 크기 추정 (Base64는 원본의 약 1.33배)
-    estimated_size = len(base64_str) * 0.75
+    estimated_size = len(base64_str) if isinstance(base64_str, (bytes, mmap.mmap)) else len(base64_str) * 0.75
     if estimated_size > 100 * 1024 * 1024:  # 100MB
         return False, f"파일 크기 초과 ({int(estimated_size / 1024 / 1024)}MB)"
     
     return True, None
 
-def extract_base64(data_str):
-    """Base64 데이터 추출"""
-    if ',' in data_str:
-        return data_str.split(',')[1]
-    return data_str
+def decode_base64_payload(data_str):
+    """Base64 디코딩 (data URL 접두어 처리)
+    
+    binascii는 ASCII 문자열을 복사 없이 읽으므로 접두어가 있을 때만 한 번 잘라냄
+    """
+    # 접두어는 앞부분에만 있으므로 전체 문자열을 스캔하지 않음
+    comma = data_str.find(',', 0, 1024)
+    if comma >= 0:
+        data_str = data_str[comma + 1:]
+    return binascii.a2b_base64(data_str)
+
+def decode_base64_to(data_str, fp):
+    """Base64를 조각 단위로 디코딩하여 파일에 기록 (디코딩 결과 전체를 메모리에 올리지 않음)"""
+    comma = data_str.find(',', 0, 1024)
+    start = comma + 1 if comma >= 0 else 0
+    
+    # 공백/개행이 섞이면 4글자 경계가 어긋나므로 한 번에 디코딩
+    if any(c in data_str for c in ('\n', '\r', ' ')):
+        fp.write(binascii.a2b_base64(data_str[start:]))
+        return
+    
+    for offset in range(start, len(data_str), SPOOL_CHUNK_CHARS):
+        fp.write(binascii.a2b_base64(data_str[offset:offset + SPOOL_CHUNK_CHARS]))
+
+def open_input(data_str):
+    """입력 디코딩: 작은 입력은 메모리, 큰 입력은 임시 파일에 스풀링 후 mmap"""
+    if isinstance(data_str, (bytes, mmap.mmap)):
+        # multipart/분할 업로드는 디코딩 불필요
+        return data_str
+    
+    if len(data_str) * 3 // 4 <= SPOOL_THRESHOLD:
+        return decode_base64_payload(data_str)
+    
+    with tempfile.TemporaryFile() as spool:
+        decode_base64_to(data_str, spool)
+        spool.flush()
+        if spool.tell() == 0:
+            raise ValueError("빈 이미지 데이터")
+        # mmap은 파일 디스크립터를 복제하므로 임시 파일을 닫아도 유지됨
+        return mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+
+class SpoolingOutput:
+    """임계값까지는 메모리에, 넘으면 임시 파일에 쓰는 인코더 출력 버퍼"""
+    
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.buffer = io.BytesIO()
+        self.file = None
+    
+    def write(self, data):
+        if self.file is None and self.buffer.tell() + len(data) > self.threshold:
+            self.file = tempfile.TemporaryFile()
+            with self.buffer.getbuffer() as view:
+                self.file.write(view)
+            self.buffer.close()
+        return (self.file or self.buffer).write(data)
+    
+    def tell(self):
+        return (self.file or self.buffer).tell()
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        (self.file or self.buffer).close()
+
+class SpooledPayload:
+    """디스크에 스풀링된 결과 (응답 전송 시 조각 단위로 Base64 인코딩)
+    
+    중복 입력이 같은 결과를 공유할 수 있도록 여러 번 읽을 수 있고, 파일은 응답 전송 후 닫음
+    """
+    
+    CHUNK_BYTES = 3 * 256 * 1024  # 3의 배수여야 조각을 이어 붙여도 올바른 Base64
+    
+    def __init__(self, file, size):
+        self.file = file
+        self.size = size
+    
+    def __len__(self):
+        return 4 * ((self.size + 2) // 3)
+    
+    def __iter__(self):
+        self.file.seek(0)
+        while True:
+            block = self.file.read(self.CHUNK_BYTES)
+            if not block:
+                break
+            yield binascii.b2a_base64(block, newline=False)
+    
+    def close(self):
+        self.file.close()
+
+def encode_output(output):
+    """인코더 출력을 Base64 결과로 변환 (메모리 버퍼는 복사 없이, 디스크는 지연 인코딩)"""
+    if output.file is not None:
+        return SpooledPayload(output.file, output.tell())
+    
+    with output.buffer.getbuffer() as view:
+        encoded = binascii.b2a_base64(view, newline=False)
+    output.buffer.close()
+    return encoded
+
+def iter_json(obj):
+    """JSON 직렬화 조각 생성 (bytes 값은 Base64 문자열로 간주하고 복사 없이 출력)"""
+    if isinstance(obj, (bytes, bytearray, memoryview, SpooledPayload)):
+        yield b'"'
+        yield obj
+        yield b'"'
+    elif isinstance(obj, dict):
+        yield b'{'
+        for index, (key, value) in enumerate(obj.items()):
+            yield (b',' if index else b'') + json.dumps(str(key)).encode() + b':'
+            yield from iter_json(value)
+        yield b'}'
+    elif isinstance(obj, (list, tuple)):
+        yield b'['
+        for index, value in enumerate(obj):
+            if index:
+                yield b','
+            yield from iter_json(value)
+        yield b']'
+    else:
+        yield json.dumps(obj).encode()
+
+def json_response(obj, status=200):
+    """Base64 결과를 다시 문자열로 복사하지 않는 JSON 응답"""
+    chunks = []
+    pending = []
+    for piece in iter_json(obj):
+        if len(piece) > 64 * 1024:
+            # 큰 페이로드는 그대로 응답 조각으로 전달
+            if pending:
+                chunks.append(b''.join(pending))
+                pending = []
+            chunks.append(piece)
+        else:
+            pending.append(piece)
+    if pending:
+        chunks.append(b''.join(pending))
+    
+    def stream():
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, SpooledPayload):
+                    yield from chunk
+                else:
+                    yield chunk
+        finally:
+            # 전송 중단 시에도 스풀 파일 정리
+            for chunk in chunks:
+                if isinstance(chunk, SpooledPayload):
+                    chunk.close()
+    
+    response = app.response_class(stream(), status=status, mimetype='application/json')
+    response.content_length = sum(len(chunk) for chunk in chunks)
+    return response
+
+def is_heif_data(img_bytes):
+    """ftyp 박스의 브랜드로 HEIF 여부 판별"""
+    return img_bytes[4:8] == b'ftyp' and bytes(img_bytes[8:12]) in HEIF_BRANDS
+
+def ensure_heif_opener():
+    """pillow_heif 지연 로딩 및 등록 (썸네일/깊이 맵 메타데이터 파싱 생략)"""
+    global heif_registered
+    if heif_registered:
+        return
+    
+    with heif_lock:
+        if not heif_registered:
+            import pillow_heif
+            pillow_heif.register_heif_opener(
+                decode_threads=HEIF_DECODE_THREADS,
+                thumbnails=False,
+                depth_images=False
+            )
+            heif_registered = True
+            logger.info("HEIF 디코더 등록", extra={'fields': {'threads': HEIF_DECODE_THREADS}})
 
 def fix_image_orientation(img):
     """EXIF 기반 이미지 방향 수정"""
@@ -147,145 +700,1212 @@ def fix_image_orientation(img):
     
     return img
 
-def convert_to_rgb(img, output_format):
+def has_alpha(img):
+    """투명도 채널 여부"""
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+DEFAULT_BACKGROUND = (255, 255, 255)
+
+def parse_background(value):
+    """배경색 파라미터 파싱 ('#RRGGBB', '#RGB', [r, g, b])"""
+    if value is None or value == '':
+        return DEFAULT_BACKGROUND
+    
+    if isinstance(value, str):
+        hex_str = value.strip().lstrip('#')
+        if len(hex_str) == 3:
+            hex_str = ''.join(c * 2 for c in hex_str)
+        if len(hex_str) != 6:
+            raise ValueError(f"잘못된 배경색: {value}")
+        return tuple(int(hex_str[i:i + 2], 16) for i in (0, 2, 4))
+    
+    if isinstance(value, (list, tuple)) and len(value) == 3:
+        color = tuple(int(c) for c in value)
+        if all(0 <= c <= 255 for c in color):
+            return color
+    
+    raise ValueError(f"잘못된 배경색: {value}")
+
+def flatten_palette(img, background):
+    """팔레트 이미지의 투명도를 팔레트 단계에서 합성 (최대 256색만 계산)"""
+    palette = img.getpalette('RGBA')
+    if palette is None:
+        return None
+    
+    transparency = img.info.get('transparency')
+    alphas = list(palette[3::4])
+    if isinstance(transparency, int):
+        if transparency < len(alphas):
+            alphas[transparency] = 0
+    elif isinstance(transparency, bytes):
+        for index, alpha in enumerate(transparency[:len(alphas)]):
+            alphas[index] = min(alphas[index], alpha)
+    
+    flat = []
+    for index, alpha in enumerate(alphas):
+        for channel in range(3):
+            color = palette[index * 4 + channel]
+            bg = background[channel]
+            flat.append((color * alpha + bg * (255 - alpha) + 127) // 255)
+    
+    img.putpalette(flat, 'RGB')
+    img.info.pop('transparency', None)
+    return img.convert('RGB')
+
+def flatten_alpha(img, background=DEFAULT_BACKGROUND):
+    """투명도를 배경색 위에 한 번에 합성
+    
+    RGBA/LA는 알파 채널을 그대로 마스크로 사용하여 split() 복사 없이 합성하고,
+    팔레트 이미지는 RGBA 전체 변환 대신 팔레트 색상만 합성
+    """
+    if img.mode == 'P':
+        flat = flatten_palette(img, background)
+        if flat is not None:
+            return flat
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGBA', 'LA'):
+        img = img.convert('RGBA')
+    
+    canvas = Image.new('RGB', img.size, background)
+    canvas.paste(img, mask=img)
+    return canvas
+
+def convert_to_rgb(img, output_format, background=DEFAULT_BACKGROUND):
     """이미지를 RGB로 변환"""
     if output_format == 'png' and img.mode in ('RGBA', 'LA', 'PA'):
         # PNG는 투명도 유지
         return img
     
-    if img.mode == 'RGBA' or img.mode == 'LA':
-        # 흰색 배경에 합성
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'RGBA':
-            background.paste(img, mask=img.split()[-1])
-        else:
-            background.paste(img, mask=img.split()[-1])
-        return background
-    elif img.mode == 'P':
-        # 팔레트 모드
-        if 'transparency' in img.info:
-            img = img.convert('RGBA')
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1])
-            return background
-        else:
-            return img.convert('RGB')
+    if has_alpha(img):
+        # 배경색에 합성
+        return flatten_alpha(img, background)
     elif img.mode != 'RGB':
         return img.convert('RGB')
     
     return img
 
-def make_square(img, size):
-    """이미지를 정사각형으로 크롭 (중앙 크롭 방식)"""
-    width, height = img.size
+def crop_proxy(img):
+    """크롭 분석용 그레이스케일 축소본 (NumPy 배열)"""
+    import numpy as np  # 선택 기능이므로 지연 로딩
+    
+    scale = CROP_PROXY_SIZE / max(img.size)
+    if scale < 1:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        proxy = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    else:
+        proxy = img
+    return np.asarray(proxy.convert('L'), dtype=np.float32)
+
+def edge_scores(gray, win_w, win_h):
+    """창 위치별 에지 에너지 합 (적분 영상)"""
+    import numpy as np
+    
+    energy = np.zeros_like(gray)
+    energy[:, 1:] += np.abs(np.diff(gray, axis=1))
+    energy[1:, :] += np.abs(np.diff(gray, axis=0))
+    
+    integral = np.zeros((gray.shape[0] + 1, gray.shape[1] + 1), dtype=np.float64)
+    integral[1:, 1:] = energy.cumsum(0).cumsum(1)
+    return (integral[win_h:, win_w:] - integral[:-win_h, win_w:]
+            - integral[win_h:, :-win_w] + integral[:-win_h, :-win_w])
+
+def entropy_scores(gray, win_w, win_h):
+    """창 위치별 히스토그램 엔트로피 (후보 위치만 계산)"""
+    import numpy as np
+    
+    levels = (gray // 8).astype(np.intp)  # 32단계로 양자화
+    rows, cols = gray.shape[0] - win_h + 1, gray.shape[1] - win_w + 1
+    scores = np.full((rows, cols), -1.0)
+    
+    for y in np.unique(np.linspace(0, rows - 1, min(rows, CROP_ENTROPY_STEPS)).astype(int)):
+        for x in np.unique(np.linspace(0, cols - 1, min(cols, CROP_ENTROPY_STEPS)).astype(int)):
+            counts = np.bincount(levels[y:y + win_h, x:x + win_w].ravel(), minlength=32)
+            p = counts[counts > 0] / counts.sum()
+            scores[y, x] = -(p * np.log2(p)).sum()
+    return scores
+
+def choose_crop_box(img, box, strategy='center', gray=None):
+    """크롭 창 위치 선택 (box는 중앙 기준 창, 크기는 유지하고 위치만 이동)
+    
+    edge: 에지 에너지가 가장 큰 창, entropy: 밝기 분포가 가장 복잡한 창.
+    분석은 긴 변 256px 축소본(gray, 없으면 img에서 생성)에서 수행하며 점수가 비슷하면 중앙을 유지
+    """
+    left, top, right, bottom = box
+    crop_w, crop_h = right - left, bottom - top
+    if strategy not in ('edge', 'entropy') or (crop_w, crop_h) == img.size:
+        return box
+    
+    import numpy as np
+    
+    if gray is None:
+        gray = crop_proxy(img)
+    scale_x = gray.shape[1] / img.width
+    scale_y = gray.shape[0] / img.height
+    win_w = min(gray.shape[1], max(1, round(crop_w * scale_x)))
+    win_h = min(gray.shape[0], max(1, round(crop_h * scale_y)))
+    
+    scores = edge_scores(gray, win_w, win_h) if strategy == 'edge' else entropy_scores(gray, win_w, win_h)
+    if scores.max() <= 0:
+        return box
+    
+    # 정규화 후 중앙에서의 거리만큼 감점
+    rows, cols = scores.shape
+    ys, xs = np.mgrid[0:rows, 0:cols]
+    center_y, center_x = (rows - 1) / 2, (cols - 1) / 2
+    distance = np.hypot((ys - center_y) / max(rows, cols), (xs - center_x) / max(rows, cols))
+    scores = scores / scores.max() - CROP_CENTER_BIAS * distance
+    y, x = np.unravel_index(np.argmax(scores), scores.shape)
+    
+    left = min(max(0, round(x / scale_x)), img.width - crop_w)
+    top = min(max(0, round(y / scale_y)), img.height - crop_h)
+    return (left, top, left + crop_w, top + crop_h)
+
+def make_square(img, size, strategy='center'):
+    """이미지를 정사각형으로 크롭 (기본 중앙 크롭, strategy로 내용 기반 크롭)"""
+    box, target, canvas = plan_resize(img.size, None, 'cover', (size, size))
+    box = choose_crop_box(img, box, strategy)
+    return resize_to_plan(img, box, target, canvas)
+
+def estimate_decoded_bytes(img):
+    """디코딩 후 작업 메모리 추정 (투명 이미지는 RGBA 기준)"""
+    bands = 4 if has_alpha(img) else max(len(img.getbands()), 1)
+    return img.width * img.height * bands
+
+def is_large_image(img):
+    """스트립 처리 대상 여부"""
+    return estimate_decoded_bytes(img) > LARGE_IMAGE_BUDGET
+
+def jpeg_draft_size(img, max_size, resize_mode, target_size=None):
+    """JPEG 축소 디코딩 요청 크기 (DCT 단계에서 1/2 이상 줄일 수 없으면 None)"""
+    if img.format != 'JPEG':
+        return None
+    box, target, _ = plan_resize(img.size, max_size, resize_mode, target_size)
+    scale = min((box[2] - box[0]) / target[0], (box[3] - box[1]) / target[1])
+    if scale < 2:
+        return None
+    return (math.ceil(img.width / scale), math.ceil(img.height / scale))
+
+def strip_decode_bytes(img, max_size, resize_mode, target_size=None):
+    """스트립 경로에서 한 번에 디코딩되는 최대 크기
+    
+    비인터레이스 8비트 PNG는 띠 단위로 디코딩하고, JPEG는 축소 디코딩 후 전체를,
+    그 외 형식은 원본 전체를 디코딩
+    """
+    if PngStripReader.supports(img):
+        return LARGE_IMAGE_BUDGET // 4
+    
+    requested = jpeg_draft_size(img, max_size, resize_mode, target_size)
+    if requested:
+        # Image.draft()와 같은 축소 비율 선택 (1/2, 1/4, 1/8)
+        scale = min(img.width // requested[0], img.height // requested[1])
+        reduce = next(r for r in (8, 4, 2, 1) if scale >= r)
+        bands = max(len(img.getbands()), 1)
+        return math.ceil(img.width / reduce) * math.ceil(img.height / reduce) * bands
+    return estimate_decoded_bytes(img)
+
+def plan_resize(size, max_size, resize_mode, target_size=None):
+    """리사이즈 계획: (원본 기준 영역, 리사이즈 크기, 캔버스 크기)
+    
+    크롭은 resize()의 box로, 여백은 캔버스 크기로 표현하므로
+    어떤 모드든 원본 크기 복사본 없이 resample 한 번으로 처리
+    """
+    width, height = size
+    full = (0, 0, width, height)
+    
+    if resize_mode == 'crop1000':
+        resize_mode, target_size = 'cover', (1000, 1000)
     
-    # 이미 목표 크기인 경우
-    if width == size and height == size:
+    if resize_mode in TARGET_RESIZE_MODES and target_size:
+        target_w, target_h = target_size
+        
+        if resize_mode == 'exact':
+            return full, target_size, target_size
+        
+        if resize_mode == 'cover':
+            # 목표 비율의 가장 큰 영역을 중앙에서 잘라 목표 크기로
+            scale = max(target_w / width, target_h / height)
+            crop_w = min(width, max(1, round(target_w / scale)))
+            crop_h = min(height, max(1, round(target_h / scale)))
+            left = (width - crop_w) // 2
+            top = (height - crop_h) // 2
+            return (left, top, left + crop_w, top + crop_h), target_size, target_size
+        
+        # contain/pad: 목표 안에 들어가도록 (pad는 남는 부분을 여백으로)
+        scale = min(target_w / width, target_h / height)
+        fitted = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return full, fitted, target_size if resize_mode == 'pad' else fitted
+    
+    if resize_mode == 'fit' and max_size and max(width, height) > max_size:
+        # thumbnail과 동일하게 긴 쪽을 max_size로
+        if width >= height:
+            target = (max_size, max(1, round(height * max_size / width)))
+        else:
+            target = (max(1, round(width * max_size / height)), max_size)
+        return full, target, target
+    
+    return full, size, size
+
+def pad_to_canvas(img, canvas, background=DEFAULT_BACKGROUND):
+    """가운데 정렬 후 여백 채우기 (투명 이미지는 투명 여백)"""
+    if canvas == img.size:
         return img
     
-    # Step 1: 짧은 쪽을 기준으로 크롭할 영역 계산
-    if width > height:
-        # 가로가 더 긴 경우 - 좌우를 잘라냄
-        crop_size = height
-        left = (width - crop_size) // 2
-        top = 0
-        right = left + crop_size
-        bottom = crop_size
+    if has_alpha(img):
+        padded = Image.new('RGBA', canvas, (0, 0, 0, 0))
     else:
-        # 세로가 더 긴 경우 - 상하를 잘라냄
-        crop_size = width
-        left = 0
-        top = (height - crop_size) // 2
-        right = crop_size
-        bottom = top + crop_size
+        padded = Image.new('RGB', canvas, background)
+    padded.paste(img, ((canvas[0] - img.width) // 2, (canvas[1] - img.height) // 2))
+    return padded
+
+def resize_to_plan(img, box, target, canvas, background=DEFAULT_BACKGROUND):
+    """리사이즈 계획 적용 (크롭+축소는 resample 한 번, 여백은 결과 크기 캔버스에만)"""
+    if target != (box[2] - box[0], box[3] - box[1]):
+        img = img.resize(target, Image.Resampling.LANCZOS, box=box,
+                         reducing_gap=RESIZE_REDUCING_GAP)
+    elif box != (0, 0, img.width, img.height):
+        img = img.crop(box)
     
-    # Step 2: 정사각형으로 크롭
-    img = img.crop((left, top, right, bottom))
+    return pad_to_canvas(img, canvas, background)
+
+def parse_resize_options(data):
+    """리사이즈 파라미터 해석: (resize_mode, target_size)
+    
+    preset이 있으면 서버 측 프리셋을, 아니면 resizeMode와 width/height를 사용
+    """
+    preset_name = data.get('preset')
+    if preset_name:
+        # 목록/객체 같은 값은 딕셔너리 키로 쓸 수 없으므로 조회 전에 거부
+        preset = RESIZE_PRESETS.get(preset_name) if isinstance(preset_name, str) else None
+        if preset is None:
+            raise ValueError('UNKNOWN_PRESET', f'알 수 없는 프리셋: {preset_name}')
+        return preset['mode'], (preset['width'], preset['height'])
+    
+    resize_mode = data.get('resizeMode', 'fit')
+    if resize_mode not in TARGET_RESIZE_MODES:
+        return resize_mode, None
+    
+    try:
+        target_size = (int(data.get('width')), int(data.get('height')))
+    except (TypeError, ValueError):
+        raise ValueError('INVALID_TARGET_SIZE', f'{resize_mode} 모드에는 width/height가 필요합니다')
+    
+    if not all(1 <= side <= MAX_TARGET_SIZE for side in target_size):
+        raise ValueError('INVALID_TARGET_SIZE', f'목표 크기는 1~{MAX_TARGET_SIZE}px 입니다')
+    return resize_mode, target_size
+
+class PngStripReader:
+    """비인터레이스 8비트 PNG를 위에서부터 띠 단위로 디코딩 (전체 픽셀을 메모리에 올리지 않음)
     
-    # Step 3: 목표 크기(1000x1000)로 리사이즈
-    if img.size[0] != size:
-        img = img.resize((size, size), Image.Resampling.LANCZOS)
+    IDAT zlib 스트림을 필요한 행만큼만 풀고, 띠 첫 행의 필터가 참조하는 이전 행을
+    필터 없는 행으로 앞에 붙여 Pillow의 PNG(zip) 디코더로 복원
+    """
+    MODES = ('L', 'LA', 'RGB', 'RGBA')
+    
+    @classmethod
+    def supports(cls, img):
+        if img.format != 'PNG' or img.info.get('interlace') or 'transparency' in img.info:
+            return False
+        if getattr(img, 'n_frames', 1) > 1 or len(img.tile) != 1:
+            return False
+        decoder, _, _, rawmode = img.tile[0]
+        return decoder == 'zip' and rawmode == img.mode and img.mode in cls.MODES
+    
+    def __init__(self, img):
+        self.mode = img.mode
+        self.width, self.height = img.size
+        self.row_bytes = self.width * len(img.getbands())
+        self.chunks = self.idat_chunks(img.fp, img.tile[0][2])
+        self.inflater = zlib.decompressobj()
+        self.prior = bytes(self.row_bytes)  # 첫 행의 이전 행은 0
+        self.decoded = 0
+        self.cache = None
+        self.cache_top = 0
+    
+    @staticmethod
+    def idat_chunks(fp, offset):
+        """IDAT 청크 데이터를 1MB 단위로 (offset은 첫 IDAT 데이터 위치)"""
+        fp.seek(offset - 8)
+        while True:
+            header = fp.read(8)
+            if len(header) < 8:
+                return
+            length, kind = struct.unpack('>I4s', header)
+            if kind != b'IDAT':
+                return
+            remaining = length
+            while remaining:
+                piece = fp.read(min(remaining, 1024 * 1024))
+                if not piece:
+                    return
+                remaining -= len(piece)
+                yield piece
+            fp.read(4)  # CRC
+    
+    def decode_rows(self, count):
+        """다음 count개 행 디코딩"""
+        # 이전 행(필터 없음) + 이번 행들(필터 포함), 복사본이 겹치지 않도록 바로 해제
+        filtered = bytearray(b'\x00' + self.prior)
+        needed = len(filtered) + count * (self.row_bytes + 1)
+        while len(filtered) < needed:
+            data = self.inflater.unconsumed_tail or next(self.chunks, b'')
+            out = self.inflater.decompress(data, needed - len(filtered))
+            if not data and not out:
+                raise ValueError('PNG 이미지 데이터가 잘렸습니다')
+            filtered += out
+        
+        stream = zlib.compress(filtered, 0)
+        del filtered
+        band = Image.frombytes(self.mode, (self.width, count + 1), stream, 'zip', self.mode)
+        del stream
+        self.prior = band.crop((0, count, self.width, count + 1)).tobytes()
+        self.decoded += count
+        return band.crop((0, 1, self.width, count + 1))
+    
+    def read(self, top, bottom):
+        """[top, bottom) 행 띠 (top은 이전 호출보다 작아지지 않아야 함, 겹치는 행은 재사용)"""
+        parts = []
+        if self.cache is not None and top < self.decoded:
+            parts.append(self.cache.crop((0, top - self.cache_top, self.width, self.decoded - self.cache_top)))
+        
+        # 건너뛰는 행도 순서대로 풀어야 하므로 띠 크기 단위로 디코딩 후 버림
+        skip_rows = max(1, (LARGE_IMAGE_BUDGET // 4) // max(self.row_bytes, 1))
+        while self.decoded < top:
+            self.decode_rows(min(skip_rows, top - self.decoded)).close()
+        if bottom > self.decoded:
+            parts.append(self.decode_rows(bottom - self.decoded))
+        
+        if len(parts) == 1:
+            band = parts[0]
+        else:
+            band = Image.new(self.mode, (self.width, bottom - top))
+            y = 0
+            for part in parts:
+                band.paste(part, (0, y))
+                y += part.height
+        self.cache, self.cache_top = band, top
+        return band
+
+def strip_crop_proxy(img):
+    """띠 단위 디코딩으로 만든 크롭 분석용 축소본 (crop_proxy와 같은 크기)"""
+    import numpy as np
+    
+    scale = min(1, CROP_PROXY_SIZE / max(img.size))
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    proxy = Image.new('L', size)
+    reader = PngStripReader(img)
+    rows = max(STRIP_MIN_ROWS, (LARGE_IMAGE_BUDGET // 4) // max(reader.row_bytes, 1))
+    
+    for top in range(0, img.height, rows):
+        bottom = min(img.height, top + rows)
+        out_top, out_bottom = round(top * scale), round(bottom * scale)
+        band = reader.read(top, bottom)
+        if out_bottom > out_top:
+            gray = band.convert('L').resize((size[0], out_bottom - out_top), Image.Resampling.BILINEAR,
+                                            reducing_gap=2.0)
+            proxy.paste(gray, (0, out_top))
+    return np.asarray(proxy, dtype=np.float32)
+
+def strip_output_mode(img, output_format):
+    """스트립 결과 캔버스 모드"""
+    if output_format == 'png':
+        if has_alpha(img):
+            return 'RGBA'
+        return 'L' if img.mode == 'L' else 'RGB'
+    return 'RGB'
+
+def process_large_image(img, output_format, max_size, resize_mode,
+                        background=DEFAULT_BACKGROUND, crop_strategy='center', target_size=None):
+    """대용량 이미지 스트립 처리
+    
+    전체 크기 RGB 캔버스를 만들지 않고 가로 띠 단위로
+    투명도 합성과 리사이즈를 수행하여 작업 메모리를 예산 안으로 제한
+    """
+    # 회전은 축소된 결과에 적용 (90도 회전이면 회전 전 기준으로 목표 가로/세로를 바꿔 계획)
+    orientation = read_orientation(img)
+    rotated = orientation in (6, 8)
+    if rotated and target_size:
+        target_size = (target_size[1], target_size[0])
+    
+    # PNG는 띠 단위 디코딩, JPEG는 DCT 단계에서 축소 디코딩 (최대 1/8)
+    # (그 외 형식은 check_admission에서 전체 디코딩 크기가 예산 안인 것만 허용)
+    reader = None
+    gray = None
+    if PngStripReader.supports(img):
+        if crop_strategy in ('edge', 'entropy'):
+            gray = strip_crop_proxy(img)
+        reader = PngStripReader(img)
+    else:
+        requested = jpeg_draft_size(img, max_size, resize_mode, target_size)
+        if requested:
+            img.draft(img.mode, requested)
+        img.load()
+    
+    box, target, canvas = plan_resize(img.size, max_size, resize_mode, target_size)
+    box = choose_crop_box(img, box, crop_strategy, gray)
+    left, top, right, bottom = box
+    out_mode = strip_output_mode(img, output_format)
+    needs_resize = target != (right - left, bottom - top)
+    
+    # 띠 높이: 예산의 1/4 안에서 원본 띠 + 변환 띠가 들어가도록
+    scale_y = (bottom - top) / target[1]
+    margin = math.ceil(LANCZOS_SUPPORT * max(scale_y, 1)) + 1 if needs_resize else 0
+    strip_budget = LARGE_IMAGE_BUDGET // 4
+    src_rows = max(STRIP_MIN_ROWS, strip_budget // max((right - left) * 8, 1))
+    out_rows = max(1, int((src_rows - 2 * margin) / scale_y)) if needs_resize else src_rows
+    
+    result = Image.new(out_mode, target)
+    
+    for out_top in range(0, target[1], out_rows):
+        out_bottom = min(target[1], out_top + out_rows)
+        src_top = top + out_top * scale_y
+        src_bottom = top + out_bottom * scale_y
+        
+        # 필터 반경만큼 여유를 두고 잘라야 띠 경계에 이음매가 생기지 않음
+        crop_top = max(top, int(src_top) - margin)
+        crop_bottom = min(bottom, math.ceil(src_bottom) + margin)
+        if reader is not None:
+            band = reader.read(crop_top, crop_bottom)
+            if (left, right) != (0, img.width):
+                band = band.crop((left, 0, right, band.height))
+        else:
+            band = img.crop((left, crop_top, right, crop_bottom))
+        
+        if out_mode == 'RGB':
+            band = convert_to_rgb(band, output_format, background)
+        elif band.mode != out_mode:
+            band = band.convert(out_mode)
+        
+        if needs_resize:
+            band = band.resize(
+                (target[0], out_bottom - out_top),
+                Image.Resampling.LANCZOS,
+                box=(0, src_top - crop_top, right - left, src_bottom - crop_top)
+            )
+        
+        result.paste(band, (0, out_top))
+        if reader is None:
+            band.close()  # 띠 디코딩 결과는 다음 띠와 겹치는 행 재사용을 위해 유지
+    
+    img.close()
+    
+    rotations = {3: 180, 6: 270, 8: 90}
+    if orientation in rotations:
+        result = result.rotate(rotations[orientation], expand=True)
+    if rotated:
+        canvas = (canvas[1], canvas[0])
+    
+    return pad_to_canvas(result, canvas, background)
+
+def read_orientation(img):
+    """디코딩 없이 EXIF 방향 값 읽기"""
+    try:
+        if img.format == 'HEIF':
+            # pillow-heif는 열 때 EXIF 방향을 1로 바꾸고 원래 값을 따로 보관 (회전은 libheif가 적용)
+            return img.info.get('original_orientation')
+        if img.format == 'PNG':
+            # PNG의 getexif()는 eXIf 청크를 찾기 위해 픽셀까지 디코딩함
+            if 'exif' not in img.info:
+                return None
+            exif = Image.Exif()
+            exif.load(img.info['exif'])
+        else:
+            exif = img.getexif()
+        return exif.get(0x0112)
+    except Exception:
+        return None
+
+def estimate_cost(img, output_format, max_size, resize_mode, target_size=None):
+    """헤더 정보만으로 메모리/CPU 비용 추정"""
+    pixels = img.width * img.height
+    decoded = estimate_decoded_bytes(img)
+    _, target, canvas = plan_resize(img.size, max_size, resize_mode, target_size)
+    target_pixels = canvas[0] * canvas[1]
+    large = decoded > LARGE_IMAGE_BUDGET
+    
+    # 메모리: 디코딩 버퍼 + 합성/리사이즈 작업 버퍼 + 결과 버퍼
+    if large:
+        if img.format != 'HEIF':
+            # 스트립 경로는 띠 단위(PNG) 또는 축소(JPEG) 디코딩 (회전 전 기준으로 계획)
+            if target_size and read_orientation(img) in (6, 8):
+                target_size = (target_size[1], target_size[0])
+            decoded = strip_decode_bytes(img, max_size, resize_mode, target_size)
+        working = LARGE_IMAGE_BUDGET // 4
+    else:
+        working = pixels * 3 if has_alpha(img) and output_format != 'png' else 0
+    memory = decoded + working + target_pixels * 4
+    
+    decode_ns = DECODE_NS_PER_PIXEL.get(img.format, DEFAULT_DECODE_NS_PER_PIXEL)
+    resize_ns = RESIZE_NS_PER_PIXEL if target_pixels != pixels else 0
+    encode_ns = ENCODE_NS_PER_PIXEL.get(output_format, ENCODE_NS_PER_PIXEL['jpg'])
+    cpu_ns = pixels * (decode_ns + resize_ns) + target_pixels * encode_ns
+    
+    return {
+        'estimated_memory_bytes': memory,
+        'estimated_cpu_ms': round(cpu_ns / 1e6, 1),
+        'output_width': canvas[0],
+        'output_height': canvas[1],
+        'strip_processing': large,
+        'decode_bytes': decoded
+    }
+
+def probe_image(img, output_format='jpg', max_size=1920, resize_mode='fit', target_size=None):
+    """헤더만 읽어 이미지 정보와 처리 비용 반환 (픽셀 디코딩 없음)"""
+    info = {
+        'format': img.format,
+        'width': img.width,
+        'height': img.height,
+        'mode': img.mode,
+        'frames': getattr(img, 'n_frames', 1),
+        'orientation': read_orientation(img),
+        'has_alpha': has_alpha(img)
+    }
+    info.update(estimate_cost(img, output_format, max_size, resize_mode, target_size))
+    return info
+
+def check_admission(info):
+    """프로브 결과로 처리 가능 여부 판단"""
+    pixels = info['width'] * info['height']
+    if Image.MAX_IMAGE_PIXELS and pixels > Image.MAX_IMAGE_PIXELS:
+        return False, f"이미지 해상도 초과 ({pixels // 1000000}MP, 최대 {Image.MAX_IMAGE_PIXELS // 1000000}MP)"
+    if info['strip_processing'] and info['format'] != 'HEIF' and info['decode_bytes'] > LARGE_IMAGE_BUDGET:
+        # 띠 단위/축소 디코딩을 할 수 없는 형식(TIFF, WEBP, 인터레이스/16비트 PNG 등)은 전체 디코딩이 예산 안이어야 함
+        return False, (f"디코딩 메모리 예산 초과 ({info['decode_bytes'] // (1024 * 1024)}MB, "
+                       f"최대 {LARGE_IMAGE_BUDGET // (1024 * 1024)}MB): 이 형식은 띠 단위 디코딩을 지원하지 않습니다")
+    return True, None
+
+def heif_summary():
+    """HEIF 단계별 평균 처리 시간 (ms)"""
+    with heif_stats_lock:
+        count = heif_stats['count']
+        summary = {'count': count, 'decode_threads': HEIF_DECODE_THREADS}
+        if count:
+            for stage, total in heif_stats.items():
+                if stage != 'count':
+                    summary[f'avg_{stage}_ms'] = round(total / count, 1)
+        return summary
+
+def record_heif_timings(timings):
+    """HEIF 단계별 처리 시간 누적"""
+    with heif_stats_lock:
+        heif_stats['count'] += 1
+        for stage, elapsed in timings.items():
+            heif_stats[stage] = heif_stats.get(stage, 0.0) + elapsed
+
+def process_heif_image(img, output_format, max_size, resize_mode,
+                       background=DEFAULT_BACKGROUND, timings=None, crop_strategy='center',
+                       target_size=None):
+    """HEIF 전용 처리 경로
+    
+    libheif가 기본(primary) 이미지를 디코딩하면서 irot/imir 회전을 이미 적용하므로
+    EXIF 회전 없이 바로 크롭+축소를 한 번에 수행하고, 투명도 합성은 축소된 결과에만 적용.
+    기본 이미지는 항상 원본 해상도로 디코딩됨 (pillow-heif 0.13은 내장 썸네일의 크기만
+    알려주고 디코딩 API가 없으며, libheif에도 축소 디코딩이 없음)
+    """
+    if timings is None:
+        timings = {}
+    
+    start = time.perf_counter()
+    img.load()
+    timings['decode'] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    box, target, canvas = plan_resize(img.size, max_size, resize_mode, target_size)
+    box = choose_crop_box(img, box, crop_strategy)
+    img = resize_to_plan(img, box, target, canvas, background)
+    timings['resize'] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    if output_format != 'png':
+        img = convert_to_rgb(img, output_format, background)
+    timings['convert'] = (time.perf_counter() - start) * 1000
     
     return img
 
-def process_single_image(img_data, output_format, quality, max_size, resize_mode):
-    """단일 이미지 처리"""
+def srgb_transform(icc_profile, mode):
+    """ICC 프로필 -> sRGB 변환 (캐시, 이미 sRGB이거나 RGB 프로필이 아니거나 변환할 수 없으면 None)"""
+    key = (hashlib.sha1(icc_profile).digest(), mode)
+    with icc_transform_lock:
+        if key in icc_transforms:
+            icc_stats['hits'] += 1
+            return icc_transforms[key]
+        icc_stats['misses'] += 1
+    
+    from PIL import ImageCms  # 선택 기능이므로 지연 로딩
+    
+    try:
+        source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        if source.profile.xcolor_space != 'RGB ':
+            # convert('RGB') 뒤에 남은 CMYK/Lab 프로필은 RGB 픽셀에 적용할 수 없음
+            transform = None
+        elif 'srgb' in ImageCms.getProfileDescription(source).lower():
+            transform = None
+        else:
+            transform = ImageCms.buildTransform(source, ImageCms.createProfile('sRGB'), mode, mode,
+                                               renderingIntent=ImageCms.Intent.PERCEPTUAL)
+    except (ImageCms.PyCMSError, OSError, ValueError) as e:
+        logger.warning("ICC 프로필 변환 불가", extra={'fields': {'error': str(e)}})
+        transform = None
+    
+    with icc_transform_lock:
+        if len(icc_transforms) >= ICC_TRANSFORM_CACHE_SIZE:
+            icc_transforms.pop(next(iter(icc_transforms)))
+        icc_transforms[key] = transform
+    return transform
+
+def minimal_exif(exif):
+    """촬영 시각/작성자/저작권만 남긴 EXIF (위치/기기 정보 제거)"""
+    minimal = Image.Exif()
+    for tag in MINIMAL_EXIF_TAGS:
+        if tag in exif:
+            minimal[tag] = exif[tag]
+    
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    kept = {tag: exif_ifd[tag] for tag in MINIMAL_EXIF_IFD_TAGS if tag in exif_ifd}
+    if kept:
+        minimal[ExifTags.IFD.Exif] = kept  # 하위 IFD는 딕셔너리로 넣어야 기록됨
+    return minimal
+
+def apply_metadata(img, source_info, metadata='strip'):
+    """메타데이터 모드 적용: (이미지, 저장 옵션)
+    
+    strip/minimal은 픽셀을 그대로 두고 ICC를 버리며, srgb는 sRGB가 아닌 ICC(Display P3 등)를
+    sRGB로 변환한 뒤 버리고, preserve는 원본 ICC와 EXIF(방향은 이미 적용했으므로 제거)를 유지
+    """
+    icc_profile = source_info.get('icc_profile')
+    exif_bytes = source_info.get('exif')
+    options = {'icc_profile': None}
+    
+    if metadata == 'preserve':
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        if exif_bytes:
+            exif = Image.Exif()
+            exif.load(exif_bytes)
+            exif.pop(0x0112, None)
+            options['exif'] = exif.tobytes()
+        return img, options
+    
+    if metadata == 'srgb' and icc_profile and img.mode in ('RGB', 'RGBA'):
+        transform = srgb_transform(icc_profile, img.mode)
+        if transform is not None:
+            from PIL import ImageCms
+            img = ImageCms.applyTransform(img, transform)
+    
+    if metadata == 'minimal' and exif_bytes:
+        exif = Image.Exif()
+        exif.load(exif_bytes)
+        minimal = minimal_exif(exif)
+        if len(minimal):
+            options['exif'] = minimal.tobytes()
+    
+    return img, options
+
+def save_options(output_format, quality, effort='normal'):
+    """형식별 저장 옵션 (effort='fast'는 과부하 시 화질은 유지하고 압축 노력만 낮춤)"""
+    fast = effort == 'fast'
+    save_kwargs = {
+        'format': SUPPORTED_OUTPUT_FORMATS[output_format]['pil'],
+        'optimize': not fast
+    }
+    
+    if output_format == 'jpg':
+        save_kwargs['quality'] = quality
+        save_kwargs['progressive'] = True
+        save_kwargs['subsampling'] = 0  # 최고 품질
+    elif output_format == 'png':
+        save_kwargs['compress_level'] = 1 if fast else 6
+    elif output_format == 'webp':
+        save_kwargs['quality'] = quality
+        save_kwargs['method'] = 2 if fast else 6
+    
+    return save_kwargs
+
+def window_means(values, size):
+    """size x size 창 평균 (적분 영상, 유효 영역만)"""
+    import numpy as np
+    
+    integral = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=np.float64)
+    integral[1:, 1:] = values.cumsum(0).cumsum(1)
+    sums = (integral[size:, size:] - integral[:-size, size:]
+            - integral[size:, :-size] + integral[:-size, :-size])
+    return sums / (size * size)
+
+def ssim(reference, distorted):
+    """밝기 채널 SSIM (균일 창, 두 배열은 같은 크기의 float 그레이스케일)"""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    size = min(SSIM_WINDOW, *reference.shape)
+    
+    mu_x = window_means(reference, size)
+    mu_y = window_means(distorted, size)
+    var_x = window_means(reference * reference, size) - mu_x * mu_x
+    var_y = window_means(distorted * distorted, size) - mu_y * mu_y
+    cov = window_means(reference * distorted, size) - mu_x * mu_y
+    
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(ssim_map.mean())
+
+def choose_quality(img, output_format, target=AUTO_QUALITY_SSIM, effort='normal'):
+    """목표 SSIM을 만족하는 가장 낮은 품질 탐색: (품질, SSIM)
+    
+    리사이즈가 끝난 결과의 축소본을 품질별로 최종 저장과 같은 노력(effort)으로 시험 인코딩하여 이진 탐색.
+    PNG처럼 품질 개념이 없는 형식은 최고 품질/1.0 반환
+    """
+    low, high = AUTO_QUALITY_RANGE
+    if output_format not in ('jpg', 'webp'):
+        return high, 1.0
+    
+    import numpy as np
+    
+    scale = AUTO_QUALITY_PROXY_SIZE / max(img.size)
+    if scale < 1:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        proxy = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    else:
+        proxy = img
+    reference = np.asarray(proxy.convert('L'), dtype=np.float64)
+    
+    def score(quality):
+        # 허프만 최적화/프로그레시브는 픽셀에 영향이 없으므로 시험 인코딩에서는 생략
+        options = save_options(output_format, quality, effort)
+        options.pop('optimize')
+        options.pop('progressive', None)
+        buffer = io.BytesIO()
+        proxy.save(buffer, **options)
+        buffer.seek(0)
+        with Image.open(buffer) as decoded:
+            return ssim(reference, np.asarray(decoded.convert('L'), dtype=np.float64))
+    
+    # SSIM은 품질에 대해 단조 증가한다고 보고 조건을 만족하는 최저 품질 탐색
+    best = (high, score(high))
+    while low < best[0]:
+        middle = (low + best[0]) // 2
+        middle_score = score(middle)
+        if middle_score >= target:
+            best = (middle, middle_score)
+        else:
+            low = middle + 1
+    return best
+
+def classify_image(img):
+    """형식 선택용 분류: 투명도 사용 여부, 색 수, 평탄 영역 비율 (긴 변 512px 축소본)"""
+    import numpy as np
+    
+    alpha = False
+    if has_alpha(img):
+        alpha_channel = img.getchannel('A') if img.mode in ('RGBA', 'LA', 'PA') else img.convert('RGBA').getchannel('A')
+        alpha = alpha_channel.getextrema()[0] < 255
+    
+    # 색 수가 늘지 않도록 NEAREST로 축소
+    scale = AUTO_FORMAT_PROXY_SIZE / max(img.size)
+    if scale < 1:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        proxy = img.resize(size, Image.Resampling.NEAREST)
+    else:
+        proxy = img
+    proxy = proxy.convert('RGBA' if alpha else 'RGB')
+    
+    colors = proxy.getcolors(AUTO_FORMAT_MAX_COLORS)
+    gray = np.asarray(proxy.convert('L'), dtype=np.int16)
+    if min(gray.shape) > 1:
+        flat = ((np.diff(gray, axis=1)[:-1, :] == 0) & (np.diff(gray, axis=0)[:, :-1] == 0)).mean()
+    else:
+        flat = 1.0
+    
+    graphic = colors is not None or flat >= AUTO_FORMAT_FLAT_RATIO
+    return {
+        'class': 'graphic' if graphic else 'photo',
+        'alpha': alpha,
+        'colors': len(colors) if colors is not None else None,
+        'flat_ratio': round(float(flat), 3)
+    }
+
+def choose_format(img, quality=85, background=DEFAULT_BACKGROUND):
+    """이미지별 출력 형식 선택 (리사이즈된 결과 기준)
+    
+    그래픽(적은 색/넓은 평탄 영역)은 PNG, 투명한 사진은 WEBP를 우선하고,
+    나머지는 가운데 256px 크롭을 후보 형식으로 시험 인코딩해 가장 작은 형식 선택
+    """
+    decision = classify_image(img)
+    
+    allowed = [f for f in AUTO_FORMATS if f in SUPPORTED_OUTPUT_FORMATS] or ['jpg']
+    suitable = allowed
+    if decision['alpha']:
+        suitable = [f for f in allowed if SUPPORTED_OUTPUT_FORMATS[f]['alpha']] or allowed
+    
+    if decision['class'] == 'graphic':
+        preferred = 'png'
+    else:
+        preferred = 'webp' if decision['alpha'] else None
+    candidates = [preferred] if preferred in suitable else suitable
+    
+    if len(candidates) > 1:
+        size = AUTO_FORMAT_TRIAL_SIZE
+        left = max(0, (img.width - size) // 2)
+        top = max(0, (img.height - size) // 2)
+        crop = img.crop((left, top, min(img.width, left + size), min(img.height, top + size)))
+        
+        trial_bytes = {}
+        for candidate in candidates:
+            sample = crop if candidate == 'png' else convert_to_rgb(crop, candidate, background)
+            buffer = io.BytesIO()
+            sample.save(buffer, **save_options(candidate, quality))
+            trial_bytes[candidate] = buffer.tell()
+        decision['trial_bytes'] = trial_bytes
+        candidates = [min(trial_bytes, key=trial_bytes.get)]
+    
+    decision['format'] = candidates[0]
+    return decision
+
+def parse_palette_options(data):
+    """PNG 팔레트 파라미터 해석 (pngPalette, paletteColors, pngDither)"""
+    mode = data.get('pngPalette', 'off')
+    if mode not in PNG_PALETTE_MODES:
+        raise ValueError(f'지원하지 않는 팔레트 모드: {mode}')
+    
+    return {
+        'mode': mode,
+        'colors': max(2, min(256, int(data.get('paletteColors', 256)))),
+        'dither': bool(data.get('pngDither', False))
+    }
+
+def quantize_method(img):
+    """양자화 알고리즘 (libimagequant가 있으면 우선, RGBA는 median-cut 미지원)"""
+    from PIL import features
+    
+    if features.check('libimagequant'):
+        return Image.Quantize.LIBIMAGEQUANT
+    return Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+
+def exact_palette(img, colors):
+    """getcolors() 결과로 팔레트 이미지 생성 (모든 픽셀 색/투명도를 그대로 유지)"""
+    import numpy as np
+    
+    def pack(values):
+        packed = np.zeros(values.shape[:-1], dtype=np.uint32)
+        for channel in range(values.shape[-1]):
+            packed = (packed << 8) | values[..., channel]
+        return packed
+    
+    table = np.array(sorted(color for _, color in colors), dtype=np.uint32)
+    indices = np.searchsorted(pack(table), pack(np.asarray(img, dtype=np.uint32)))
+    
+    quantized = Image.fromarray(indices.astype(np.uint8), 'P')
+    quantized.putpalette(table.astype(np.uint8).tobytes(), img.mode)
+    return quantized
+
+def palette_proxy(img):
+    """양자화 품질 비교용 축소본 (밝기, 투명도 채널)"""
+    import numpy as np
+    
+    scale = AUTO_QUALITY_PROXY_SIZE / max(img.size)
+    if scale < 1:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        img = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    channels = [img.convert('L')]
+    if img.mode == 'RGBA':
+        channels.append(img.getchannel('A'))
+    return [np.asarray(channel, dtype=np.float64) for channel in channels]
+
+def quantize_png(img, palette):
+    """PNG8 팔레트 양자화: (이미지, 적용 정보 또는 None)
+    
+    원본 색 수가 팔레트 크기 이하면 무손실 변환, 아니면 양자화 후
+    auto 모드에서는 밝기/투명도 SSIM이 PNG_PALETTE_SSIM 이상일 때만 채택
+    """
+    if palette is None or palette['mode'] == 'off' or img.mode not in ('RGB', 'RGBA'):
+        return img, None
+    
+    colors = img.getcolors(palette['colors'])
+    if colors is not None:
+        # 팔레트에 모두 들어가는 색 수 (무손실: 양자화 대신 원본 색으로 팔레트 구성)
+        return exact_palette(img, colors), {'colors': len(colors), 'lossless': True}
+    
+    dither = Image.Dither.FLOYDSTEINBERG if palette['dither'] else Image.Dither.NONE
+    quantized = img.quantize(palette['colors'], method=quantize_method(img), dither=dither)
+    
+    reference = palette_proxy(img)
+    distorted = palette_proxy(quantized.convert(img.mode))
+    score = min(ssim(a, b) for a, b in zip(reference, distorted))
+    
+    if palette['mode'] == 'auto' and score < PNG_PALETTE_SSIM:
+        return img, None
+    return quantized, {'colors': palette['colors'], 'lossless': False, 'ssim': round(score, 4)}
+
+def process_single_image(img_data, output_format, quality, max_size, resize_mode,
+                         background=DEFAULT_BACKGROUND, crop_strategy='center', target_size=None,
+                         ssim_target=AUTO_QUALITY_SSIM, palette=None, metadata=DEFAULT_METADATA,
+                         effort='normal'):
+    """단일 이미지 처리
+    
+    quality='auto'면 목표 SSIM 기준으로 이미지별 품질을, output_format='auto'면
+    리사이즈 후 이미지 특성에 따라 형식을 선택 (그때까지는 PNG처럼 투명도 유지)
+    """
     img_name = img_data.get('name', 'untitled')
+    img_bytes = None
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    auto_format = output_format == 'auto'
+    if auto_format:
+        output_format = 'png'
     
     try:
-        # Base64 디코딩
-        base64_str = extract_base64(img_data['data'])
-        img_bytes = base64.b64decode(base64_str)
+        # Base64 디코딩 (큰 입력은 디스크 스풀링 + mmap)
+        img_bytes = open_input(img_data['data'])
         
-        # 이미지 열기
-        img = Image.open(io.BytesIO(img_bytes))
+        if is_heif_data(img_bytes):
+            ensure_heif_opener()
         
-        # EXIF 방향 수정
-        img = fix_image_orientation(img)
+        # 이미지 열기 (헤더만 읽음)
+        img = Image.open(img_bytes if isinstance(img_bytes, mmap.mmap) else io.BytesIO(img_bytes))
+        # 원본 ICC/EXIF (PNG는 디코딩 후 채워지므로 같은 딕셔너리를 참조)
+        source_info = img.info
         
-        # 형식별 변환
-        if output_format != 'png':
-            img = convert_to_rgb(img, output_format)
+        # 디코딩 전 헤더 검사
+        info = probe_image(img, output_format, max_size, resize_mode, target_size)
+        ok, error_msg = check_admission(info)
+        if not ok:
+            img.close()
+            logger.warning("이미지 거부", extra={'fields': {'event': 'image_rejected', 'name': img_name,
+                                                       'error': error_msg}})
+            return False, error_msg
         
-        # 리사이징
-        if resize_mode == 'crop1000':
-            img = make_square(img, 1000)
-        elif resize_mode == 'fit' and max_size:
-            # 비율 유지 리사이징
-            if max(img.size) > max_size:
-                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        timings = None
+        if img.format == 'HEIF':
+            # HEIF: 전용 디코딩 경로 (단계별 시간 기록)
+            timings = {}
+            img = process_heif_image(img, output_format, max_size, resize_mode, background,
+                                     timings, crop_strategy, target_size)
+        elif is_large_image(img):
+            # 대용량: 스트립 단위 합성/리사이즈
+            logger.info("스트립 처리", extra={'fields': {'name': img_name, 'width': img.width, 'height': img.height}})
+            img = process_large_image(img, output_format, max_size, resize_mode, background,
+                                      crop_strategy, target_size)
+        else:
+            # EXIF 방향 수정
+            img = fix_image_orientation(img)
+            
+            # 형식별 변환
+            if output_format != 'png':
+                img = convert_to_rgb(img, output_format, background)
+            
+            # 리사이징 (크롭/축소/여백을 한 번에)
+            box, target, canvas = plan_resize(img.size, max_size, resize_mode, target_size)
+            box = choose_crop_box(img, box, crop_strategy)
+            img = resize_to_plan(img, box, target, canvas, background)
         
-        # 저장 옵션
-        save_kwargs = {
-            'format': SUPPORTED_OUTPUT_FORMATS[output_format]['pil'],
-            'optimize': True
-        }
+        # PNG(자동 형식 포함)로 저장할 수 없는 모드는 형식 결정/시험 인코딩 전에 정규화
+        if output_format == 'png' and img.mode not in PNG_MODES:
+            img = img.convert('RGBA' if has_alpha(img) else 'RGB')
+        
+        # 자동 형식: 리사이즈된 결과로 형식 결정 후 투명도 합성
+        format_decision = None
+        if auto_format:
+            format_decision = choose_format(img, 85 if quality == 'auto' else quality, background)
+            output_format = format_decision['format']
+            if output_format != 'png':
+                img = convert_to_rgb(img, output_format, background)
+            elif img.mode not in PNG_MODES:
+                img = img.convert('RGBA' if format_decision['alpha'] else 'RGB')
         
-        if output_format == 'jpg':
-            save_kwargs['quality'] = quality
-            save_kwargs['progressive'] = True
-            save_kwargs['subsampling'] = 0  # 최고 품질
-        elif output_format == 'png':
-            save_kwargs['compress_level'] = 6
-        elif output_format == 'webp':
-            save_kwargs['quality'] = quality
-            save_kwargs['method'] = 6
+        # 메타데이터 모드 (sRGB 변환은 리사이즈된 결과에만)
+        img, metadata_options = apply_metadata(img, source_info, metadata)
+        
+        # 자동 품질: 리사이즈된 결과로 품질 탐색
+        ssim_score = None
+        if quality == 'auto' and output_format != 'png':
+            quality, ssim_score = choose_quality(img, output_format, ssim_target, effort)
+        
+        # PNG8 팔레트 양자화 (그래픽은 크기도 작고 deflate도 빠름)
+        palette_info = None
+        if output_format == 'png':
+            img, palette_info = quantize_png(img, palette)
+        
+        # 저장 옵션
+        save_kwargs = save_options(output_format, quality, effort)
+        save_kwargs.update(metadata_options)
         
         # 메모리 버퍼에 저장
-        output = io.BytesIO()
+        start = time.perf_counter()
+        output = SpoolingOutput(SPOOL_THRESHOLD)
         img.save(output, **save_kwargs)
-        output.seek(0)
+        if timings is not None:
+            timings['encode'] = (time.perf_counter() - start) * 1000
         
         # 결과 생성
         base_name = os.path.splitext(img_name)[0]
-        suffix = '_1000x1000' if resize_mode == 'crop1000' else ''
+        sized = resize_mode == 'crop1000' or resize_mode in TARGET_RESIZE_MODES
+        suffix = f'_{img.width}x{img.height}' if sized else ''
         new_name = f"{base_name}{suffix}.{output_format}"
         
+        # 버퍼를 복사하지 않고 Base64 인코딩 (응답에도 bytes 그대로 전달)
+        size = output.tell()
+        encoded = encode_output(output)
+        
         result = {
             'name': new_name,
-            'data': base64.b64encode(output.getvalue()).decode(),
-            'size': len(output.getvalue()),
+            'data': encoded,
+            'size': size,
             'width': img.width,
             'height': img.height
         }
         
-        # 메모리 정리
+        if format_decision is not None:
+            result['format'] = output_format
+            result['format_decision'] = format_decision
+        
+        if palette_info is not None:
+            result['palette'] = palette_info
+        
+        if ssim_score is not None:
+            result['quality'] = quality
+            result['ssim'] = round(ssim_score, 4)
+        
+        if effort != 'normal':
+            result['effort'] = effort
+        
+        if timings is not None:
+            record_heif_timings(timings)
+            result['timings'] = {stage: round(elapsed, 1) for stage, elapsed in timings.items()}
+        
+        # 자원 사용량 (CPU는 이 스레드 기준, 최대 메모리는 이미지 버퍼 기준 추정)
+        result['usage'] = {
+            'cpu_ms': round((time.thread_time() - cpu_start) * 1000, 1),
+            'wall_ms': round((time.perf_counter() - wall_start) * 1000, 1),
+            'pixels': info['width'] * info['height'],
+            'estimated_peak_bytes': info['estimated_memory_bytes'],
+            'bytes_in': len(img_bytes),
+            'bytes_out': size
+        }
+        
+        # 메모리 정리 (출력 버퍼는 encode_output에서 정리/이관)
         img.close()
-        output.close()
         del img, output
         
-        logger.info(f"성공: {img_name} -> {new_name} ({result['size']} bytes)")
+        if log_sampled():
+            logger.info('이미지 변환', extra={'fields': {
+                'event': 'image',
+                'name': img_name,
+                'output': new_name,
+                'format': output_format,
+                'quality': quality,
+                'resize_mode': resize_mode,
+                'max_size': max_size,
+                'target_size': target_size,
+                'metadata': metadata,
+                'effort': effort,
+                'width': result['width'],
+                'height': result['height'],
+                'size': size,
+                'usage': result['usage'],
+                'timings': result.get('timings'),
+                'sample_rate': LOG_SAMPLE_RATE
+            }})
         return True, result
         
     except Exception as e:
-        logger.error(f"실패: {img_name} - {str(e)}\n{traceback.format_exc()}")
+        logger.error('이미지 변환 실패', exc_info=True, extra={'fields': {
+            'event': 'image_error',
+            'name': img_name,
+            'error': str(e),
+            'format': output_format,
+            'quality': quality,
+            'resize_mode': resize_mode,
+            'max_size': max_size,
+            'target_size': target_size,
+            'metadata': metadata
+        }})
         return False, f"처리 오류: {str(e)}"
+    
+    finally:
+        if isinstance(img_bytes, mmap.mmap):
+            img_bytes.close()
+
+def result_cache_key(data_str, options):
+    """입력 Base64와 변환 옵션의 해시 (큰 입력도 조각 단위로 복사 없이)"""
+    digest = hashlib.sha256(repr(options).encode())
+    if isinstance(data_str, (bytes, mmap.mmap)):
+        digest.update(data_str)
+        return digest.hexdigest()
+    
+    for start in range(0, len(data_str), SPOOL_CHUNK_CHARS):
+        digest.update(data_str[start:start + SPOOL_CHUNK_CHARS].encode('ascii', 'ignore'))
+    return digest.hexdigest()
+
+def convert_with_cache(img_data, options, key=None):
+    """결과 캐시를 거친 단일 이미지 처리 (options는 process_single_image의 나머지 인자)"""
+    if RESULT_CACHE_TTL <= 0:
+        return process_single_image(img_data, *options)
+    
+    key = key or result_cache_key(img_data['data'], options)
+    base_name = os.path.splitext(img_data.get('name', 'untitled'))[0]
+    
+    try:
+        cached = shared_state.cache_get(key)
+    except Exception as e:
+        logger.warning("캐시 조회 실패", extra={'fields': {'error': str(e)}})
+        cached = None
+    
+    if cached is not None:
+        meta, data = cached.split(b'\n', 1)
+        meta = json.loads(meta)
+        result = {'name': base_name + meta.pop('name_suffix'), 'data': data, **meta, 'cached': True}
+        if log_sampled():
+            logger.info('캐시 적중', extra={'fields': {'event': 'cache_hit', 'name': result['name'],
+                                                      'sample_rate': LOG_SAMPLE_RATE}})
+        return True, result
+    
+    success, result = process_single_image(img_data, *options)
+    
+    # 메모리 결과만 캐시 (스풀링된 큰 결과는 제외)
+    if success and isinstance(result['data'], bytes) and len(result['data']) <= CACHE_MAX_ITEM_BYTES:
+        meta = {k: v for k, v in result.items() if k not in ('name', 'data', 'usage')}
+        meta['name_suffix'] = result['name'][len(base_name):]
+        try:
+            shared_state.cache_set(key, json.dumps(meta).encode() + b'\n' + result['data'], RESULT_CACHE_TTL)
+        except Exception as e:
+            logger.warning("캐시 저장 실패", extra={'fields': {'error': str(e)}})
+    
+    return success, result
 
 @app.route('/')
 def index():
     """메인 페이지"""
     return render_template('index_v2.html')
 
+def state_summary():
+    """공유 상태 백엔드 요약"""
+    summary = {'backend': shared_state.name, 'max_total': MAX_CONCURRENT_TOTAL, 'slot_ttl': SLOT_TTL}
+    try:
+        summary['active_total'] = shared_state.active_slots()
+    except Exception as e:
+        summary['error'] = str(e)
+    return summary
+
+def scheduler_summary():
+    """우선순위 스케줄러 상태"""
+    with processing_lock:
+        return {
+            'active': dict(scheduler_stats['active']),
+            'shed': dict(scheduler_stats['shed']),
+            'degraded': scheduler_stats['degraded'],
+            'overloaded': is_overloaded(),
+            'interactive_reserved': INTERACTIVE_RESERVED,
+            'interactive_latency_ms': round(scheduler_stats['interactive_latency_ms'], 1),
+            'interactive_slo_ms': INTERACTIVE_SLO_MS
+        }
+
+def process_memory():
+    """프로세스 RSS와 열린 파일 디스크립터 수 (/proc이 없으면 최대 RSS)"""
+    try:
+        with open('/proc/self/status') as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmRSS:'))
+        open_fds = len(os.listdir('/proc/self/fd'))
+    except (OSError, StopIteration):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        open_fds = None
+    return {'rss_mb': round(rss / 1048576, 1), 'open_fds': open_fds}
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """헬스 체크 엔드포인트"""
@@ -294,24 +1914,521 @@ def health_check():
         'version': '2.0',
         'active_processes': active_processes,
         'max_processes': MAX_CONCURRENT_PROCESSES,
+        'scheduler': scheduler_summary(),
+        'heif': heif_summary(),
+        'icc_transforms': {'cached': len(icc_transforms), **icc_stats},
+        'state': state_summary(),
+        'memory': process_memory(),
+        'logging': {'format': LOG_FORMAT, 'sample_rate': LOG_SAMPLE_RATE, 'queued': log_handler.queue.qsize()},
+        'startup': startup_report,
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/presets', methods=['GET'])
+def list_presets():
+    """크기 프리셋 목록"""
+    return jsonify({
+        'presets': RESIZE_PRESETS,
+        'modes': ['fit', 'crop1000', 'none'] + sorted(TARGET_RESIZE_MODES)
+    })
+
+def duplicate_result(result, source_name, img_name, source_index):
+    """중복 입력의 결과 (같은 변환 결과를 요청한 파일명으로)"""
+    suffix = result['name'][len(os.path.splitext(source_name)[0]):]
+    shared = {k: v for k, v in result.items() if k != 'usage'}  # 사용량은 원본에만 집계
+    return {**shared, 'name': os.path.splitext(img_name)[0] + suffix, 'duplicate_of': source_index}
+
+def server_error(e):
+    """처리 중 예외 응답"""
+    logger.error('서버 오류', exc_info=True, extra={'fields': {'event': 'server_error', 'error': str(e)}})
+    return jsonify({
+        'success': False,
+        'error': '서버 오류가 발생했습니다',
+        'code': 'SERVER_ERROR',
+        'detail': str(e) if app.debug else None
+    }), 500
+
+def client_id():
+    """사용량 집계/작업량 제한 대상 (API 키가 있으면 키, 없으면 IP)"""
+    api_key = request.headers.get('X-API-Key')
+    return f'key:{api_key}' if api_key else get_remote_address()
+
+def request_usage(results, request_start, cpu_start):
+    """요청 전체 자원 사용량 (CPU는 요청 스레드 기준, 결과 캐시/중복 이미지는 변환 비용 없음)"""
+    images = [result['usage'] for result in results if 'usage' in result]
+    return {
+        'cpu_ms': round((time.thread_time() - cpu_start) * 1000, 1),
+        'wall_ms': round((time.perf_counter() - request_start) * 1000, 1),
+        'pixels': sum(usage['pixels'] for usage in images),
+        'estimated_peak_bytes': max((usage['estimated_peak_bytes'] for usage in images), default=0),
+        'bytes_in': (request.content_length or 0) + g.get('upload_bytes', 0),
+        'bytes_out': sum(result['size'] for result in results)
+    }
+
+def work_limited(func):
+    """데코레이터: 클라이언트별 작업량 제한 (실제 사용한 CPU 초만큼 처리 후 차감)"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not limiter.enabled:
+            return func(*args, **kwargs)
+        
+        client = client_id()
+        try:
+            allowed = limiter.limiter.test(WORK_LIMIT, 'work', client)
+        except Exception as e:
+            logger.warning("작업량 확인 실패", extra={'fields': {'error': str(e)}})
+            allowed = True
+        
+        if not allowed:
+            reset_at, _ = limiter.limiter.get_window_stats(WORK_LIMIT, 'work', client)
+            retry_after = max(1, math.ceil(reset_at - time.time()))
+            response = jsonify({
+                'error': '처리량 한도를 초과했습니다. 잠시 후 다시 시도해주세요.',
+                'code': 'WORK_LIMIT_EXCEEDED',
+                'limit': str(WORK_LIMIT),
+                'retry_after': retry_after
+            })
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        
+        response = func(*args, **kwargs)
+        
+        usage = g.get('usage')
+        if usage:
+            try:
+                limiter.limiter.hit(WORK_LIMIT, 'work', client, cost=max(1, math.ceil(usage['cpu_ms'] / 1000)))
+            except Exception as e:
+                logger.warning("작업량 기록 실패", extra={'fields': {'error': str(e)}})
+        return response
+    
+    return wrapper
+
+def convert_payload(data, request_start):
+    """변환 요청 처리 (data는 JSON 본문과 같은 구조, images의 data는 Base64 또는 원본 바이트)"""
+    cpu_start = time.thread_time()
+    if not data:
+        return jsonify({'error': '데이터가 없습니다', 'code': 'NO_DATA'}), 400
+    
+    # 파라미터 추출
+    images = data.get('images', [])
+    if not images:
+        return jsonify({'error': '이미지가 없습니다', 'code': 'NO_IMAGES'}), 400
+    
+    if len(images) > 50:
+        return jsonify({'error': '최대 50개까지 처리 가능합니다', 'code': 'TOO_MANY_IMAGES'}), 400
+    
+    output_format = data.get('format', 'jpg').lower()
+    if output_format not in SUPPORTED_OUTPUT_FORMATS and output_format != 'auto':
+        return jsonify({
+            'error': f'지원하지 않는 출력 형식: {output_format}',
+            'code': 'UNSUPPORTED_FORMAT',
+            'supported': list(SUPPORTED_OUTPUT_FORMATS.keys()) + ['auto']
+        }), 400
+    
+    quality = data.get('quality', 85)
+    if quality != 'auto':
+        quality = max(1, min(100, int(quality)))
+    ssim_target = max(0.5, min(0.999, float(data.get('ssimTarget', AUTO_QUALITY_SSIM))))
+    max_size = max(100, min(10000, int(data.get('maxSize', 1920))))
+    
+    try:
+        resize_mode, target_size = parse_resize_options(data)
+    except ValueError as e:
+        code, message = e.args
+        return jsonify({'error': message, 'code': code, 'presets': sorted(RESIZE_PRESETS)}), 400
+    
+    crop_strategy = data.get('cropStrategy', 'center')
+    if crop_strategy not in CROP_STRATEGIES:
+        return jsonify({
+            'error': f'지원하지 않는 크롭 방식: {crop_strategy}',
+            'code': 'INVALID_CROP_STRATEGY',
+            'supported': sorted(CROP_STRATEGIES)
+        }), 400
+    
+    metadata = data.get('metadata', DEFAULT_METADATA)
+    if metadata not in METADATA_MODES:
+        return jsonify({
+            'error': f'지원하지 않는 메타데이터 모드: {metadata}',
+            'code': 'INVALID_METADATA',
+            'supported': sorted(METADATA_MODES)
+        }), 400
+    
+    try:
+        palette = parse_palette_options(data)
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'error': str(e),
+            'code': 'INVALID_PNG_PALETTE',
+            'supported': sorted(PNG_PALETTE_MODES)
+        }), 400
+    
+    try:
+        background = parse_background(data.get('background'))
+    except (ValueError, TypeError):
+        return jsonify({
+            'error': f"잘못된 배경색: {data.get('background')}",
+            'code': 'INVALID_BACKGROUND'
+        }), 400
+    
+    # 이미지 처리
+    results = []
+    errors = []
+    # 과부하 중에는 인코더 노력을 낮춤 (safe_process가 결정)
+    effort = g.get('effort', 'normal')
+    options = (
+        output_format, quality, max_size, resize_mode, background,
+        crop_strategy, target_size, ssim_target, palette, metadata, effort
+    )
+    
+    # 같은 요청 안에서 입력+옵션이 같은 이미지는 한 번만 변환
+    converted = {}  # 해시 -> (첫 인덱스, 파일명, 성공 여부, 결과)
+    deduplicated = 0
+    
+    for idx, img_data in enumerate(images):
+        # 검증
+        valid, error_msg = validate_image_data(img_data)
+        if not valid:
+            errors.append({
+                'index': idx,
+                'name': img_data.get('name', f'image_{idx}'),
+                'error': error_msg
+            })
+            continue
+        
+        key = result_cache_key(img_data['data'], options)
+        if key in converted:
+            source_index, source_name, success, result = converted[key]
+            if success:
+                result = duplicate_result(result, source_name, img_data['name'], source_index)
+            deduplicated += 1
+        else:
+            # 처리
+            success, result = convert_with_cache(img_data, options, key)
+            converted[key] = (idx, img_data['name'], success, result)
+        
+        if success:
+            results.append(result)
+        else:
+            errors.append({
+                'index': idx,
+                'name': img_data.get('name', f'image_{idx}'),
+                'error': result
+            })
+    
+    # 응답 생성
+    response = {
+        'success': len(results) > 0,
+        'images': results,
+        'processed': len(results),
+        'total': len(images),
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    if errors:
+        response['errors'] = errors
+        response['failed'] = len(errors)
+    
+    if deduplicated:
+        response['deduplicated'] = deduplicated
+    
+    # 요청 사용량 (응답, 구조화 로그, 작업량 제한에 사용)
+    usage = request_usage(results, request_start, cpu_start)
+    response['usage'] = usage
+    g.usage = usage
+    
+    # 일부 성공
+    if results and errors:
+        response['message'] = f"{len(results)}개 성공, {len(errors)}개 실패"
+    
+    # 요청 레코드 (샘플링 없음, 사용량 포함)
+    logger.info('변환 완료', extra={'fields': {
+        'event': 'request',
+        'client': client_id(),
+        'priority': g.get('priority'),
+        'format': output_format,
+        'quality': quality,
+        'resize_mode': resize_mode,
+        'effort': effort,
+        'images': len(images),
+        'processed': len(results),
+        'failed': len(errors),
+        'deduplicated': deduplicated,
+        'usage': usage
+    }})
+    
+    if startup_report['first_request_ms'] is None:
+        startup_report['first_request_ms'] = round((time.perf_counter() - request_start) * 1000, 1)
+    
+    return json_response(response)
+
 @app.route('/convert', methods=['POST'])
 @limiter.limit("30 per minute")
+@work_limited
 @safe_process
 def convert_images():
     """이미지 변환 API"""
+    request_start = time.perf_counter()
     try:
-        # 요청 검증
-        if not request.is_json:
+        # 요청 검증 (JSON 또는 multipart: options 필드 JSON + images 파일)
+        if request.mimetype == 'multipart/form-data':
+            data = json.loads(request.form.get('options') or '{}')
+            data['images'] = [{'name': f.filename, 'data': f.read()} for f in request.files.getlist('images')]
+        elif request.is_json:
+            data = request.json
+        else:
             return jsonify({'error': 'JSON 형식이 필요합니다', 'code': 'INVALID_FORMAT'}), 400
         
-        data = request.json
-        if not data:
-            return jsonify({'error': '데이터가 없습니다', 'code': 'NO_DATA'}), 400
+        return convert_payload(data, request_start)
+        
+    except RequestEntityTooLarge:
+        # 413 에러 핸들러로 전달
+        raise
+    except Exception as e:
+        return server_error(e)
+
+def upload_paths(upload_id):
+    """업로드 세션의 메타데이터/조각 파일 경로"""
+    base = os.path.join(UPLOAD_DIR, upload_id)
+    return base + '.json', base + '.part'
+
+def load_upload(upload_id):
+    """업로드 세션 조회 (없거나 만료되었으면 None)"""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return None
+    meta_path, part_path = upload_paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if time.time() - os.path.getmtime(part_path) > UPLOAD_TTL:
+            return None
+        meta['received'] = os.path.getsize(part_path)
+        return meta
+    except (OSError, ValueError):
+        return None
+
+def remove_upload(upload_id):
+    for path in upload_paths(upload_id):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    try:
+        shared_state.release_upload(upload_id)
+    except Exception as e:
+        logger.warning("업로드 예약 반환 실패", extra={'fields': {'upload_id': upload_id, 'error': str(e)}})
+
+def purge_expired_uploads():
+    """오래된 업로드 세션 정리 (새 세션 생성 시)"""
+    now = time.time()
+    try:
+        names = os.listdir(UPLOAD_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(UPLOAD_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > UPLOAD_TTL:
+                os.remove(path)
+        except OSError:
+            pass
+
+def upload_not_found():
+    return jsonify({'error': '업로드 세션이 없거나 만료되었습니다', 'code': 'UPLOAD_NOT_FOUND'}), 404
+
+def upload_status(upload_id, meta):
+    return {
+        'id': upload_id,
+        'name': meta['name'],
+        'size': meta['size'],
+        'received': meta['received'],
+        'chunkSize': UPLOAD_CHUNK_SIZE,
+        'complete': meta['received'] == meta['size']
+    }
+
+@app.route('/uploads', methods=['POST'])
+@limiter.limit("30 per minute")
+def create_upload():
+    """분할 업로드 세션 생성 ({name, size})"""
+    data = request.get_json(silent=True) or {}
+    name = data.get('name')
+    
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        size = 0
+    
+    valid, error_msg = validate_image_data({'name': name, 'data': b'-'})
+    if not valid or size <= 0:
+        return jsonify({'error': error_msg or '잘못된 크기', 'code': 'INVALID_UPLOAD'}), 400
+    
+    if size > UPLOAD_MAX_BYTES:
+        return jsonify({
+            'error': f'파일 크기 초과 ({size // 1024 // 1024}MB)',
+            'code': 'UPLOAD_TOO_LARGE',
+            'maxBytes': UPLOAD_MAX_BYTES
+        }), 413
+    
+    purge_expired_uploads()
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    
+    upload_id = uuid.uuid4().hex
+    # 선언 크기만큼 미리 예약 (워커 간 공유, 백엔드 장애 시에는 제한 없이 진행)
+    try:
+        exceeded = shared_state.reserve_upload(upload_id, client_id(), size, UPLOAD_TTL,
+                                               UPLOAD_MAX_SESSIONS, UPLOAD_DIR_MAX_BYTES)
+    except Exception as e:
+        logger.warning("업로드 예약 실패", extra={'fields': {'error': str(e)}})
+        exceeded = None
+    if exceeded == 'sessions':
+        response = jsonify({
+            'error': f'열린 업로드 세션이 너무 많습니다 (최대 {UPLOAD_MAX_SESSIONS}개)',
+            'code': 'UPLOAD_SESSION_LIMIT',
+            'maxSessions': UPLOAD_MAX_SESSIONS
+        })
+        response.headers['Retry-After'] = '10'
+        return response, 429
+    if exceeded == 'bytes':
+        return jsonify({
+            'error': '업로드 저장 공간이 부족합니다. 잠시 후 다시 시도해주세요.',
+            'code': 'UPLOAD_STORAGE_FULL'
+        }), 507
+    
+    meta_path, part_path = upload_paths(upload_id)
+    meta = {'name': name, 'size': size, 'created': time.time()}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    open(part_path, 'wb').close()
+    
+    logger.info("업로드 세션 생성", extra={'fields': {'upload_id': upload_id, 'name': name, 'size': size}})
+    return jsonify(upload_status(upload_id, {**meta, 'received': 0})), 201
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+@limiter.limit("120 per minute")
+def get_upload(upload_id):
+    """업로드 진행 상태 (재개할 오프셋 = received)"""
+    meta = load_upload(upload_id)
+    if meta is None:
+        return upload_not_found()
+    return jsonify(upload_status(upload_id, meta))
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+@limiter.limit("600 per minute")
+def put_upload_chunk(upload_id):
+    """조각 기록 (?offset=N, 본문은 원본 바이트, X-Chunk-Sha256 헤더 필수)"""
+    meta = load_upload(upload_id)
+    if meta is None:
+        return upload_not_found()
+    
+    # 본문을 읽기 전에 크기와 해시 헤더 확인 (길이를 모르거나 조각보다 큰 본문은 읽지 않음)
+    if request.content_length is None or request.content_length > UPLOAD_CHUNK_SIZE:
+        return jsonify({
+            'error': f'조각은 Content-Length와 함께 최대 {UPLOAD_CHUNK_SIZE // (1024 * 1024)}MB까지 보낼 수 있습니다',
+            'code': 'CHUNK_TOO_LARGE',
+            'chunkSize': UPLOAD_CHUNK_SIZE,
+            'received': meta['received']
+        }), 413
+    
+    expected = request.headers.get('X-Chunk-Sha256', '')
+    if not re.fullmatch(r'[0-9a-fA-F]{64}', expected):
+        return jsonify({
+            'error': 'X-Chunk-Sha256 헤더(조각의 SHA-256)가 필요합니다',
+            'code': 'UPLOAD_HASH_REQUIRED',
+            'received': meta['received']
+        }), 400
+    
+    offset = request.args.get('offset', type=int)
+    chunk = request.get_data(cache=False)
+    
+    # 받은 위치보다 뒤의 조각은 거부 (클라이언트는 received부터 다시 전송)
+    if offset is None or offset < 0 or offset > meta['received']:
+        return jsonify({
+            'error': '오프셋이 맞지 않습니다',
+            'code': 'UPLOAD_OFFSET_MISMATCH',
+            'received': meta['received']
+        }), 409
+    
+    if not chunk or len(chunk) > UPLOAD_CHUNK_SIZE or offset + len(chunk) > meta['size']:
+        return jsonify({'error': '잘못된 조각 크기', 'code': 'INVALID_CHUNK', 'received': meta['received']}), 400
+    
+    if hashlib.sha256(chunk).hexdigest() != expected.lower():
+        return jsonify({
+            'error': '조각 해시가 일치하지 않습니다',
+            'code': 'UPLOAD_HASH_MISMATCH',
+            'received': meta['received']
+        }), 400
+    
+    # 같은 오프셋의 재전송은 덮어쓰기 (멱등)
+    _, part_path = upload_paths(upload_id)
+    with open(part_path, 'r+b') as f:
+        f.seek(offset)
+        f.write(chunk)
+    meta['received'] = max(meta['received'], offset + len(chunk))
+    
+    # 세션 만료(마지막 조각 기준)와 예약 만료를 맞춤
+    try:
+        shared_state.touch_upload(upload_id, UPLOAD_TTL)
+    except Exception as e:
+        logger.warning("업로드 예약 연장 실패", extra={'fields': {'upload_id': upload_id, 'error': str(e)}})
+    
+    return jsonify(upload_status(upload_id, meta))
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+@limiter.limit("60 per minute")
+def delete_upload(upload_id):
+    """업로드 세션 취소"""
+    if load_upload(upload_id) is None:
+        return upload_not_found()
+    remove_upload(upload_id)
+    return '', 204
+
+@app.route('/uploads/<upload_id>/commit', methods=['POST'])
+@limiter.limit("30 per minute")
+@work_limited
+@safe_process
+def commit_upload(upload_id):
+    """업로드 완료 후 변환 (본문은 /convert와 같은 옵션 JSON, images 제외)"""
+    request_start = time.perf_counter()
+    meta = load_upload(upload_id)
+    if meta is None:
+        return upload_not_found()
+    
+    if meta['received'] != meta['size']:
+        return jsonify({
+            'error': '업로드가 완료되지 않았습니다',
+            'code': 'UPLOAD_INCOMPLETE',
+            'received': meta['received'],
+            'size': meta['size']
+        }), 409
+    
+    _, part_path = upload_paths(upload_id)
+    with open(part_path, 'rb') as f:
+        payload = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        data['images'] = [{'name': meta['name'], 'data': payload}]
+        g.upload_bytes = meta['size']
+        response = convert_payload(data, request_start)
+        
+        # 옵션 오류(400)면 세션을 남겨 다시 커밋할 수 있도록
+        if not isinstance(response, tuple):
+            remove_upload(upload_id)
+            logger.info("업로드 변환 완료", extra={'fields': {'upload_id': upload_id}})
+        return response
+    except Exception as e:
+        return server_error(e)
+    finally:
+        payload.close()
+
+@app.route('/probe', methods=['POST'])
+@limiter.limit("60 per minute")
+def probe_images():
+    """이미지 헤더 프로브 API (디코딩 없이 정보와 예상 비용 반환)"""
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'JSON 형식이 필요합니다', 'code': 'INVALID_FORMAT'}), 400
         
-        # 파라미터 추출
+        data = request.json or {}
         images = data.get('images', [])
         if not images:
             return jsonify({'error': '이미지가 없습니다', 'code': 'NO_IMAGES'}), 400
@@ -321,76 +2438,50 @@ def convert_images():
         
         output_format = data.get('format', 'jpg').lower()
         if output_format not in SUPPORTED_OUTPUT_FORMATS:
-            return jsonify({
-                'error': f'지원하지 않는 출력 형식: {output_format}',
-                'code': 'UNSUPPORTED_FORMAT',
-                'supported': list(SUPPORTED_OUTPUT_FORMATS.keys())
-            }), 400
-        
-        quality = max(1, min(100, int(data.get('quality', 85))))
+            output_format = 'jpg'
         max_size = max(100, min(10000, int(data.get('maxSize', 1920))))
-        resize_mode = data.get('resizeMode', 'fit')
         
-        logger.info(f"변환 시작: {len(images)}개, {output_format}, Q{quality}, {resize_mode}")
+        try:
+            resize_mode, target_size = parse_resize_options(data)
+        except ValueError as e:
+            code, message = e.args
+            return jsonify({'error': message, 'code': code, 'presets': sorted(RESIZE_PRESETS)}), 400
         
-        # 이미지 처리
         results = []
-        errors = []
-        
         for idx, img_data in enumerate(images):
-            # 검증
+            name = img_data.get('name', f'image_{idx}') if isinstance(img_data, dict) else f'image_{idx}'
             valid, error_msg = validate_image_data(img_data)
             if not valid:
-                errors.append({
-                    'index': idx,
-                    'name': img_data.get('name', f'image_{idx}'),
-                    'error': error_msg
-                })
+                results.append({'index': idx, 'name': name, 'admissible': False, 'error': error_msg})
                 continue
             
-            # 처리
-            success, result = process_single_image(
-                img_data, output_format, quality, max_size, resize_mode
-            )
-            
-            if success:
-                results.append(result)
-            else:
-                errors.append({
-                    'index': idx,
-                    'name': img_data.get('name', f'image_{idx}'),
-                    'error': result
-                })
-        
-        # 응답 생성
-        response = {
-            'success': len(results) > 0,
+            try:
+                img_bytes = decode_base64_payload(img_data['data'])
+                if is_heif_data(img_bytes):
+                    ensure_heif_opener()
+                with Image.open(io.BytesIO(img_bytes)) as img:
+                    info = probe_image(img, output_format, max_size, resize_mode, target_size)
+                ok, error_msg = check_admission(info)
+                info.update({'index': idx, 'name': name, 'bytes': len(img_bytes), 'admissible': ok})
+                if not ok:
+                    info['error'] = error_msg
+                results.append(info)
+            except Exception as e:
+                results.append({'index': idx, 'name': name, 'admissible': False, 'error': f"헤더 읽기 실패: {str(e)}"})
+        
+        admitted = [r for r in results if r['admissible']]
+        return jsonify({
             'images': results,
-            'processed': len(results),
             'total': len(images),
+            'admissible': len(admitted),
+            'estimated_memory_bytes': max((r['estimated_memory_bytes'] for r in admitted), default=0),
+            'estimated_cpu_ms': round(sum(r['estimated_cpu_ms'] for r in admitted), 1),
             'timestamp': datetime.now().isoformat()
-        }
-        
-        if errors:
-            response['errors'] = errors
-            response['failed'] = len(errors)
-        
-        # 일부 성공
-        if results and errors:
-            response['message'] = f"{len(results)}개 성공, {len(errors)}개 실패"
-        
-        logger.info(f"변환 완료: {len(results)}/{len(images)} 성공")
-        
-        return jsonify(response)
+        })
         
     except Exception as e:
-        logger.error(f"서버 오류: {str(e)}\n{traceback.format_exc()}")
-        return jsonify({
-            'success': False,
-            'error': '서버 오류가 발생했습니다',
-            'code': 'SERVER_ERROR',
-            'detail': str(e) if app.debug else None
-        }), 500
+        logger.error("프로브 오류", exc_info=True, extra={'fields': {'error': str(e)}})
+        return jsonify({'error': '프로브 실패', 'code': 'SERVER_ERROR', 'detail': str(e)}), 500
 
 @app.route('/download-zip', methods=['POST'])
 @limiter.limit("10 per minute")
@@ -413,48 +2504,53 @@ def download_zip():
         if not safe_folder:
             safe_folder = 'images'
         
-        # ZIP 생성
-        temp = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+        # ZIP 생성 (이름 없는 임시 파일: 응답 전송 후 닫히면 삭제되고, 실패 시 바로 닫음)
+        temp = tempfile.TemporaryFile(suffix='.zip')
         
         try:
-            with zipfile.ZipFile(temp.name, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+            with zipfile.ZipFile(temp, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
                 for idx, img in enumerate(images):
                     try:
                         # 안전한 파일명
                         filename = img.get('name', f'image_{idx}.jpg')
                         safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.'))
                         
-                        # 디코딩 및 저장
-                        img_data = base64.b64decode(img['data'])
-                        file_path = f"{safe_folder}/{safe_filename}"
-                        zipf.writestr(file_path, img_data)
+                        # 조각 단위로 디코딩 (큰 입력은 디스크 스풀링), 성공한 경우에만 ZIP 항목 추가
+                        with tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD) as spool:
+                            decode_base64_to(img['data'], spool)
+                            if spool.tell() == 0:
+                                raise ValueError("빈 이미지 데이터")
+                            spool.seek(0)
+                            
+                            file_path = f"{safe_folder}/{safe_filename}"
+                            with zipf.open(file_path, 'w') as entry:
+                                shutil.copyfileobj(spool, entry, 1024 * 1024)
                         
                     except Exception as e:
-                        logger.error(f"ZIP 추가 실패: {filename} - {str(e)}")
+                        logger.error("ZIP 추가 실패", extra={'fields': {'name': filename, 'error': str(e)}})
                         continue
             
-            temp.close()
+            temp.seek(0)
             
             # 전송
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             download_name = f'{safe_folder}_{timestamp}.zip'
             
             return send_file(
-                temp.name,
+                temp,
                 as_attachment=True,
                 download_name=download_name,
                 mimetype='application/zip'
             )
             
-        finally:
-            # 임시 파일 삭제
-            try:
-                os.unlink(temp.name)
-            except:
-                pass
+        except BaseException:
+            temp.close()
+            raise
                 
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
-        logger.error(f"ZIP 생성 오류: {str(e)}")
+        logger.error("ZIP 생성 오류", exc_info=True, extra={'fields': {'error': str(e)}})
         return jsonify({'error': 'ZIP 생성 실패', 'detail': str(e)}), 500
 
 @app.errorhandler(413)
@@ -477,13 +2573,78 @@ def ratelimit_handler(e):
 @app.errorhandler(500)
 def internal_error(e):
     """내부 서버 오류"""
-    logger.error(f"Internal error: {str(e)}")
+    logger.error("내부 서버 오류", extra={'fields': {'error': str(e)}})
     return jsonify({
         'error': '서버 오류가 발생했습니다',
         'code': 'INTERNAL_ERROR'
     }), 500
 
+def warm_up(formats=None):
+    """형식별 합성 변환으로 디코더/인코더 초기화 (트래픽 받기 전 실행)"""
+    timings = {}
+    sample = Image.new('RGBA', (64, 64), (200, 100, 50, 128))
+    
+    for input_format in formats or WARMUP_FORMATS:
+        try:
+            if input_format in ('heif', 'heic'):
+                ensure_heif_opener()
+            
+            buffer = io.BytesIO()
+            source = sample if input_format in ('png', 'webp') else sample.convert('RGB')
+            source.save(buffer, format='JPEG' if input_format == 'jpg' else input_format.upper())
+            img_data = {
+                'name': f'warmup.{input_format}',
+                'data': base64.b64encode(buffer.getvalue()).decode()
+            }
+            
+            for output_format in SUPPORTED_OUTPUT_FORMATS:
+                start = time.perf_counter()
+                process_single_image(img_data, output_format, 85, 32, 'fit')
+                timings[f'{input_format}->{output_format}'] = round((time.perf_counter() - start) * 1000, 1)
+        except Exception as e:
+            logger.warning("워밍업 실패", extra={'fields': {'format': input_format, 'error': str(e)}})
+    
+    return timings
+
+def reset_worker_state():
+    """포크 후 워커별 상태 초기화 (gunicorn --preload 사용 시 post_fork 훅에서 호출)"""
+    global processing_lock, processing_slots, active_processes, heif_stats_lock, heif_lock, icc_transform_lock
+    
+    # 마스터에서 만든 락은 포크 시점 상태를 물려받으므로 새로 생성
+    processing_lock = Lock()
+    processing_slots = Condition(processing_lock)
+    heif_stats_lock = Lock()
+    heif_lock = Lock()
+    icc_transform_lock = Lock()
+    active_processes = 0
+    held_slots.clear()
+    
+    for stage in heif_stats:
+        heif_stats[stage] = 0 if stage == 'count' else 0.0
+    for key in icc_stats:
+        icc_stats[key] = 0
+    start_log_listener()
+    for priority in PRIORITY_CLASSES:
+        scheduler_stats['active'][priority] = 0
+        scheduler_stats['shed'][priority] = 0
+    scheduler_stats['degraded'] = 0
+    scheduler_stats['interactive_latency_ms'] = 0.0
+    shared_state.after_fork()
+    startup_report['first_request_ms'] = None
+
+if WARMUP_ENABLED:
+    warmup_start = time.perf_counter()
+    startup_report['warmup'] = warm_up()
+    startup_report['warmup_ms'] = round((time.perf_counter() - warmup_start) * 1000, 1)
+
+startup_report['ready_ms'] = round((time.perf_counter() - import_start) * 1000, 1)
+logger.info("시작 프로파일", extra={'fields': {'event': 'startup', **startup_report}})
+
 if __name__ == '__main__':
+    if '--startup-profile' in sys.argv:
+        print(json.dumps(startup_report, indent=2))
+        sys.exit(0)
+    
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
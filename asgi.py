@@ -0,0 +1,169 @@
+"""
+ImageCon ASGI 엔트리 포인트
+요청 본문 수신과 응답 전송은 이벤트 루프에서 처리하고, Flask 라우트(디코딩/변환/인코딩)는
+스레드 풀에서 실행하여 느린 업로드가 워커를 점유하지 않도록 함
+
+실행:
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --workers 2 --preload
+    uvicorn asgi:app --port 5000
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from app import app as flask_app, logger, MAX_CONCURRENT_PROCESSES
+
+# 이보다 큰 요청 본문은 임시 파일로 스풀링
+BODY_SPOOL_SIZE = 1024 * 1024
+
+# 변환 스레드 수 (동시 처리 제한 + /health 등 가벼운 요청 여유분)
+EXECUTOR_THREADS = int(os.environ.get('ASGI_THREADS', MAX_CONCURRENT_PROCESSES + 2))
+
+# 스레드는 첫 요청 시 생성되므로 --preload 포크 이전에 만들어도 안전
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix='convert')
+
+# 응답 본문 조각 읽기용 스레드 (느린 다운로드가 변환 스레드를 점유하지 않도록 분리)
+io_executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix='response')
+
+def build_environ(scope, body):
+    """ASGI scope를 WSGI environ으로 변환"""
+    script_name = scope.get('root_path', '')
+    path_info = scope['path']
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name.encode('utf8').decode('latin1'),
+        'PATH_INFO': path_info.encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1')
+        value = value.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    return environ
+
+def call_wsgi(environ, send, loop):
+    """스레드 풀에서 Flask 앱 실행 (응답 시작 메시지와 본문 iterable 반환)"""
+    def send_sync(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['start'] = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+        }
+        return lambda data: send_sync({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+    result = flask_app(environ, start_response)
+    return response, result
+
+async def send_response(response, result, send, loop):
+    """응답 본문 전송 (조각 읽기만 I/O 스레드에서, 클라이언트 대기는 이벤트 루프에서)"""
+    iterator = iter(result)
+    try:
+        started = False
+        while True:
+            chunk = await loop.run_in_executor(io_executor, next, iterator, None)
+            if chunk is None:
+                break
+            if not started:
+                await send(response['start'])
+                started = True
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        if not started:
+            await send(response['start'])
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(result, 'close'):
+            await loop.run_in_executor(io_executor, result.close)
+
+async def handle_lifespan(receive, send):
+    """서버 시작/종료 이벤트 처리"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=True)
+            io_executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """ASGI 애플리케이션"""
+    if scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+        return
+
+    if scope['type'] != 'http':
+        return
+
+    # 허용 크기를 넘는 요청은 본문을 받지 않고 Flask의 413 응답으로 넘김
+    max_length = flask_app.config['MAX_CONTENT_LENGTH'] or sys.maxsize
+    content_length = None
+    for name, value in scope.get('headers', []):
+        if name == b'content-length' and value.isdigit():
+            content_length = int(value)
+    too_large = (content_length or 0) > max_length
+
+    with SpooledTemporaryFile(max_size=BODY_SPOOL_SIZE) as body:
+        # 업로드 수신은 이벤트 루프에서 (느린 클라이언트가 스레드를 점유하지 않음)
+        received = 0
+        while not too_large:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                logger.info("업로드 중 연결 종료", extra={'fields': {'path': scope['path']}})
+                return
+            chunk = message.get('body', b'')
+            received += len(chunk)
+            if received > max_length:
+                # Content-Length 없는(chunked) 본문도 허용 크기까지만 수신
+                body.seek(0)
+                body.truncate()
+                too_large = True
+                break
+            body.write(chunk)
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+
+        environ = build_environ(scope, body)
+        if content_length is None:
+            # chunked 본문은 수신한 크기를 Content-Length로 전달 (초과 시 Flask가 413 응답)
+            environ['CONTENT_LENGTH'] = str(received)
+        loop = asyncio.get_running_loop()
+        response, result = await loop.run_in_executor(executor, call_wsgi, environ, send, loop)
+        await send_response(response, result, send, loop)
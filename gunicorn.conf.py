@@ -0,0 +1,10 @@
+"""
+Gunicorn 설정
+--preload로 마스터에서 app을 한 번 로드(임포트 + 워밍업)하고 워커는 포크 후 상태만 초기화
+"""
+
+
+def post_fork(server, worker):
+    """워커별 락/카운터 재생성"""
+    from app import reset_worker_state
+    reset_worker_state()
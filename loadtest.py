@@ -0,0 +1,444 @@
+"""
+ImageCon 부하 테스트
+고정 시드로 실제와 비슷한 이미지 크기/형식/배치 구성을 만들고, 열린 루프(응답을 기다리지 않고 정해진 도착 시각에
+요청)로 재생하여 처리량, 지연 백분위, 503/429 비율, 서버 RSS 추이를 보고.
+지연은 예정 도착 시각부터 측정하므로 클라이언트 쪽 대기도 포함됨 (coordinated omission 보정)
+
+실행:
+    python loadtest.py --rate 2 --duration 30                       # 이 프로세스에서 앱 실행
+    python loadtest.py --server gunicorn --workers 2 --rate 6        # 로컬 gunicorn (튜닝 시 권장)
+    python loadtest.py --server gunicorn --asgi --workers 2          # gunicorn + uvicorn 워커
+    python loadtest.py --server http://localhost:5000 --rate 1       # 실행 중인 서버 (RSS 제외)
+    python loadtest.py --mix thumbnail=5,batch=1 --json report.json
+"""
+
+import argparse
+import base64
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image, ImageDraw
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 요청 구성 (weight: 도착 비율, batch: 요청당 이미지 수, options: /convert 파라미터)
+SCENARIOS = {
+    'thumbnail': {'weight': 5, 'size': (800, 600), 'kind': 'photo', 'input': 'JPEG', 'batch': 1,
+                  'options': {'format': 'webp', 'maxSize': 400}},
+    'photo': {'weight': 3, 'size': (4000, 3000), 'kind': 'photo', 'input': 'JPEG', 'batch': 1,
+              'options': {'format': 'jpg', 'maxSize': 1920}},
+    'graphic': {'weight': 2, 'size': (1200, 1200), 'kind': 'graphic', 'input': 'PNG', 'batch': 1,
+                'options': {'format': 'auto'}},
+    'transparent': {'weight': 1, 'size': (1000, 1000), 'kind': 'alpha', 'input': 'PNG', 'batch': 1,
+                    'options': {'format': 'png', 'resizeMode': 'cover', 'width': 600, 'height': 600}},
+    'batch': {'weight': 1, 'size': (1600, 1200), 'kind': 'photo', 'input': 'JPEG', 'batch': 12,
+              'options': {'format': 'jpg', 'quality': 80, 'maxSize': 1200}}
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+def make_image(size, kind, rng):
+    """시드 고정 합성 이미지 (photo: 부드러운 색 변화 + 잡음, graphic: 단색 도형, alpha: 투명 사진)"""
+    width, height = size
+    if kind == 'graphic':
+        img = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(24):
+            x, y = rng.randrange(width), rng.randrange(height)
+            box = (x, y, x + rng.randrange(20, width // 3), y + rng.randrange(20, height // 3))
+            draw.rectangle(box, fill=tuple(rng.randrange(256) for _ in range(3)))
+        return img
+
+    small = (width // 32 + 1, height // 32 + 1)
+    img = Image.frombytes('RGB', small, rng.randbytes(small[0] * small[1] * 3)).resize(size, Image.BICUBIC)
+    grain = Image.frombytes('L', size, rng.randbytes(width * height)).convert('RGB')
+    img = Image.blend(img, grain, 0.08)
+
+    if kind == 'alpha':
+        alpha = Image.linear_gradient('L').resize(size)
+        img.putalpha(alpha)
+    return img
+
+def build_inputs(names, seed):
+    """시나리오별 입력 이미지 (배치 안에서 중복 제거되지 않도록 서로 다른 변형 생성)"""
+    inputs = {}
+    for name in names:
+        scenario = SCENARIOS[name]
+        rng = random.Random(f'{seed}:{name}')
+        variants = []
+        for index in range(scenario['batch']):
+            buffer = io.BytesIO()
+            make_image(scenario['size'], scenario['kind'], rng).save(buffer, scenario['input'], quality=90)
+            raw = buffer.getvalue()
+            ext = 'jpg' if scenario['input'] == 'JPEG' else scenario['input'].lower()
+            variants.append({'name': f'{name}_{index}.{ext}', 'raw': raw, 'b64': base64.b64encode(raw).decode()})
+        inputs[name] = variants
+    return inputs
+
+def build_schedule(mix, rate, duration, seed, arrival='poisson'):
+    """도착 일정 [(시각, 시나리오)] (같은 시드면 같은 일정)"""
+    rng = random.Random(f'{seed}:schedule')
+    names = sorted(mix)
+    weights = [mix[name] for name in names]
+    schedule = []
+    at = 0.0
+    while True:
+        at += rng.expovariate(rate) if arrival == 'poisson' else 1 / rate
+        if at >= duration:
+            return schedule
+        schedule.append((at, rng.choices(names, weights)[0]))
+
+def parse_mix(text):
+    """'thumbnail=5,batch=1' -> {'thumbnail': 5.0, 'batch': 1.0}"""
+    if not text:
+        return {name: scenario['weight'] for name, scenario in SCENARIOS.items()}
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f'알 수 없는 시나리오: {name} (가능: {", ".join(SCENARIOS)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+def read_rss(pid):
+    """/proc에서 RSS(바이트) 읽기 (프로세스가 없으면 0)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def child_pids(pid):
+    """직계 자식 프로세스 (gunicorn 워커)"""
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_healthy(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'서버가 시작되지 않았습니다: {url}')
+
+def server_env(args):
+    """측정 대상 서버 환경 (기본은 요청 제한/결과 캐시 해제: 처리 용량만 측정)"""
+    env = {
+        'RATELIMIT_ENABLED': 'true' if args.rate_limits else 'false',
+        'RESULT_CACHE_TTL': os.environ.get('RESULT_CACHE_TTL', '600') if args.cache else '0',
+        'WEB_CONCURRENCY': str(args.workers),
+        'LOG_SAMPLE_RATE': os.environ.get('LOG_SAMPLE_RATE', '0')
+    }
+    if args.workers > 1 and 'STATE_URL' not in os.environ:
+        env['STATE_URL'] = f"sqlite:///{os.path.join(tempfile.gettempdir(), f'imagecon-loadtest-{os.getpid()}.db')}"
+    return env
+
+def configure_app(app_module, rate_limits=False, cache_ttl=0, log_sample_rate=0.0):
+    """이 프로세스에 임포트된 앱의 측정 설정 변경
+
+    환경 변수는 app 임포트 시에만 읽히므로 (다른 모듈이 먼저 임포트한 경우 포함) 모듈 설정을 직접 바꿈.
+    요청 제한을 끈 채 임포트된 앱은 limiter 훅이 등록되지 않아 나중에 켤 수 없음
+    """
+    app_module.app.config['RATELIMIT_ENABLED'] = rate_limits
+    app_module.limiter.enabled = rate_limits
+    app_module.RESULT_CACHE_TTL = cache_ttl
+    app_module.LOG_SAMPLE_RATE = log_sample_rate
+
+class InProcessServer:
+    """이 프로세스의 스레드에서 앱 실행 (클라이언트와 GIL을 나누므로 대략적인 수치)"""
+
+    def __init__(self, args):
+        env = server_env(args)
+        os.environ.update(env)
+        sys.path.insert(0, APP_DIR)
+        from werkzeug.serving import make_server
+        import app
+
+        configure_app(app, args.rate_limits, int(env['RESULT_CACHE_TTL']), float(env['LOG_SAMPLE_RATE']))
+        self.server = make_server('127.0.0.1', 0, app.app, threaded=True)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def pids(self):
+        return [os.getpid()]
+
+    def stop(self):
+        self.server.shutdown()
+
+class GunicornServer:
+    """로컬 gunicorn (--preload, 워커 수/ASGI 선택)"""
+
+    def __init__(self, args):
+        port = free_port()
+        self.url = f'http://127.0.0.1:{port}'
+        command = [sys.executable, '-m', 'gunicorn', 'asgi:app' if args.asgi else 'app:app',
+                   '-c', 'gunicorn.conf.py', '--preload', '--workers', str(args.workers),
+                   '--bind', f'127.0.0.1:{port}', '--timeout', '120']
+        if args.asgi:
+            command += ['-k', 'uvicorn.workers.UvicornWorker']
+
+        self.log = tempfile.NamedTemporaryFile(prefix='imagecon-loadtest-', suffix='.log', delete=False)
+        self.process = subprocess.Popen(command, cwd=APP_DIR, env={**os.environ, **server_env(args)},
+                                        stdout=self.log, stderr=subprocess.STDOUT)
+        try:
+            wait_healthy(self.url)
+        except RuntimeError:
+            self.stop()
+            raise
+
+    def pids(self):
+        return [self.process.pid] + child_pids(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+        print(f'서버 로그: {self.log.name}')
+
+class ExternalServer:
+    """이미 실행 중인 서버 (RSS 측정 불가)"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        wait_healthy(self.url, timeout=5)
+
+    def pids(self):
+        return []
+
+    def stop(self):
+        pass
+
+class RssSampler(threading.Thread):
+    """일정 간격으로 서버 프로세스(워커 포함) RSS 합계 기록"""
+
+    def __init__(self, server, interval):
+        super().__init__(daemon=True)
+        self.server = server
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.start_time = time.perf_counter()
+
+    def run(self):
+        while not self.stopped.is_set():
+            pids = self.server.pids()
+            if pids:
+                rss = sum(read_rss(pid) for pid in pids)
+                self.samples.append((round(time.perf_counter() - self.start_time, 2), rss))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def send(session_factory, url, scenario, variants, upload, timeout):
+    """요청 하나 전송 -> (상태 코드, 처리된 이미지 수, 오류)"""
+    session = session_factory()
+    options = SCENARIOS[scenario]['options']
+    try:
+        if upload == 'multipart':
+            files = [('images', (v['name'], v['raw'])) for v in variants]
+            response = session.post(f'{url}/convert', data={'options': json.dumps(options)}, files=files,
+                                    timeout=timeout)
+        else:
+            body = {**options, 'images': [{'name': v['name'], 'data': v['b64']} for v in variants]}
+            response = session.post(f'{url}/convert', json=body, timeout=timeout)
+        processed = response.json().get('processed', 0) if response.status_code == 200 else 0
+        return response.status_code, processed, None
+    except (requests.RequestException, ValueError) as e:
+        return None, 0, type(e).__name__
+
+def percentile(sorted_values, pct):
+    """최근접 순위 백분위"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def latency_summary(records):
+    latencies = sorted(record['latency_ms'] for record in records if record['status'] == 200)
+    summary = {f'p{pct}': percentile(latencies, pct) for pct in PERCENTILES}
+    summary['max'] = latencies[-1] if latencies else None
+    return summary
+
+def status_summary(records):
+    counts = {}
+    for record in records:
+        key = str(record['status']) if record['status'] is not None else record['error']
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def run(url, schedule, inputs, upload='json', max_inflight=256, timeout=300, server=None, rss_interval=1.0):
+    """일정대로 요청을 보내고 보고서 반환 (server가 있으면 RSS도 기록)"""
+    local = threading.local()
+
+    def session_factory():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    records = []
+    records_lock = threading.Lock()
+    sampler = RssSampler(server, rss_interval) if server else None
+    if sampler:
+        sampler.start()
+
+    def task(index, scheduled_at, scenario, start):
+        status, processed, error = send(session_factory, url, scenario, inputs[scenario], upload, timeout)
+        finished = time.perf_counter() - start
+        with records_lock:
+            records.append({
+                'index': index,
+                'scenario': scenario,
+                'scheduled': scheduled_at,
+                'finished': finished,
+                'latency_ms': round((finished - scheduled_at) * 1000, 1),
+                'status': status,
+                'images': processed,
+                'error': error
+            })
+
+    # 열린 루프: 응답과 관계없이 예정 시각에 요청 (동시 요청 상한을 넘으면 클라이언트 쪽 대기로 지연에 포함)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        for index, (scheduled_at, scenario) in enumerate(schedule):
+            delay = scheduled_at - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(task, index, scheduled_at, scenario, start)
+    elapsed = time.perf_counter() - start
+
+    if sampler:
+        sampler.stop()
+
+    records.sort(key=lambda record: record['index'])
+    statuses = status_summary(records)
+    sent = len(records)
+    report = {
+        'requests': {
+            'sent': sent,
+            'ok': statuses.get('200', 0),
+            'statuses': statuses,
+            'rate_503': round(statuses.get('503', 0) / sent, 4) if sent else 0,
+            'rate_429': round(statuses.get('429', 0) / sent, 4) if sent else 0
+        },
+        'elapsed_s': round(elapsed, 2),
+        'throughput': {
+            'requests_per_s': round(statuses.get('200', 0) / elapsed, 2) if elapsed else 0,
+            'images_per_s': round(sum(record['images'] for record in records) / elapsed, 2) if elapsed else 0
+        },
+        'latency_ms': latency_summary(records),
+        'scenarios': {
+            name: {
+                'sent': len(group),
+                'statuses': status_summary(group),
+                'latency_ms': latency_summary(group)
+            }
+            for name in sorted({record['scenario'] for record in records})
+            for group in [[record for record in records if record['scenario'] == name]]
+        }
+    }
+
+    if sampler and sampler.samples:
+        values = [rss for _, rss in sampler.samples]
+        report['rss'] = {
+            'start_mb': round(values[0] / 1048576, 1),
+            'peak_mb': round(max(values) / 1048576, 1),
+            'end_mb': round(values[-1] / 1048576, 1),
+            'samples': sampler.samples
+        }
+    return report
+
+def print_report(report):
+    requests_info = report['requests']
+    print(f"\n요청 {requests_info['sent']}개 / {report['elapsed_s']}s, 상태: {requests_info['statuses']}")
+    print(f"503 비율 {requests_info['rate_503']:.1%}, 429 비율 {requests_info['rate_429']:.1%}")
+    print(f"처리량 {report['throughput']['requests_per_s']} req/s, {report['throughput']['images_per_s']} images/s")
+
+    header = ['시나리오', '요청'] + [f'p{pct}' for pct in PERCENTILES] + ['max']
+    print('\n' + ''.join(f'{column:>12}' for column in header))
+    rows = [('전체', requests_info['sent'], report['latency_ms'])]
+    rows += [(name, info['sent'], info['latency_ms']) for name, info in report['scenarios'].items()]
+    for name, sent, latency in rows:
+        values = [latency[f'p{pct}'] for pct in PERCENTILES] + [latency['max']]
+        print(f'{name:>12}{sent:>12}' + ''.join(f"{'-' if v is None else round(v):>12}" for v in values))
+
+    if 'rss' in report:
+        rss = report['rss']
+        print(f"\nRSS 시작 {rss['start_mb']}MB, 최대 {rss['peak_mb']}MB, 종료 {rss['end_mb']}MB")
+
+def main():
+    parser = argparse.ArgumentParser(description='ImageCon 부하 테스트')
+    parser.add_argument('--server', default='inprocess', help='inprocess | gunicorn | 서버 URL')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn 워커 수')
+    parser.add_argument('--asgi', action='store_true', help='gunicorn + uvicorn 워커로 asgi:app 실행')
+    parser.add_argument('--rate', type=float, default=2.0, help='초당 도착 요청 수')
+    parser.add_argument('--duration', type=float, default=30.0, help='도착 구간 길이(초)')
+    parser.add_argument('--arrival', choices=['poisson', 'uniform'], default='poisson')
+    parser.add_argument('--mix', help='시나리오 비율 (예: thumbnail=5,batch=1)')
+    parser.add_argument('--upload', choices=['json', 'multipart'], default='json')
+    parser.add_argument('--seed', default='imagecon')
+    parser.add_argument('--max-inflight', type=int, default=256)
+    parser.add_argument('--rate-limits', action='store_true', help='요청 수/작업량 제한 유지 (429 측정)')
+    parser.add_argument('--cache', action='store_true', help='결과 캐시 유지')
+    parser.add_argument('--json', dest='json_path', help='보고서 JSON 저장 경로')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    schedule = build_schedule(mix, args.rate, args.duration, args.seed, args.arrival)
+    print(f'입력 생성 중: {", ".join(sorted(mix))}')
+    inputs = build_inputs(mix, args.seed)
+
+    if args.server == 'inprocess':
+        args.workers = 1
+        server = InProcessServer(args)
+    elif args.server == 'gunicorn':
+        server = GunicornServer(args)
+    else:
+        server = ExternalServer(args.server)
+
+    print(f'{server.url}: {len(schedule)}개 요청, {args.rate}/s, {args.duration}s ({args.arrival})')
+    try:
+        report = run(server.url, schedule, inputs, args.upload, args.max_inflight, server=server)
+    finally:
+        server.stop()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'config': {**vars(args), 'mix': mix}, **report}, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
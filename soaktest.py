@@ -0,0 +1,218 @@
+"""
+ImageCon 장시간 메모리 회귀 테스트
+이 프로세스에서 앱을 불러와 수천 건의 혼합 변환(/convert -> process_single_image)과 ZIP 생성(/download-zip)을
+반복하면서 RSS, tracemalloc, 열린 파일 디스크립터, 남은 임시 파일을 기록하고 워밍업 이후 증가량이
+기준을 넘으면 실패 (종료 코드 1)
+
+실행:
+    python soaktest.py                                  # 기본 3000건
+    python soaktest.py --iterations 500 --json soak.json
+    python soaktest.py --mix thumbnail=5,photo=1 --max-rss-growth-mb 96
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from loadtest import SCENARIOS, build_inputs, configure_app, parse_mix
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 기본 구성 (대용량 사진은 드물게, 배치는 요청당 이미지가 많으므로 낮은 비율)
+DEFAULT_MIX = 'thumbnail=6,graphic=3,transparent=2,photo=1,batch=1'
+
+def read_rss():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def count_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+def temp_files():
+    """임시 디렉터리의 파일 목록 (남은 스풀/ZIP 파일 확인용)"""
+    directory = tempfile.gettempdir()
+    return {name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))}
+
+def rss_slope(samples):
+    """뒤쪽 절반 표본의 RSS 증가 기울기 (MB / 1000건, 최소제곱)"""
+    tail = samples[len(samples) // 2:]
+    if len(tail) < 2:
+        return 0.0
+    xs = [sample['iteration'] for sample in tail]
+    ys = [sample['rss_mb'] for sample in tail]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if not denominator:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator * 1000
+
+def load_app():
+    """측정용 설정으로 앱 로드 (요청 제한/결과 캐시/성공 로그 끔, 이미 임포트된 앱에도 적용)"""
+    os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+    sys.path.insert(0, APP_DIR)
+    import app
+    configure_app(app)
+    return app
+
+def run_soak(iterations=3000, mix=None, seed='imagecon', warmup=200, sample_every=100, zip_every=25,
+             trace=True):
+    """혼합 변환 반복 후 표본과 증가량 보고서 반환"""
+    app_module = load_app()
+    client = app_module.app.test_client()
+    mix = mix or parse_mix(DEFAULT_MIX)
+    inputs = build_inputs(mix, seed)
+    rng = random.Random(f'{seed}:soak')
+    names = sorted(mix)
+    weights = [mix[name] for name in names]
+
+    if trace:
+        tracemalloc.start(10)
+
+    samples = []
+    baseline = None
+    baseline_snapshot = None
+    temp_before = temp_files()
+    failures = 0
+    converted = []
+    start = time.perf_counter()
+
+    def sample(iteration):
+        gc.collect()
+        record = {
+            'iteration': iteration,
+            'elapsed_s': round(time.perf_counter() - start, 1),
+            'rss_mb': round(read_rss() / 1048576, 1),
+            'open_fds': count_fds(),
+            'traced_mb': round(tracemalloc.get_traced_memory()[0] / 1048576, 2) if trace else None
+        }
+        samples.append(record)
+        return record
+
+    for iteration in range(1, iterations + 1):
+        scenario = rng.choices(names, weights)[0]
+        body = {**SCENARIOS[scenario]['options'],
+                'images': [{'name': v['name'], 'data': v['b64']} for v in inputs[scenario]]}
+        response = client.post('/convert', json=body)
+        result = response.get_json()
+        response.close()
+        if response.status_code != 200 or result.get('failed'):
+            failures += 1
+        else:
+            converted = (converted + result['images'])[-8:]
+
+        # 최근 결과로 ZIP 생성 (응답 본문을 끝까지 읽고 닫아 임시 파일 정리 경로까지 실행)
+        if zip_every and iteration % zip_every == 0 and converted:
+            response = client.post('/download-zip', json={'images': converted, 'folderName': 'soak'})
+            response.get_data()
+            response.close()
+            if response.status_code != 200:
+                failures += 1
+
+        if iteration == warmup:
+            baseline = sample(iteration)
+            if trace:
+                baseline_snapshot = tracemalloc.take_snapshot()
+        elif iteration % sample_every == 0 or iteration == iterations:
+            sample(iteration)
+
+    final = sample(iterations) if samples[-1]['iteration'] != iterations else samples[-1]
+    baseline = baseline or samples[0]
+    leftover = sorted(temp_files() - temp_before)
+
+    report = {
+        'iterations': iterations,
+        'failures': failures,
+        'elapsed_s': round(time.perf_counter() - start, 1),
+        'baseline': baseline,
+        'final': final,
+        'growth': {
+            'rss_mb': round(final['rss_mb'] - baseline['rss_mb'], 1),
+            'rss_slope_mb_per_1000': round(rss_slope([s for s in samples if s['iteration'] >= baseline['iteration']]), 2),
+            'traced_mb': round(final['traced_mb'] - baseline['traced_mb'], 2) if trace else None,
+            'open_fds': final['open_fds'] - baseline['open_fds'],
+            'temp_files': len(leftover)
+        },
+        'leftover_temp_files': leftover[:20],
+        'samples': samples
+    }
+
+    if trace:
+        # 워밍업 이후 가장 많이 늘어난 할당 위치
+        stats = tracemalloc.take_snapshot().compare_to(baseline_snapshot, 'lineno')
+        report['top_allocations'] = [
+            {'where': str(stat.traceback[0]), 'growth_kb': round(stat.size_diff / 1024, 1), 'count': stat.count_diff}
+            for stat in stats[:10] if stat.size_diff > 0
+        ]
+        tracemalloc.stop()
+    return report
+
+def check_thresholds(report, max_rss_growth_mb=64, max_rss_slope_mb=16, max_traced_growth_mb=8,
+                     max_fd_growth=4, max_temp_files=0):
+    """기준 초과 항목 목록 (비어 있으면 통과)"""
+    growth = report['growth']
+    problems = []
+    if report['failures']:
+        problems.append(f"변환/ZIP 실패 {report['failures']}건")
+    if growth['rss_mb'] > max_rss_growth_mb:
+        problems.append(f"RSS 증가 {growth['rss_mb']}MB > {max_rss_growth_mb}MB")
+    if growth['rss_slope_mb_per_1000'] > max_rss_slope_mb:
+        problems.append(f"RSS 증가 추세 {growth['rss_slope_mb_per_1000']}MB/1000건 > {max_rss_slope_mb}MB")
+    if growth['traced_mb'] is not None and growth['traced_mb'] > max_traced_growth_mb:
+        problems.append(f"Python 할당 증가 {growth['traced_mb']}MB > {max_traced_growth_mb}MB")
+    if growth['open_fds'] > max_fd_growth:
+        problems.append(f"열린 파일 디스크립터 증가 {growth['open_fds']}개 > {max_fd_growth}개")
+    if growth['temp_files'] > max_temp_files:
+        problems.append(f"남은 임시 파일 {growth['temp_files']}개 > {max_temp_files}개")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='ImageCon 메모리 회귀 테스트')
+    parser.add_argument('--iterations', type=int, default=3000)
+    parser.add_argument('--warmup', type=int, default=200, help='기준 측정 전 반복 수')
+    parser.add_argument('--sample-every', type=int, default=100)
+    parser.add_argument('--zip-every', type=int, default=25, help='N건마다 /download-zip 실행 (0이면 안 함)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'시나리오 비율 (가능: {", ".join(SCENARIOS)})')
+    parser.add_argument('--seed', default='imagecon')
+    parser.add_argument('--no-tracemalloc', action='store_true', help='tracemalloc 끄기 (오버헤드 제거)')
+    parser.add_argument('--max-rss-growth-mb', type=float, default=64)
+    parser.add_argument('--max-rss-slope-mb', type=float, default=16, help='뒤쪽 절반의 MB/1000건 기울기 한도')
+    parser.add_argument('--max-traced-growth-mb', type=float, default=8)
+    parser.add_argument('--max-fd-growth', type=int, default=4)
+    parser.add_argument('--max-temp-files', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='보고서 JSON 저장 경로')
+    args = parser.parse_args()
+
+    report = run_soak(args.iterations, parse_mix(args.mix), args.seed, min(args.warmup, args.iterations),
+                      args.sample_every, args.zip_every, trace=not args.no_tracemalloc)
+    problems = check_thresholds(report, args.max_rss_growth_mb, args.max_rss_slope_mb,
+                                args.max_traced_growth_mb, args.max_fd_growth, args.max_temp_files)
+
+    print(f"\n{report['iterations']}건 / {report['elapsed_s']}s, 실패 {report['failures']}건")
+    print(f"{'반복':>8}{'RSS MB':>10}{'traced MB':>12}{'FD':>6}")
+    for s in report['samples']:
+        traced = '-' if s['traced_mb'] is None else s['traced_mb']
+        print(f"{s['iteration']:>8}{s['rss_mb']:>10}{traced:>12}{s['open_fds']:>6}")
+    print(f"워밍업 이후 증가: {json.dumps(report['growth'], ensure_ascii=False)}")
+    for allocation in report.get('top_allocations', [])[:5]:
+        print(f"  +{allocation['growth_kb']}KB {allocation['where']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'config': vars(args), 'problems': problems, **report}, f, indent=2, ensure_ascii=False)
+
+    if problems:
+        print('실패: ' + '; '.join(problems))
+        sys.exit(1)
+    print('통과')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""
+ImageCon 공유 상태 백엔드
+멀티 워커 배포에서 요청 제한 카운터, 동시 처리 슬롯, 결과 캐시를 워커 간에 공유하여
+워커를 늘려도 제한이 배로 늘거나 캐시가 워커마다 중복되지 않도록 함
+분할 업로드 예약(클라이언트별 세션 수, 업로드 디렉터리 전체 바이트)도 같은 저장소에 기록하여
+워커마다 따로 세지 않도록 함
+
+STATE_URL:
+    memory://                        프로세스 내부 (기본, 단일 워커)
+    sqlite://                        같은 머신의 워커 간 공유 (/dev/shm이 있으면 tmpfs에 저장)
+    sqlite:////var/lib/imagecon.db   경로 지정
+    redis://host:6379/0              여러 머신 간 공유 (redis 패키지 필요)
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import tempfile
+import threading
+
+from limits.storage import Storage
+
+# 캐시 항목 하나의 최대 크기 / 메모리 백엔드 전체 크기
+CACHE_MAX_ITEM_BYTES = 4 * 1024 * 1024
+MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# SQLite 백엔드 전체 캐시 크기 (기본 경로가 메모리 기반 tmpfs인 /dev/shm이므로 제한)
+SQLITE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+def default_sqlite_path():
+    """기본 SQLite 경로 (tmpfs 우선)"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'imagecon-state.db')
+
+def sqlite_path(url):
+    """sqlite:///상대경로, sqlite:////절대경로, sqlite:// (기본 경로)"""
+    path = url.split('://', 1)[1][1:]
+    return path or default_sqlite_path()
+
+class MemoryBackend:
+    """프로세스 내부 상태 (워커 간 공유 없음)"""
+    name = 'memory'
+    limiter_uri = 'memory://'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = {}  # 토큰 -> 만료 시각
+        self.cache = {}  # 키 -> (만료 시각, 값), 삽입 순서 = 오래된 순서
+        self.cache_bytes = 0
+        self.uploads = {}  # 업로드 ID -> (클라이언트, 선언 크기, 만료 시각)
+
+    def acquire_slot(self, limit, ttl):
+        """동시 처리 슬롯 획득 (가득 찼으면 None)"""
+        now = time.time()
+        with self.lock:
+            for token in [t for t, expires in self.slots.items() if expires < now]:
+                del self.slots[token]
+            if len(self.slots) >= limit:
+                return None
+            token = uuid.uuid4().hex
+            self.slots[token] = now + ttl
+            return token
+
+    def release_slot(self, token):
+        with self.lock:
+            self.slots.pop(token, None)
+
+    def renew_slots(self, tokens, ttl):
+        """처리 중인 슬롯의 만료 연장 (이미 만료/반환된 토큰은 무시)"""
+        now = time.time()
+        with self.lock:
+            for token in tokens:
+                if self.slots.get(token, 0) >= now:
+                    self.slots[token] = now + ttl
+
+    def active_slots(self):
+        now = time.time()
+        with self.lock:
+            return sum(1 for expires in self.slots.values() if expires >= now)
+
+    def cache_get(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._cache_pop(key)
+                return None
+            return entry[1]
+
+    def cache_set(self, key, value, ttl):
+        if len(value) > CACHE_MAX_ITEM_BYTES:
+            return
+        with self.lock:
+            self._cache_pop(key)
+            while self.cache and self.cache_bytes + len(value) > MEMORY_CACHE_MAX_BYTES:
+                self._cache_pop(next(iter(self.cache)))
+            self.cache[key] = (time.time() + ttl, value)
+            self.cache_bytes += len(value)
+
+    def _cache_pop(self, key):
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.cache_bytes -= len(entry[1])
+
+    def reserve_upload(self, upload_id, client, size, ttl, max_sessions, max_bytes):
+        """업로드 예약 (성공하면 None, 넘은 제한이 있으면 'sessions' 또는 'bytes')"""
+        now = time.time()
+        with self.lock:
+            for expired in [u for u, entry in self.uploads.items() if entry[2] < now]:
+                del self.uploads[expired]
+            if sum(1 for entry in self.uploads.values() if entry[0] == client) >= max_sessions:
+                return 'sessions'
+            if sum(entry[1] for entry in self.uploads.values()) + size > max_bytes:
+                return 'bytes'
+            self.uploads[upload_id] = (client, size, now + ttl)
+            return None
+
+    def touch_upload(self, upload_id, ttl):
+        """조각을 받을 때마다 예약 만료 연장"""
+        with self.lock:
+            entry = self.uploads.get(upload_id)
+            if entry is not None:
+                self.uploads[upload_id] = (entry[0], entry[1], time.time() + ttl)
+
+    def release_upload(self, upload_id):
+        with self.lock:
+            self.uploads.pop(upload_id, None)
+
+    def after_fork(self):
+        """포크 후 마스터 상태 정리 (락은 포크 시점 상태를 물려받으므로 새로 생성)"""
+        self.lock = threading.Lock()
+        self.slots.clear()
+
+class SQLiteBackend:
+    """같은 머신의 워커 간 공유 상태 (WAL 모드 SQLite, 연결은 스레드/프로세스별)"""
+    name = 'sqlite'
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS slots (token TEXT PRIMARY KEY, expires REAL)',
+        'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)',
+        'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+        'CREATE TABLE IF NOT EXISTS limits (key TEXT PRIMARY KEY, value INTEGER, expires REAL)',
+        'CREATE TABLE IF NOT EXISTS uploads (id TEXT PRIMARY KEY, client TEXT, size INTEGER, expires REAL)'
+    )
+
+    def __init__(self, path, cache_max_bytes=SQLITE_CACHE_MAX_BYTES):
+        self.path = path
+        self.cache_max_bytes = cache_max_bytes
+        self.limiter_uri = f'sqlite:///{path}'
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def connection(self):
+        """현재 스레드의 연결 (포크 후에는 새로 연결)"""
+        if getattr(self.local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return self.local.conn
+
+    def transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (확인 후 삽입이 워커 간에 원자적)"""
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    def acquire_slot(self, limit, ttl):
+        now = time.time()
+        conn = self.transaction()
+        try:
+            conn.execute('DELETE FROM slots WHERE expires < ?', (now,))
+            (active,) = conn.execute('SELECT COUNT(*) FROM slots').fetchone()
+            token = None
+            if active < limit:
+                token = uuid.uuid4().hex
+                conn.execute('INSERT INTO slots VALUES (?, ?)', (token, now + ttl))
+            conn.execute('COMMIT')
+            return token
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def release_slot(self, token):
+        self.connection().execute('DELETE FROM slots WHERE token = ?', (token,))
+
+    def renew_slots(self, tokens, ttl):
+        now = time.time()
+        self.connection().executemany('UPDATE slots SET expires = ? WHERE token = ? AND expires >= ?',
+                                      [(now + ttl, token, now) for token in tokens])
+
+    def active_slots(self):
+        (active,) = self.connection().execute(
+            'SELECT COUNT(*) FROM slots WHERE expires >= ?', (time.time(),)).fetchone()
+        return active
+
+    def cache_get(self, key):
+        row = self.connection().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires >= ?', (key, time.time())).fetchone()
+        return bytes(row[0]) if row else None
+
+    def cache_set(self, key, value, ttl):
+        if len(value) > CACHE_MAX_ITEM_BYTES:
+            return
+        now = time.time()
+        conn = self.transaction()
+        try:
+            conn.execute('DELETE FROM cache WHERE expires < ?', (now,))
+            conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', (key, value, now + ttl))
+            # 전체 크기 제한: 만료가 가까운(= 오래된) 항목부터 삭제
+            (total,) = conn.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache').fetchone()
+            if total > self.cache_max_bytes:
+                for old_key, size in conn.execute(
+                        'SELECT key, LENGTH(value) FROM cache ORDER BY expires').fetchall():
+                    if total <= self.cache_max_bytes:
+                        break
+                    conn.execute('DELETE FROM cache WHERE key = ?', (old_key,))
+                    total -= size
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def reserve_upload(self, upload_id, client, size, ttl, max_sessions, max_bytes):
+        now = time.time()
+        conn = self.transaction()
+        try:
+            conn.execute('DELETE FROM uploads WHERE expires < ?', (now,))
+            (sessions,) = conn.execute('SELECT COUNT(*) FROM uploads WHERE client = ?', (client,)).fetchone()
+            (total,) = conn.execute('SELECT COALESCE(SUM(size), 0) FROM uploads').fetchone()
+            exceeded = None
+            if sessions >= max_sessions:
+                exceeded = 'sessions'
+            elif total + size > max_bytes:
+                exceeded = 'bytes'
+            else:
+                conn.execute('INSERT INTO uploads VALUES (?, ?, ?, ?)', (upload_id, client, size, now + ttl))
+            conn.execute('COMMIT')
+            return exceeded
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def touch_upload(self, upload_id, ttl):
+        self.connection().execute('UPDATE uploads SET expires = ? WHERE id = ?', (time.time() + ttl, upload_id))
+
+    def release_upload(self, upload_id):
+        self.connection().execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+
+    def after_fork(self):
+        pass
+
+class RedisBackend:
+    """여러 머신 간 공유 상태 (Redis 호환 서버)"""
+    name = 'redis'
+
+    # 만료된 슬롯 정리 + 확인 + 추가를 서버에서 원자적으로
+    ACQUIRE_SCRIPT = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    return 1
+    """
+
+    # 업로드 예약: KEYS = (만료 zset, 클라이언트 hash, 크기 hash), 만료 정리 후 세션 수/전체 바이트 확인
+    RESERVE_UPLOAD_SCRIPT = """
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])) do
+        redis.call('HDEL', KEYS[2], id)
+        redis.call('HDEL', KEYS[3], id)
+    end
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    local sessions, total = 0, 0
+    for _, id in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+        if redis.call('HGET', KEYS[2], id) == ARGV[4] then
+            sessions = sessions + 1
+        end
+        total = total + tonumber(redis.call('HGET', KEYS[3], id) or 0)
+    end
+    if sessions >= tonumber(ARGV[6]) then
+        return 'sessions'
+    end
+    if total + tonumber(ARGV[5]) > tonumber(ARGV[7]) then
+        return 'bytes'
+    end
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+    redis.call('HSET', KEYS[2], ARGV[3], ARGV[4])
+    redis.call('HSET', KEYS[3], ARGV[3], ARGV[5])
+    return ''
+    """
+
+    def __init__(self, url, prefix='imagecon:'):
+        import redis  # 선택 의존성이므로 지연 로딩
+
+        self.limiter_uri = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self.acquire = self.client.register_script(self.ACQUIRE_SCRIPT)
+        self.reserve = self.client.register_script(self.RESERVE_UPLOAD_SCRIPT)
+        self.upload_keys = [prefix + 'uploads', prefix + 'upload_clients', prefix + 'upload_sizes']
+
+    def acquire_slot(self, limit, ttl):
+        now = time.time()
+        token = uuid.uuid4().hex
+        if self.acquire(keys=[self.prefix + 'slots'], args=[now, now + ttl, limit, token]):
+            return token
+        return None
+
+    def release_slot(self, token):
+        self.client.zrem(self.prefix + 'slots', token)
+
+    def renew_slots(self, tokens, ttl):
+        expires = time.time() + ttl
+        self.client.zadd(self.prefix + 'slots', {token: expires for token in tokens}, xx=True)
+
+    def active_slots(self):
+        return self.client.zcount(self.prefix + 'slots', time.time(), '+inf')
+
+    def cache_get(self, key):
+        return self.client.get(self.prefix + 'cache:' + key)
+
+    def cache_set(self, key, value, ttl):
+        if len(value) <= CACHE_MAX_ITEM_BYTES:
+            self.client.setex(self.prefix + 'cache:' + key, int(ttl), value)
+
+    def reserve_upload(self, upload_id, client, size, ttl, max_sessions, max_bytes):
+        now = time.time()
+        exceeded = self.reserve(keys=self.upload_keys,
+                                args=[now, now + ttl, upload_id, client, size, max_sessions, max_bytes])
+        return exceeded.decode() if exceeded else None
+
+    def touch_upload(self, upload_id, ttl):
+        self.client.zadd(self.upload_keys[0], {upload_id: time.time() + ttl}, xx=True)
+
+    def release_upload(self, upload_id):
+        pipeline = self.client.pipeline()
+        pipeline.zrem(self.upload_keys[0], upload_id)
+        pipeline.hdel(self.upload_keys[1], upload_id)
+        pipeline.hdel(self.upload_keys[2], upload_id)
+        pipeline.execute()
+
+    def after_fork(self):
+        pass  # redis-py 연결 풀이 프로세스 변경을 감지하여 재연결
+
+class SQLiteLimiterStorage(Storage):
+    """flask-limiter용 SQLite 저장소 (storage_uri='sqlite:///경로', 고정 윈도우)"""
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.backend = SQLiteBackend(sqlite_path(uri or 'sqlite://'))
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        conn = self.backend.transaction()
+        try:
+            row = conn.execute('SELECT value, expires FROM limits WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] < now:
+                value, expires = amount, now + expiry
+            else:
+                value, expires = row[0] + amount, row[1]
+            if elastic_expiry:
+                expires = now + expiry
+            conn.execute('INSERT OR REPLACE INTO limits VALUES (?, ?, ?)', (key, value, expires))
+            conn.execute('COMMIT')
+            return value
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, key):
+        row = self.backend.connection().execute(
+            'SELECT value FROM limits WHERE key = ? AND expires >= ?', (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self.backend.connection().execute(
+            'SELECT expires FROM limits WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self.backend.connection().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.backend.connection().execute('DELETE FROM limits').rowcount
+
+    def clear(self, key):
+        self.backend.connection().execute('DELETE FROM limits WHERE key = ?', (key,))
+
+def create_backend(url):
+    """STATE_URL에 맞는 백엔드 생성"""
+    scheme = url.split('://', 1)[0]
+    if scheme == 'memory':
+        return MemoryBackend()
+    if scheme == 'sqlite':
+        return SQLiteBackend(sqlite_path(url))
+    if scheme in ('redis', 'rediss'):
+        return RedisBackend(url)
+    raise ValueError(f'지원하지 않는 STATE_URL: {url}')
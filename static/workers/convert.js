@@ -0,0 +1,172 @@
+/*
+ * ImageCon 변환 워커
+ * 업로드 전 축소, multipart/분할 업로드, 응답 JSON 파싱, Base64 결과 디코딩을 메인 스레드 밖에서 처리.
+ * 결과 바이트는 ArrayBuffer 소유권을 넘겨(transfer) 복사 없이 전달
+ */
+
+importScripts('/static/workers/preresize.js', '/static/workers/zip.js');
+
+// 재시도 로직이 있는 fetch (429는 Retry-After 만큼 대기, 네트워크 오류는 지수 백오프)
+async function fetchWithRetry(url, options, retries = 3) {
+    for (let i = 0; i < retries; i++) {
+        try {
+            const response = await fetch(url, options);
+
+            if (response.status === 429 && i < retries - 1) {
+                const retryAfter = response.headers.get('Retry-After') || 5;
+                await sleep(retryAfter * 1000);
+                continue;
+            }
+
+            return response;
+        } catch (error) {
+            if (i === retries - 1) throw error;
+            await sleep(Math.pow(2, i) * 1000);
+        }
+    }
+}
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+// 이보다 큰 업로드는 분할 업로드 (끊기면 받은 위치부터 재개)
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_RETRIES = 5;
+
+// 분할 업로드는 조각마다 SHA-256이 필요 (crypto.subtle은 HTTPS/localhost에서만 제공)
+function supportsChunkedUpload() {
+    return Boolean(self.crypto && self.crypto.subtle);
+}
+
+async function sha256Hex(buffer) {
+    const digest = await self.crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function uploadStatus(id) {
+    const response = await fetchWithRetry(`/uploads/${id}`, {});
+    if (!response.ok) {
+        throw new Error('업로드 세션이 만료되었습니다');
+    }
+    return response.json();
+}
+
+// 분할 업로드: 세션 생성 -> 조각 PUT (오프셋 + SHA-256) -> 커밋(변환)
+async function chunkedUpload(blob, name, options) {
+    const response = await fetchWithRetry('/uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ name, size: blob.size })
+    });
+    const session = await response.json();
+    if (!response.ok) {
+        throw new Error(session.error || `서버 오류 (${response.status})`);
+    }
+
+    try {
+        await sendChunks(blob, session);
+    } catch (error) {
+        // 실패한 세션은 바로 취소 (열린 세션 수/저장 공간 제한에 계속 잡히지 않도록)
+        fetch(`/uploads/${session.id}`, { method: 'DELETE' }).catch(() => {});
+        throw error;
+    }
+
+    return fetchWithRetry(`/uploads/${session.id}/commit`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(options)
+    });
+}
+
+async function sendChunks(blob, session) {
+    let response;
+    let offset = 0;
+    let failures = 0;
+    while (offset < blob.size) {
+        const chunk = await blob.slice(offset, offset + session.chunkSize).arrayBuffer();
+        const hash = await sha256Hex(chunk);
+
+        try {
+            response = await fetchWithRetry(`/uploads/${session.id}?offset=${offset}`, {
+                method: 'PUT',
+                headers: { 'X-Chunk-Sha256': hash },
+                body: chunk
+            });
+            const status = await response.json();
+
+            // 409/해시 불일치는 서버가 받은 위치부터 다시
+            if (response.ok || response.status === 409 || status.code === 'UPLOAD_HASH_MISMATCH') {
+                if (!response.ok && ++failures > CHUNK_RETRIES) {
+                    throw new Error(status.error);
+                }
+                offset = status.received;
+                continue;
+            }
+            throw new Error(status.error || `서버 오류 (${response.status})`);
+        } catch (error) {
+            // 연결이 끊기면 받은 위치를 확인하고 이어서 전송
+            if (++failures > CHUNK_RETRIES) throw error;
+            await sleep(Math.pow(2, Math.min(failures, 4)) * 500);
+            offset = (await uploadStatus(session.id)).received;
+        }
+    }
+}
+
+function base64ToBuffer(base64) {
+    const binary = atob(base64);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+// 요청: { id, type: 'convert', file, options, preResize }
+// 응답: { id, info, buffer } (info는 data를 뺀 결과 메타데이터)
+async function convert({ id, file, options, preResize }) {
+    const upload = (preResize && await preResizeBlob(file, preResize)) || file;
+    let response;
+
+    if (upload.size > CHUNKED_UPLOAD_THRESHOLD && supportsChunkedUpload()) {
+        response = await chunkedUpload(upload, file.name, options);
+    } else {
+        const form = new FormData();
+        form.append('options', JSON.stringify(options));
+        form.append('images', upload, file.name);
+        response = await fetchWithRetry('/convert', { method: 'POST', body: form });
+    }
+
+    const result = await response.json();
+
+    if (!response.ok) {
+        throw new Error(result.error || `서버 오류 (${response.status})`);
+    }
+    if (!result.images || result.images.length === 0) {
+        throw new Error(result.errors && result.errors.length > 0 ? result.errors[0].error : '변환 결과 없음');
+    }
+
+    const { data, ...info } = result.images[0];
+    const buffer = base64ToBuffer(data);
+    self.postMessage({ id, info, buffer }, [buffer]);
+}
+
+// 요청: { id, type: 'zip', images: [{ name, blob }], folderName }
+// 응답: { id, blob } (서버 왕복 없이 워커에서 ZIP 생성)
+async function zip({ id, images, folderName }) {
+    const blob = await new Response(zipStream(images, folderName)).blob();
+    self.postMessage({ id, blob: new Blob([blob], { type: 'application/zip' }) });
+}
+
+self.onmessage = async (e) => {
+    const job = e.data;
+    try {
+        if (job.type === 'zip') {
+            await zip(job);
+        } else {
+            await convert(job);
+        }
+    } catch (error) {
+        self.postMessage({ id: job.id, error: error.message || String(error) });
+    }
+};
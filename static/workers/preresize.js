@@ -0,0 +1,49 @@
+/*
+ * ImageCon 업로드 전 축소
+ * 원본을 createImageBitmap으로 디코딩하고 OffscreenCanvas에서 목표의 약 2배로 줄여 Blob으로 반환.
+ * 최종 고품질 리샘플/인코딩은 서버에서 하므로 여기서는 업로드 크기만 줄임 (convert.js 워커에서 importScripts)
+ */
+
+// target: { width, height, cover }
+//   cover=true  -> 가로/세로 모두 width/height 이상 (크롭 모드)
+//   cover=false -> width/height 안에 들어가도록 (비율 유지 모드)
+// 반환: 축소한 Blob, 줄일 필요가 없거나 디코딩할 수 없으면 null (원본 업로드)
+async function preResizeBlob(file, { width, height, cover }) {
+    let bitmap = null;
+
+    try {
+        // EXIF 방향은 디코딩 시 적용되므로 서버에서 다시 회전하지 않음
+        bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+
+        const scale = cover
+            ? Math.max(width / bitmap.width, height / bitmap.height)
+            : Math.min(width / bitmap.width, height / bitmap.height);
+
+        // 충분히 작으면 원본 그대로 업로드
+        if (scale >= 0.9) return null;
+
+        const targetWidth = Math.max(1, Math.round(bitmap.width * scale));
+        const targetHeight = Math.max(1, Math.round(bitmap.height * scale));
+
+        const canvas = new OffscreenCanvas(targetWidth, targetHeight);
+        const ctx = canvas.getContext('2d');
+        ctx.imageSmoothingEnabled = true;
+        ctx.imageSmoothingQuality = 'high';
+        ctx.drawImage(bitmap, 0, 0, targetWidth, targetHeight);
+
+        // 사진은 고품질 JPEG, 투명도가 있을 수 있는 형식은 PNG
+        const lossless = /png|gif|webp|bmp|tiff/.test(file.type);
+        const blob = await canvas.convertToBlob(
+            lossless ? { type: 'image/png' } : { type: 'image/jpeg', quality: 0.95 }
+        );
+
+        // 축소본이 원본보다 크면 원본 사용
+        return blob.size < file.size ? blob : null;
+    } catch (error) {
+        // HEIC 등 브라우저가 디코딩하지 못하는 형식은 원본 업로드
+        console.warn('업로드 전 축소 실패, 원본 업로드:', error.message || error);
+        return null;
+    } finally {
+        if (bitmap) bitmap.close();
+    }
+}
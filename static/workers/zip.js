@@ -0,0 +1,151 @@
+/*
+ * ImageCon ZIP 스트림 (변환 워커에서 importScripts로 사용)
+ * 변환 결과는 이미 압축된 이미지이므로 STORE(무압축) 항목으로 ReadableStream에 순서대로 기록.
+ * 서버 /download-zip과 같은 폴더/파일명 규칙을 사용
+ */
+
+const CRC_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+            c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+// 최대 항목 수 / 크기 (ZIP64 미사용)
+const ZIP_MAX_ENTRIES = 0xFFFF;
+const ZIP_MAX_BYTES = 0xFFFFFFFF;
+
+function updateCrc32(crc, bytes) {
+    for (let i = 0; i < bytes.length; i++) {
+        crc = CRC_TABLE[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+    }
+    return crc;
+}
+
+// Blob을 조각 단위로 읽어 CRC32 계산
+async function blobCrc32(blob) {
+    const reader = blob.stream().getReader();
+    let crc = 0xFFFFFFFF;
+    for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        crc = updateCrc32(crc, value);
+    }
+    return (crc ^ 0xFFFFFFFF) >>> 0;
+}
+
+// 서버와 같은 안전한 이름 규칙
+function safeZipName(name, extra) {
+    return Array.from(name).filter(c => /[\p{L}\p{N}]/u.test(c) || extra.includes(c)).join('');
+}
+
+function dosDateTime(date) {
+    const time = (date.getHours() << 11) | (date.getMinutes() << 5) | (date.getSeconds() >> 1);
+    const day = ((date.getFullYear() - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate();
+    return { time, day };
+}
+
+// 로컬 헤더(30바이트 + 이름)와 중앙 디렉터리 항목(46바이트 + 이름)
+function zipHeader(signature, size, entry, stamp) {
+    const central = signature === 0x02014b50;
+    const header = new Uint8Array(size + entry.nameBytes.length);
+    const view = new DataView(header.buffer);
+    let p = 0;
+    const u32 = (v) => { view.setUint32(p, v, true); p += 4; };
+    const u16 = (v) => { view.setUint16(p, v, true); p += 2; };
+
+    u32(signature);
+    if (central) u16(20);    // 만든 버전
+    u16(20);                 // 필요한 버전
+    u16(0x0800);             // UTF-8 파일명
+    u16(0);                  // STORE
+    u16(stamp.time);
+    u16(stamp.day);
+    u32(entry.crc);
+    u32(entry.size);         // 압축 크기
+    u32(entry.size);         // 원본 크기
+    u16(entry.nameBytes.length);
+    u16(0);                  // extra 길이
+    if (central) {
+        u16(0);              // 주석 길이
+        u16(0);              // 디스크 번호
+        u16(0);              // 내부 속성
+        u32(0);              // 외부 속성
+        u32(entry.offset);
+    }
+    header.set(entry.nameBytes, p);
+    return header;
+}
+
+function zipEnd(count, size, offset) {
+    const end = new Uint8Array(22);
+    const view = new DataView(end.buffer);
+    view.setUint32(0, 0x06054b50, true);
+    view.setUint16(8, count, true);
+    view.setUint16(10, count, true);
+    view.setUint32(12, size, true);
+    view.setUint32(16, offset, true);
+    return end;
+}
+
+// images: [{ name, blob }] -> ZIP ReadableStream (항목을 하나씩 읽어 기록)
+function zipStream(images, folderName) {
+    if (images.length > ZIP_MAX_ENTRIES) {
+        throw new Error('ZIP 항목 수 초과');
+    }
+
+    const folder = safeZipName(folderName || '', ' -_').slice(0, 50) || 'images';
+    const encoder = new TextEncoder();
+    const stamp = dosDateTime(new Date());
+    const entries = [];
+    let index = 0;
+    let offset = 0;
+
+    return new ReadableStream({
+        async pull(controller) {
+            if (index < images.length) {
+                const { name, blob } = images[index];
+                const filename = safeZipName(name || `image_${index}.jpg`, ' -_.');
+                index++;
+
+                const entry = {
+                    nameBytes: encoder.encode(`${folder}/${filename}`),
+                    crc: await blobCrc32(blob),
+                    size: blob.size,
+                    offset
+                };
+                if (offset + blob.size > ZIP_MAX_BYTES) {
+                    throw new Error('ZIP 크기 초과');
+                }
+
+                const header = zipHeader(0x04034b50, 30, entry, stamp);
+                controller.enqueue(header);
+
+                const reader = blob.stream().getReader();
+                for (;;) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    controller.enqueue(value);
+                }
+
+                offset += header.length + blob.size;
+                entries.push(entry);
+                return;
+            }
+
+            let directorySize = 0;
+            for (const entry of entries) {
+                const header = zipHeader(0x02014b50, 46, entry, stamp);
+                controller.enqueue(header);
+                directorySize += header.length;
+            }
+            controller.enqueue(zipEnd(entries.length, directorySize, offset));
+            controller.close();
+        }
+    });
+}
@@ -9,10 +9,19 @@ import base64
 import io
 import os
 import tempfile
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFilter
+import pillow_heif
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+import struct
+import zlib
+import hashlib
+import zipfile
+import shutil
+import subprocess
+
+pillow_heif.register_heif_opener()
 
 # 테스트 설정
 TEST_URL = os.environ.get('TEST_URL', 'http://localhost:5000')
@@ -79,6 +88,41 @@ class ImageConTestSuite(unittest.TestCase):
         buffer.seek(0)
         return f"data:image/{format.lower()};base64,{base64.b64encode(buffer.getvalue()).decode()}"
     
+    @staticmethod
+    def fake_png_header(width, height):
+        """헤더만 큰 해상도를 주장하는 작은 PNG (디컴프레션 밤 시뮬레이션)"""
+        def chunk(tag, payload):
+            body = tag + payload
+            return struct.pack('>I', len(payload)) + body + struct.pack('>I', zlib.crc32(body))
+        
+        ihdr = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+        data = (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) +
+                chunk(b'IDAT', zlib.compress(b'\x00' * 1024)) + chunk(b'IEND', b''))
+        return f"data:image/png;base64,{base64.b64encode(data).decode()}"
+    
+    @staticmethod
+    def display_p3_profile():
+        """Display P3 원색/감마 2.2의 최소 ICC v2 매트릭스 프로필"""
+        def xyz(x, y, z):
+            return b'XYZ ' + bytes(4) + b''.join(struct.pack('>i', round(v * 65536)) for v in (x, y, z))
+        
+        text = b'Display P3 test\x00'
+        desc = b'desc' + bytes(4) + struct.pack('>I', len(text)) + text + bytes(4 + 4 + 2 + 1 + 67)
+        curve = b'curv' + bytes(4) + struct.pack('>IH', 1, 0x0233) + bytes(2)
+        tags = [(b'desc', desc), (b'wtpt', xyz(0.9642, 1.0, 0.8249)),
+                (b'rXYZ', xyz(0.5151, 0.2412, -0.0011)), (b'gXYZ', xyz(0.2920, 0.6922, 0.0419)),
+                (b'bXYZ', xyz(0.1571, 0.0666, 0.7841)),
+                (b'rTRC', curve), (b'gTRC', curve), (b'bTRC', curve)]
+        
+        offset = 128 + 4 + 12 * len(tags)
+        table, data = b'', b''
+        for sig, body in tags:
+            table += sig + struct.pack('>II', offset + len(data), len(body))
+            data += body + bytes(-len(body) % 4)
+        header = (struct.pack('>I', offset + len(data)) + bytes(4) + struct.pack('>I', 0x02100000)
+                  + b'mntrRGB XYZ ' + bytes(12) + b'acsp' + bytes(28) + xyz(0.9642, 1.0, 0.8249)[8:] + bytes(48))
+        return header + struct.pack('>I', len(tags)) + table + data
+    
     def test_01_health_check(self):
         """헬스 체크"""
         response = requests.get(f'{self.base_url}/health')
@@ -356,7 +400,7 @@ class ImageConTestSuite(unittest.TestCase):
         response = requests.post(
             f'{self.base_url}/download-zip',
             json={
-                'images': converted_images,
+                'images': converted_images + [{'name': 'bad.jpg', 'data': 'not-base64!'}],
                 'folderName': 'test_folder'
             }
         )
@@ -364,6 +408,13 @@ class ImageConTestSuite(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.headers['Content-Type'], 'application/zip')
         self.assertGreater(len(response.content), 0)
+        
+        # 디코딩에 실패한 항목은 빈 파일로 남기지 않고 건너뜀
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), len(converted_images))
+            self.assertNotIn('test_folder/bad.jpg', names)
+            self.assertTrue(all(archive.getinfo(name).file_size > 0 for name in names))
     
     def test_11_stress_test(self):
         """스트레스 테스트 (큰 이미지, 많은 수)"""
@@ -393,9 +444,8 @@ class ImageConTestSuite(unittest.TestCase):
         self.assertTrue(data['success'])
     
     def test_12_memory_leak_check(self):
-        """메모리 누수 체크"""
-        # 여러 번 반복하여 메모리 누수 확인
-        for i in range(5):
+        """메모리 누수 체크 (첫 변환 이후 RSS/파일 디스크립터 증가량, 장시간 확인은 soaktest.py)"""
+        def convert(i):
             response = requests.post(
                 f'{self.base_url}/convert',
                 json={
@@ -409,7 +459,1139 @@ class ImageConTestSuite(unittest.TestCase):
                 }
             )
             self.assertEqual(response.status_code, 200)
-            time.sleep(1)  # GC 시간 확보
+            
+            # ZIP 임시 파일 정리 경로도 함께 확인
+            response = requests.post(f'{self.base_url}/download-zip', json={'images': response.json()['images']})
+            self.assertEqual(response.status_code, 200)
+        
+        # 첫 변환은 코덱/할당자 초기화가 섞이므로 기준에서 제외
+        convert(0)
+        baseline = requests.get(f'{self.base_url}/health').json()['memory']
+        
+        # 여러 번 반복하여 메모리 누수 확인
+        for i in range(1, 6):
+            convert(i)
+        
+        time.sleep(1)  # GC 시간 확보
+        memory = requests.get(f'{self.base_url}/health').json()['memory']
+        self.assertLess(memory['rss_mb'] - baseline['rss_mb'], 64)
+        if baseline['open_fds'] is not None:
+            self.assertLessEqual(memory['open_fds'] - baseline['open_fds'], 2)
+    
+    def test_13_large_image_strip_processing(self):
+        """대용량 이미지 스트립 처리 테스트"""
+        if os.environ.get('SKIP_STRESS_TEST'):
+            self.skipTest("스트레스 테스트 건너뛰기")
+        
+        # 6000x6000 RGBA = 디코딩 시 약 144MB (기본 예산 128MB 초과)
+        large_img = Image.new('RGBA', (6000, 6000), color=(0, 128, 255, 100))
+        large_data = self.image_to_base64(large_img, 'PNG')
+        
+        for mode, expected in [('fit', (1000, 1000)), ('crop1000', (1000, 1000))]:
+            with self.subTest(mode=mode):
+                response = requests.post(
+                    f'{self.base_url}/convert',
+                    json={
+                        'images': [{
+                            'name': 'huge.png',
+                            'data': large_data
+                        }],
+                        'format': 'jpg',
+                        'maxSize': 1000,
+                        'resizeMode': mode
+                    },
+                    timeout=120
+                )
+                
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                self.assertTrue(data['success'])
+                result = data['images'][0]
+                self.assertEqual((result['width'], result['height']), expected)
+                
+                # PNG는 띠 단위로 디코딩 (추정 최대 메모리가 전체 디코딩 크기보다 작음)
+                self.assertLess(result['usage']['estimated_peak_bytes'], 6000 * 6000 * 4)
+        
+        # 띠 단위 디코딩을 지원하지 않는 형식은 전체 디코딩이 예산을 넘으면 디코딩 전에 거부
+        buffer = io.BytesIO()
+        large_img.save(buffer, 'TIFF', compression='tiff_deflate')
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{
+                    'name': 'huge.tif',
+                    'data': base64.b64encode(buffer.getvalue()).decode()
+                }],
+                'format': 'jpg',
+                'maxSize': 1000
+            },
+            timeout=120
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('예산', response.json()['errors'][0]['error'])
+    
+    def test_14_background_color(self):
+        """투명 영역 배경색 지정 테스트"""
+        img = Image.new('RGBA', (50, 50), color=(255, 255, 255, 0))
+        transparent = self.image_to_base64(img, 'PNG')
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{
+                    'name': 'bg.png',
+                    'data': transparent
+                }],
+                'format': 'jpg',
+                'background': '#000000'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        result = Image.open(io.BytesIO(base64.b64decode(data['images'][0]['data'])))
+        self.assertLess(max(result.getpixel((25, 25))), 10)
+        
+        # 잘못된 배경색
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{
+                    'name': 'bg.png',
+                    'data': transparent
+                }],
+                'format': 'jpg',
+                'background': 'not-a-color'
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['code'], 'INVALID_BACKGROUND')
+    
+    def test_15_probe(self):
+        """헤더 프로브 및 디코딩 전 거부 테스트"""
+        bomb = self.fake_png_header(15000, 15000)  # 225MP, 실제 데이터는 수백 바이트
+        
+        response = requests.post(
+            f'{self.base_url}/probe',
+            json={
+                'images': [
+                    {'name': 'landscape.jpg', 'data': self.test_images['landscape']},
+                    {'name': 'bomb.png', 'data': bomb}
+                ],
+                'format': 'jpg',
+                'maxSize': 500
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['admissible'], 1)
+        
+        normal, rejected = data['images']
+        self.assertEqual(normal['format'], 'JPEG')
+        self.assertEqual((normal['width'], normal['height']), (1000, 500))
+        self.assertEqual((normal['output_width'], normal['output_height']), (500, 250))
+        self.assertEqual(normal['frames'], 1)
+        self.assertGreater(normal['estimated_memory_bytes'], 0)
+        self.assertTrue(normal['admissible'])
+        self.assertFalse(rejected['admissible'])
+        
+        # 변환 요청도 디코딩 전에 거부
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{'name': 'bomb.png', 'data': bomb}],
+                'format': 'jpg'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data['success'])
+        self.assertIn('해상도', data['errors'][0]['error'])
+    
+    def test_16_heif_decode_path(self):
+        """HEIF 전용 디코딩 경로 및 단계별 시간 테스트"""
+        img = Image.new('RGB', (1200, 900), color='orange')
+        heif_data = self.image_to_base64(img, 'HEIF')
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{
+                    'name': 'photo.heic',
+                    'data': heif_data
+                }],
+                'format': 'jpg',
+                'maxSize': 600,
+                'resizeMode': 'fit'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        result = data['images'][0]
+        self.assertEqual((result['width'], result['height']), (600, 450))
+        for stage in ('decode', 'resize', 'convert', 'encode'):
+            self.assertIn(stage, result['timings'])
+        
+        health = requests.get(f'{self.base_url}/health').json()
+        self.assertGreaterEqual(health['heif']['count'], 1)
+
+        # 프로브 방향은 pillow-heif가 보관한 원래 EXIF 값 (열 때 EXIF는 1로 바뀜)
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        heif_file = pillow_heif.HeifFile()
+        heif_file.add_frombytes('RGB', img.size, img.tobytes())
+        buffer = io.BytesIO()
+        heif_file.save(buffer, exif=exif.tobytes())
+        response = requests.post(
+            f'{self.base_url}/probe',
+            json={'images': [{
+                'name': 'rotated.heic',
+                'data': base64.b64encode(buffer.getvalue()).decode('utf-8')
+            }]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['images'][0]['orientation'], 6)
+
+    def test_17_startup_profile(self):
+        """시작 프로파일 및 첫 요청 지연 기록 테스트"""
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{
+                    'name': 'first.png',
+                    'data': self.test_images['simple_rgb']
+                }],
+                'format': 'jpg'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        
+        startup = requests.get(f'{self.base_url}/health').json()['startup']
+        self.assertGreater(startup['import_ms'], 0)
+        self.assertGreaterEqual(startup['ready_ms'], startup['import_ms'])
+        self.assertIsNotNone(startup['first_request_ms'])
+    
+    def test_18_asgi_entry_point(self):
+        """ASGI 엔트리 포인트 테스트 (프로세스 내 호출, 본문 분할 수신)"""
+        import asyncio
+        import asgi
+        
+        payload = json.dumps({
+            'images': [{
+                'name': 'asgi.png',
+                'data': self.test_images['simple_rgb']
+            }],
+            'format': 'webp'
+        }).encode()
+        chunks = [payload[i:i + 1000] for i in range(0, len(payload), 1000)]
+        
+        async def call(content_length=True):
+            messages = [
+                {'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)
+            ]
+            sent = []
+            
+            async def receive():
+                await asyncio.sleep(0)
+                return messages.pop(0)
+            
+            async def send(message):
+                sent.append(message)
+            
+            scope = {
+                'type': 'http', 'method': 'POST', 'path': '/convert', 'query_string': b'',
+                'headers': [(b'content-type', b'application/json')],
+                'client': ('127.0.0.1', 50000), 'server': ('localhost', 80), 'http_version': '1.1'
+            }
+            if content_length:
+                scope['headers'].append((b'content-length', str(len(payload)).encode()))
+            await asgi.app(scope, receive, send)
+            return sent
+        
+        # Content-Length 있음 / 없음(chunked)
+        for content_length in (True, False):
+            with self.subTest(content_length=content_length):
+                sent = asyncio.run(call(content_length))
+                self.assertEqual(sent[0]['status'], 200)
+                body = b''.join(m.get('body', b'') for m in sent[1:])
+                data = json.loads(body)
+                self.assertTrue(data['success'])
+                self.assertTrue(data['images'][0]['name'].endswith('.webp'))
+        
+        # chunked 본문도 수신 중에 허용 크기 적용
+        max_length = asgi.flask_app.config['MAX_CONTENT_LENGTH']
+        asgi.flask_app.config['MAX_CONTENT_LENGTH'] = len(payload) // 2
+        try:
+            sent = asyncio.run(call(False))
+        finally:
+            asgi.flask_app.config['MAX_CONTENT_LENGTH'] = max_length
+        self.assertEqual(sent[0]['status'], 413)
+    
+    def test_19_payload_roundtrip(self):
+        """입출력 페이로드 무결성 테스트 (data URL 접두어 유무, 응답 크기)"""
+        raw = self.test_images['landscape'].split(',', 1)[1]
+        
+        for label, payload in [('data_url', self.test_images['landscape']), ('raw', raw)]:
+            with self.subTest(payload=label):
+                response = requests.post(
+                    f'{self.base_url}/convert',
+                    json={
+                        'images': [{
+                            'name': f'{label}.jpg',
+                            'data': payload
+                        }],
+                        'format': 'png'
+                    }
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(int(response.headers['Content-Length']), len(response.content))
+                
+                result = response.json()['images'][0]
+                decoded = base64.b64decode(result['data'])
+                self.assertEqual(len(decoded), result['size'])
+                self.assertEqual(Image.open(io.BytesIO(decoded)).size, (1000, 500))
+    
+    def test_20_spooled_large_payload(self):
+        """디스크 스풀링 입출력 테스트 (기본 기준 8MB 초과)"""
+        # 압축되지 않는 노이즈 이미지: PNG 약 9.7MB
+        img = Image.frombytes('RGB', (1800, 1800), os.urandom(1800 * 1800 * 3))
+        noisy = self.image_to_base64(img, 'PNG')
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{
+                    'name': 'noise.png',
+                    'data': noisy
+                }],
+                'format': 'png',
+                'resizeMode': 'none'
+            },
+            timeout=120
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response.headers['Content-Length']), len(response.content))
+        
+        result = response.json()['images'][0]
+        decoded = base64.b64decode(result['data'])
+        self.assertGreater(result['size'], 8 * 1024 * 1024)
+        self.assertEqual(len(decoded), result['size'])
+        self.assertEqual(Image.open(io.BytesIO(decoded)).tobytes(), img.tobytes())
+    
+    def test_21_smart_crop(self):
+        """내용 기반 크롭 테스트 (오른쪽에 치우친 피사체)"""
+        img = Image.new('RGB', (2000, 1000), 'white')
+        draw = ImageDraw.Draw(img)
+        for i in range(0, 800, 16):
+            draw.line([(1500, 100 + i), (1950, 900 - i)], fill='black', width=4)
+        off_center = self.image_to_base64(img, 'PNG')
+        
+        def dark_ratio(strategy):
+            response = requests.post(
+                f'{self.base_url}/convert',
+                json={
+                    'images': [{
+                        'name': 'product.png',
+                        'data': off_center
+                    }],
+                    'format': 'png',
+                    'resizeMode': 'crop1000',
+                    'cropStrategy': strategy
+                }
+            )
+            self.assertEqual(response.status_code, 200)
+            result = response.json()['images'][0]
+            self.assertEqual((result['width'], result['height']), (1000, 1000))
+            gray = Image.open(io.BytesIO(base64.b64decode(result['data']))).convert('L')
+            return sum(gray.histogram()[:128]) / (1000 * 1000)
+        
+        center = dark_ratio('center')
+        for strategy in ('edge', 'entropy'):
+            with self.subTest(strategy=strategy):
+                self.assertGreater(dark_ratio(strategy), center)
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{'name': 'product.png', 'data': off_center}],
+                'resizeMode': 'crop1000',
+                'cropStrategy': 'magic'
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['code'], 'INVALID_CROP_STRATEGY')
+
+    def test_22_target_sizes(self):
+        """지정 크기/프리셋 리사이즈 테스트"""
+        img_data = self.image_to_base64(Image.new('RGB', (800, 600), 'green'), 'JPEG')
+        
+        cases = [
+            ({'resizeMode': 'cover', 'width': 1200, 'height': 628}, (1200, 628)),
+            ({'resizeMode': 'contain', 'width': 400, 'height': 400}, (400, 300)),
+            ({'resizeMode': 'pad', 'width': 400, 'height': 400}, (400, 400)),
+            ({'resizeMode': 'exact', 'width': 300, 'height': 100}, (300, 100)),
+            ({'preset': 'portrait1080'}, (1080, 1350))
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                response = requests.post(
+                    f'{self.base_url}/convert',
+                    json={
+                        'images': [{'name': 'target.jpg', 'data': img_data}],
+                        'format': 'jpg',
+                        'background': '#ff0000',
+                        **params
+                    }
+                )
+                self.assertEqual(response.status_code, 200)
+                result = response.json()['images'][0]
+                self.assertEqual((result['width'], result['height']), expected)
+                self.assertEqual(result['name'], f'target_{expected[0]}x{expected[1]}.jpg')
+                
+                output = Image.open(io.BytesIO(base64.b64decode(result['data'])))
+                if params.get('resizeMode') == 'pad':
+                    # 위아래 여백은 배경색
+                    r, g, b = output.getpixel((200, 10))
+                    self.assertGreater(r, 200)
+                    self.assertLess(g, 60)
+        
+        for params, code in [({'preset': 'billboard'}, 'UNKNOWN_PRESET'),
+                             ({'preset': ['square800']}, 'UNKNOWN_PRESET'),
+                             ({'preset': {'mode': 'cover'}}, 'UNKNOWN_PRESET'),
+                             ({'resizeMode': 'cover'}, 'INVALID_TARGET_SIZE'),
+                             ({'resizeMode': 'pad', 'width': 0, 'height': 100}, 'INVALID_TARGET_SIZE')]:
+            with self.subTest(params=params):
+                response = requests.post(
+                    f'{self.base_url}/convert',
+                    json={'images': [{'name': 'target.jpg', 'data': img_data}], **params}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['code'], code)
+        
+        presets = requests.get(f'{self.base_url}/presets').json()['presets']
+        self.assertEqual(presets['link1200'], {'mode': 'cover', 'width': 1200, 'height': 628})
+
+        # RESIZE_PRESETS 환경 변수는 시작 시 검증
+        from app import parse_resize_presets
+        self.assertEqual(parse_resize_presets('{"banner": {"mode": "cover", "width": 1500, "height": 500}}'),
+                         {'banner': {'mode': 'cover', 'width': 1500, 'height': 500}})
+        for value in ('["banner"]', '{"banner": {"mode": "fit", "width": 10, "height": 10}}',
+                      '{"banner": {"mode": "cover", "width": 0, "height": 10}}',
+                      '{"banner": {"mode": "cover", "width": "wide", "height": 10}}'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_resize_presets(value)
+
+    def test_23_auto_quality(self):
+        """자동 품질 선택 테스트 (단색 그래픽은 낮은 품질, 세밀한 이미지는 높은 품질)"""
+        flat = Image.new('RGB', (800, 600), 'white')
+        ImageDraw.Draw(flat).rectangle((100, 100, 500, 400), fill='navy')
+        
+        noise = Image.effect_noise((800, 600), 40).filter(ImageFilter.GaussianBlur(1))
+        detailed = Image.merge('RGB', (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [
+                    {'name': 'flat.png', 'data': self.image_to_base64(flat, 'PNG')},
+                    {'name': 'detailed.png', 'data': self.image_to_base64(detailed, 'PNG')}
+                ],
+                'format': 'jpg',
+                'quality': 'auto',
+                'resizeMode': 'none'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        flat_result, detailed_result = response.json()['images']
+        
+        for result in (flat_result, detailed_result):
+            self.assertTrue(40 <= result['quality'] <= 95)
+            self.assertGreaterEqual(result['ssim'], 0.98)
+        self.assertLess(flat_result['quality'], detailed_result['quality'])
+        
+        # 고정 품질에는 선택 정보가 없음
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{'name': 'flat.png', 'data': self.image_to_base64(flat, 'PNG')}],
+                'format': 'jpg',
+                'quality': 85
+            }
+        )
+        self.assertNotIn('quality', response.json()['images'][0])
+
+    def test_24_auto_format(self):
+        """자동 형식 선택 테스트 (스크린샷은 PNG, 사진은 손실 압축, 투명 로고는 투명도 유지)"""
+        screenshot = Image.new('RGB', (1280, 800), 'white')
+        draw = ImageDraw.Draw(screenshot)
+        for i in range(20):
+            draw.text((20, 30 * i + 10), f'Settings > General > option {i}', fill='black')
+        draw.rectangle((600, 100, 1200, 700), fill=(230, 230, 240))
+        
+        noise = Image.effect_noise((1200, 800), 40).filter(ImageFilter.GaussianBlur(1.5))
+        photo = Image.merge('RGB', (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+        
+        logo = Image.new('RGBA', (400, 400), (0, 0, 0, 0))
+        ImageDraw.Draw(logo).ellipse((50, 50, 350, 350), fill=(200, 0, 0, 255))
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [
+                    {'name': 'screenshot.png', 'data': self.image_to_base64(screenshot, 'PNG')},
+                    {'name': 'photo.png', 'data': self.image_to_base64(photo, 'PNG')},
+                    {'name': 'logo.png', 'data': self.image_to_base64(logo, 'PNG')},
+                    {'name': 'cmyk.jpg', 'data': self.image_to_base64(photo.convert('CMYK'), 'JPEG')}
+                ],
+                'format': 'auto'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        screenshot_result, photo_result, logo_result, cmyk_result = response.json()['images']
+        
+        self.assertEqual(screenshot_result['format'], 'png')
+        self.assertEqual(screenshot_result['format_decision']['class'], 'graphic')
+        self.assertIn(photo_result['format'], ('jpg', 'webp'))
+        self.assertEqual(photo_result['format_decision']['class'], 'photo')
+        self.assertTrue(photo_result['name'].endswith('.' + photo_result['format']))
+        self.assertEqual(logo_result['format'], 'png')
+        self.assertTrue(logo_result['format_decision']['alpha'])
+        
+        output = Image.open(io.BytesIO(base64.b64decode(logo_result['data'])))
+        self.assertEqual(output.getpixel((0, 0))[3], 0)
+        
+        # CMYK 사진도 시험 인코딩 전에 RGB로 정규화
+        self.assertIn(cmyk_result['format'], ('jpg', 'webp'))
+        self.assertEqual(Image.open(io.BytesIO(base64.b64decode(cmyk_result['data']))).mode, 'RGB')
+        
+        # 사진을 PNG로 저장했을 때보다 작아야 함
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={'images': [{'name': 'photo.png', 'data': self.image_to_base64(photo, 'PNG')}], 'format': 'png'}
+        )
+        self.assertLess(photo_result['size'], response.json()['images'][0]['size'] / 2)
+
+        # 16비트 그레이스케일 그래픽은 PNG 지정 때와 같이 16비트로 저장 (8비트 RGB로 떨어뜨리지 않음)
+        depth = Image.new('I;16', (256, 256))
+        ImageDraw.Draw(depth).rectangle((64, 64, 192, 192), fill=40000)
+        depth_data = self.image_to_base64(depth, 'PNG')
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={'images': [{'name': 'depth.png', 'data': depth_data}], 'format': 'auto'}
+        )
+        depth_result = response.json()['images'][0]
+        self.assertEqual(depth_result['format'], 'png')
+        source_mode = Image.open(io.BytesIO(base64.b64decode(depth_data.split(',', 1)[1]))).mode
+        self.assertEqual(Image.open(io.BytesIO(base64.b64decode(depth_result['data']))).mode, source_mode)
+
+    def test_25_png_palette(self):
+        """PNG8 팔레트 양자화 테스트 (적은 색은 무손실, 부드러운 그라디언트는 auto에서 유지)"""
+        logo = Image.new('RGBA', (400, 400), (0, 0, 0, 0))
+        ImageDraw.Draw(logo).ellipse((50, 50, 350, 350), fill=(200, 0, 0, 128))
+        gradient = Image.merge('RGB', (Image.linear_gradient('L'), Image.linear_gradient('L').rotate(90),
+                                       Image.radial_gradient('L')))
+        
+        def convert(img, mode):
+            response = requests.post(
+                f'{self.base_url}/convert',
+                json={
+                    'images': [{'name': 'graphic.png', 'data': self.image_to_base64(img, 'PNG')}],
+                    'format': 'png',
+                    'pngPalette': mode
+                }
+            )
+            self.assertEqual(response.status_code, 200)
+            return response.json()['images'][0]
+        
+        truecolor = convert(logo, 'off')
+        palette = convert(logo, 'auto')
+        self.assertNotIn('palette', truecolor)
+        self.assertEqual(palette['palette'], {'colors': 2, 'lossless': True})
+        self.assertLess(palette['size'], truecolor['size'])
+        
+        output = Image.open(io.BytesIO(base64.b64decode(palette['data'])))
+        self.assertEqual(output.mode, 'P')
+        self.assertEqual(output.convert('RGBA').getpixel((200, 200)), (200, 0, 0, 128))
+        self.assertEqual(output.convert('RGBA').getpixel((0, 0))[3], 0)
+        
+        # 256색 RGBA도 모든 픽셀이 그대로 유지되어야 무손실
+        swatches = Image.new('RGBA', (256, 64))
+        for i in range(256):
+            swatches.paste((i, (i * 37) % 256, 255 - i, (i * 91) % 256), (i, 0, i + 1, 64))
+        exact = convert(swatches, 'auto')
+        self.assertEqual(exact['palette'], {'colors': 256, 'lossless': True})
+        output = Image.open(io.BytesIO(base64.b64decode(exact['data']))).convert('RGBA')
+        self.assertEqual(list(output.getdata()), list(swatches.getdata()))
+        
+        self.assertNotIn('palette', convert(gradient, 'auto'))
+        self.assertFalse(convert(gradient, 'on')['palette']['lossless'])
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [{'name': 'graphic.png', 'data': self.image_to_base64(logo, 'PNG')}],
+                'format': 'png',
+                'pngPalette': 'sometimes'
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['code'], 'INVALID_PNG_PALETTE')
+
+    def test_26_metadata_modes(self):
+        """메타데이터 모드 테스트 (strip/minimal은 그대로 제거, srgb는 sRGB 변환, preserve는 원본 EXIF/ICC 유지)"""
+        exif = Image.Exif()
+        exif[0x8298] = 'ACME'
+        exif[0x8769] = {0x9003: '2024:01:01 10:00:00'}
+        exif[0x8825] = {1: 'N', 2: (37.0, 30.0, 1.0)}
+        
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (200, 100, 50)).save(
+            buffer, 'JPEG', quality=95, icc_profile=self.display_p3_profile(), exif=exif.tobytes())
+        img_data = f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+        
+        def convert(metadata, data=img_data, quality=95):
+            response = requests.post(
+                f'{self.base_url}/convert',
+                json={
+                    'images': [{'name': 'p3.jpg', 'data': data}],
+                    'format': 'jpg',
+                    'quality': quality,
+                    'metadata': metadata
+                }
+            )
+            self.assertEqual(response.status_code, 200)
+            output = Image.open(io.BytesIO(base64.b64decode(response.json()['images'][0]['data'])))
+            output.load()
+            return output
+        
+        stripped = convert('strip')
+        self.assertNotIn('icc_profile', stripped.info)
+        self.assertEqual(len(stripped.getexif()), 0)
+        self.assertLess(abs(stripped.getpixel((32, 32))[0] - 200), 4)  # 픽셀 변환 없이 제거만
+        
+        converted = convert('srgb')
+        self.assertNotIn('icc_profile', converted.info)
+        self.assertEqual(len(converted.getexif()), 0)
+        # P3 색은 sRGB에서 더 진한 값이 되어야 함 (변환 없이 버리면 흐려짐)
+        red, green, blue = converted.getpixel((32, 32))
+        self.assertGreater(red, 205)
+        self.assertLess(blue, 40)
+        
+        minimal = convert('minimal')
+        self.assertEqual(minimal.getexif()[0x8298], 'ACME')
+        self.assertEqual(minimal.getexif().get_ifd(0x8769)[0x9003], '2024:01:01 10:00:00')
+        self.assertEqual(minimal.getexif().get_ifd(0x8825), {})
+        
+        preserved = convert('preserve')
+        self.assertEqual(preserved.info['icc_profile'], self.display_p3_profile())
+        self.assertEqual(preserved.getexif().get_ifd(0x8825)[1], 'N')
+        self.assertLess(abs(preserved.getpixel((32, 32))[0] - 200), 4)
+        
+        # 같은 프로필의 변환은 캐시 재사용 (결과 캐시를 피하려고 품질만 다르게)
+        convert('srgb', quality=90)
+        icc = requests.get(f'{self.base_url}/health').json()['icc_transforms']
+        self.assertEqual(icc['cached'], 1)
+        self.assertGreaterEqual(icc['hits'], 1)
+        
+        # RGB가 아닌 프로필(Lab)은 변환하지 않고 버림
+        from PIL import ImageCms
+        lab_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('LAB')).tobytes()
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (200, 100, 50)).save(buffer, 'JPEG', quality=95, icc_profile=lab_profile)
+        lab = convert('srgb', base64.b64encode(buffer.getvalue()).decode())
+        self.assertNotIn('icc_profile', lab.info)
+        self.assertLess(abs(lab.getpixel((32, 32))[0] - 200), 4)
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={'images': [{'name': 'p3.jpg', 'data': img_data}], 'metadata': 'everything'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['code'], 'INVALID_METADATA')
+
+    def test_27_shared_state(self):
+        """공유 상태 테스트 (결과 캐시 적중, SQLite 백엔드의 워커 간 슬롯/카운터 공유)"""
+        img_data = self.image_to_base64(Image.new('RGB', (300, 200), 'purple'), 'PNG')
+        
+        results = []
+        for name in ('first.png', 'again.png'):
+            response = requests.post(
+                f'{self.base_url}/convert',
+                json={'images': [{'name': name, 'data': img_data}], 'format': 'webp', 'quality': 77}
+            )
+            self.assertEqual(response.status_code, 200)
+            results.append(response.json()['images'][0])
+        
+        self.assertNotIn('cached', results[0])
+        self.assertTrue(results[1]['cached'])
+        self.assertEqual(results[1]['name'], 'again.webp')
+        self.assertEqual(results[1]['data'], results[0]['data'])
+        
+        state_info = requests.get(f'{self.base_url}/health').json()['state']
+        self.assertIn(state_info['backend'], ('memory', 'sqlite', 'redis'))
+        
+        # 같은 파일을 여는 두 백엔드 = 두 워커
+        from state import SQLiteBackend, SQLiteLimiterStorage
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.db')
+            worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+            
+            slots = [worker_a.acquire_slot(3, 60), worker_b.acquire_slot(3, 60), worker_a.acquire_slot(3, 60)]
+            self.assertTrue(all(slots))
+            self.assertIsNone(worker_b.acquire_slot(3, 60))
+            worker_a.release_slot(slots[0])
+            self.assertIsNotNone(worker_b.acquire_slot(3, 60))
+
+            # 처리 중 연장한 슬롯은 처음 임대 시간이 지나도 남고, 연장하지 않은 슬롯만 만료
+            short = [worker_a.acquire_slot(5, 1), worker_a.acquire_slot(5, 1)]
+            worker_b.renew_slots(short[:1], 60)
+            time.sleep(1.1)
+            self.assertEqual(worker_b.active_slots(), 4)
+            worker_a.release_slot(short[0])
+            
+            worker_a.cache_set('key', b'value', 60)
+            self.assertEqual(worker_b.cache_get('key'), b'value')
+            
+            # 전체 크기 제한 (오래된 항목부터 삭제)
+            small = SQLiteBackend(path, cache_max_bytes=2500)
+            for i in range(5):
+                small.cache_set(f'item{i}', bytes(1000), 60 + i)
+            self.assertIsNone(small.cache_get('item0'))
+            self.assertIsNone(small.cache_get('key'))
+            self.assertEqual(small.cache_get('item4'), bytes(1000))
+            self.assertIsNotNone(small.cache_get('item3'))
+            
+            limiter_a = SQLiteLimiterStorage(f'sqlite:///{path}')
+            limiter_b = SQLiteLimiterStorage(f'sqlite:///{path}')
+            limiter_a.incr('LIMITER/test', 60)
+            self.assertEqual(limiter_b.incr('LIMITER/test', 60), 2)
+
+    def test_28_multipart_upload(self):
+        """multipart 업로드 테스트 (브라우저에서 축소한 Blob을 Base64 없이 전송)"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (3840, 2160), 'orange').save(buffer, 'JPEG', quality=95)
+        
+        response = requests.post(
+            f'{self.base_url}/convert',
+            data={'options': json.dumps({'format': 'webp', 'maxSize': 1920, 'resizeMode': 'fit'})},
+            files=[('images', ('photo.jpg', buffer.getvalue(), 'image/jpeg'))]
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['images'][0]
+        self.assertEqual(result['name'], 'photo.webp')
+        self.assertEqual((result['width'], result['height']), (1920, 1080))
+        
+        # 축소 워커 스크립트 제공
+        response = requests.get(f'{self.base_url}/static/workers/preresize.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('OffscreenCanvas', response.text)
+    
+    def run_node(self, script, **env):
+        """브라우저 스크립트를 Node로 실행하고 마지막 줄의 JSON 결과 반환 (Node가 없으면 건너뜀)"""
+        if not shutil.which('node'):
+            self.skipTest('node가 설치되어 있지 않음')
+        result = subprocess.run(
+            ['node', '-e', script], capture_output=True, text=True, timeout=60,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, 'BASE_URL': self.base_url, **env}
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    
+    # 워커 전역(self, importScripts, postMessage)과 같은 출처 fetch를 흉내 낸 뒤 convert.js 로드
+    WORKER_HARNESS = """
+        const fs = require('fs');
+        const vm = require('vm');
+        globalThis.self = globalThis;
+        globalThis.importScripts = (...urls) => urls.forEach(url => vm.runInThisContext(fs.readFileSync('.' + url, 'utf8')));
+        const pageFetch = fetch;
+        globalThis.fetch = (url, options) => pageFetch(process.env.BASE_URL + url, options);
+        const posted = [];
+        self.postMessage = (message, transfer = []) => posted.push({ message, transfer });
+        importScripts('/static/workers/convert.js');
+        const toBase64 = async (data) => Buffer.from(data instanceof Blob ? await data.arrayBuffer() : data).toString('base64');
+    """
+    
+    def test_29_worker_pipeline(self):
+        """변환 워커 테스트 (결과는 ArrayBuffer 소유권 이전, 변환 오류는 작업 id로 응답, 죽은 워커는 교체)"""
+        png = self.test_images['square'].split(',', 1)[1]
+        output = self.run_node(self.WORKER_HARNESS + """
+            (async () => {
+                const file = new File([Buffer.from(process.env.PNG, 'base64')], 'square.png', { type: 'image/png' });
+                const broken = new File([Buffer.from('not an image')], 'broken.png', { type: 'image/png' });
+                await self.onmessage({ data: { id: 1, type: 'convert', file, options: { format: 'webp', maxSize: 100 } } });
+                await self.onmessage({ data: { id: 2, type: 'convert', file: broken, options: { format: 'jpg' } } });
+                const [ok, failed] = posted;
+                console.log(JSON.stringify({
+                    id: ok.message.id,
+                    info: ok.message.info,
+                    transferred: ok.transfer[0] === ok.message.buffer,
+                    data: await toBase64(ok.message.buffer),
+                    failed: failed.message
+                }));
+            })();
+        """, PNG=png)
+        
+        self.assertEqual(output['id'], 1)
+        self.assertTrue(output['transferred'])
+        self.assertNotIn('data', output['info'])
+        self.assertEqual(output['info']['name'], 'square.webp')
+        result = Image.open(io.BytesIO(base64.b64decode(output['data'])))
+        self.assertEqual((result.format, result.size), ('WEBP', (100, 100)))
+        self.assertEqual(output['failed']['id'], 2)
+        self.assertTrue(output['failed']['error'])
+        
+        # 페이지 워커 풀: 죽은 워커의 대기 작업만 거부하고 교체, 계속 죽으면 JSON 경로
+        page = requests.get(self.base_url).text
+        start = page.index('// 변환 워커 풀')
+        pool_code = page[start:page.index('// 파일명 확장자로 MIME 타입 결정', start)]
+        
+        output = self.run_node("""
+            const vm = require('vm');
+            class FakeWorker {
+                constructor(url) { this.url = url; this.sent = []; this.terminated = false; FakeWorker.created++; }
+                postMessage(message) { this.sent.push(message); }
+                terminate() { this.terminated = true; }
+            }
+            FakeWorker.created = 0;
+            globalThis.Worker = FakeWorker;
+            globalThis.navigator = { hardwareConcurrency: 2 };
+            vm.runInThisContext(process.env.POOL_CODE);
+            
+            (async () => {
+                const settle = (promise) => promise.then(value => ({ value }), error => ({ error: error.message, workerFailed: error.workerFailed }));
+                const jobs = [runWorkerJob({ type: 'convert' }), runWorkerJob({ type: 'convert' }), runWorkerJob({ type: 'convert' })];
+                const [first, second] = workerPool.workers;
+                let prevented = false;
+                first.onerror({ message: 'boom', preventDefault: () => { prevented = true; } });
+                second.onmessage({ data: { id: 1, info: { name: 'ok.webp' } } });
+                const results = await Promise.all(jobs.map(settle));
+                
+                const replaced = workerPool.workers[0];
+                const beforeLimit = supportsWorkers();
+                replaced.onmessageerror({});
+                workerPool.workers[1].onerror({ message: 'again', preventDefault: () => {} });
+                console.log(JSON.stringify({
+                    results, prevented,
+                    terminated: first.terminated,
+                    replaced: replaced !== first && typeof replaced.onerror === 'function',
+                    pending: workerPool.jobs.size,
+                    beforeLimit,
+                    afterLimit: supportsWorkers(),
+                    created: FakeWorker.created
+                }));
+            })();
+        """, POOL_CODE=pool_code)
+        
+        first_job, second_job, third_job = output['results']
+        self.assertEqual(first_job, {'error': 'boom', 'workerFailed': True})
+        self.assertEqual(second_job, {'value': {'info': {'name': 'ok.webp'}}})
+        self.assertEqual(third_job, {'error': 'boom', 'workerFailed': True})
+        self.assertTrue(output['prevented'])
+        self.assertTrue(output['terminated'])
+        self.assertTrue(output['replaced'])
+        self.assertEqual(output['pending'], 0)
+        self.assertTrue(output['beforeLimit'])
+        self.assertFalse(output['afterLimit'])
+        self.assertEqual(output['created'], 5)
+    
+    def test_30_client_zip(self):
+        """브라우저 ZIP 생성 테스트 (STORE 항목 CRC/내용, 서버 /download-zip과 같은 이름 규칙)"""
+        names = ['a b.webp', '../evil.png', '사진 1.jpg']
+        contents = [b'first', bytes(range(256)) * 100, b'']
+        output = self.run_node(self.WORKER_HARNESS + """
+            (async () => {
+                const images = JSON.parse(process.env.NAMES).map((name, i) =>
+                    ({ name, blob: new Blob([Buffer.from(JSON.parse(process.env.CONTENTS)[i], 'base64')]) }));
+                await self.onmessage({ data: { id: 7, type: 'zip', images, folderName: 'My Pics!/..' } });
+                const { message } = posted[0];
+                console.log(JSON.stringify({ id: message.id, type: message.blob.type, zip: await toBase64(message.blob) }));
+            })();
+        """, NAMES=json.dumps(names), CONTENTS=json.dumps([base64.b64encode(c).decode() for c in contents]))
+        
+        self.assertEqual(output['id'], 7)
+        self.assertEqual(output['type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(base64.b64decode(output['zip'])))
+        self.assertIsNone(archive.testzip())  # CRC 검증
+        self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+        self.assertEqual([archive.read(name) for name in archive.namelist()], contents)
+        
+        # 서버 ZIP(대체 경로)과 폴더/파일명이 같아야 함 (빈 항목은 서버에서 제외)
+        response = requests.post(
+            f'{self.base_url}/download-zip',
+            json={'folderName': 'My Pics!/..', 'images': [
+                {'name': name, 'data': base64.b64encode(content).decode()}
+                for name, content in zip(names, contents) if content
+            ]}
+        )
+        server_names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        self.assertEqual(server_names, [name for name, content in zip(archive.namelist(), contents) if content])
+    
+    def test_31_chunked_upload(self):
+        """분할 업로드 테스트 (끊긴 위치부터 재개, 조각 해시 검증, 커밋 시 변환)"""
+        buffer = io.BytesIO()
+        img = Image.effect_noise((800, 600), 64).convert('RGB')
+        img.save(buffer, 'PNG')
+        payload = buffer.getvalue()
+        
+        response = requests.post(f'{self.base_url}/uploads', json={'name': 'big.png', 'size': len(payload)})
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['id']
+        url = f'{self.base_url}/uploads/{upload_id}'
+        
+        def put(offset, chunk, digest=None):
+            headers = {'X-Chunk-Sha256': digest or hashlib.sha256(chunk).hexdigest()}
+            return requests.put(f'{url}?offset={offset}', data=chunk, headers=headers)
+        
+        half = len(payload) // 2
+        self.assertEqual(put(0, payload[:half]).json()['received'], half)
+        
+        # 받은 위치보다 뒤의 조각은 거부, 해시가 틀린 조각도 거부
+        response = put(half + 10, payload[half + 10:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['received'], half)
+        response = put(half, payload[half:], digest='0' * 64)
+        self.assertEqual(response.json()['code'], 'UPLOAD_HASH_MISMATCH')
+        response = requests.put(f'{url}?offset={half}', data=payload[half:])
+        self.assertEqual(response.json()['code'], 'UPLOAD_HASH_REQUIRED')
+        
+        # 조각 크기를 넘는 본문은 읽기 전에 거부
+        chunk_size = requests.get(url).json()['chunkSize']
+        response = put(half, bytes(chunk_size + 1), digest='0' * 64)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()['code'], 'CHUNK_TOO_LARGE')
+        
+        # 완료 전 커밋은 거부, 상태 조회로 재개 위치 확인
+        response = requests.post(f'{url}/commit', json={'format': 'jpg'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(requests.get(url).json()['received'], half)
+        
+        self.assertTrue(put(half, payload[half:]).json()['complete'])
+        response = requests.post(f'{url}/commit', json={'format': 'webp', 'maxSize': 400})
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['images'][0]
+        self.assertEqual(result['name'], 'big.webp')
+        self.assertEqual((result['width'], result['height']), (400, 300))
+        
+        # 커밋 후 세션 삭제
+        self.assertEqual(requests.get(url).status_code, 404)
+
+        # 클라이언트별 열린 세션 수 제한 (취소하면 다시 열 수 있음)
+        opened = []
+        for _ in range(20):
+            response = requests.post(f'{self.base_url}/uploads', json={'name': 'open.png', 'size': 1024})
+            if response.status_code != 201:
+                break
+            opened.append(response.json()['id'])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['code'], 'UPLOAD_SESSION_LIMIT')
+        for upload_id in opened:
+            self.assertEqual(requests.delete(f'{self.base_url}/uploads/{upload_id}').status_code, 204)
+        response = requests.post(f'{self.base_url}/uploads', json={'name': 'open.png', 'size': 1024})
+        self.assertEqual(response.status_code, 201)
+        requests.delete(f"{self.base_url}/uploads/{response.json()['id']}")
+
+        # 예약은 워커 간에 공유 (같은 파일을 여는 두 백엔드 = 두 워커)
+        from state import SQLiteBackend
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.db')
+            worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+            self.assertIsNone(worker_a.reserve_upload('u1', 'client', 600, 60, 2, 1000))
+            self.assertEqual(worker_b.reserve_upload('u2', 'client', 600, 60, 2, 1000), 'bytes')
+            self.assertIsNone(worker_b.reserve_upload('u2', 'client', 300, 60, 2, 1000))
+            self.assertEqual(worker_a.reserve_upload('u3', 'client', 10, 60, 2, 1000), 'sessions')
+            worker_b.release_upload('u1')
+            self.assertIsNone(worker_a.reserve_upload('u3', 'client', 600, 60, 2, 1000))
+    
+    def test_32_batch_deduplication(self):
+        """요청 내 중복 입력 테스트 (한 번만 변환하고 파일명별로 결과 복제)"""
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [
+                    {'name': 'shot.png', 'data': self.test_images['landscape']},
+                    {'name': 'other.png', 'data': self.test_images['portrait']},
+                    {'name': 'copy of shot.png', 'data': self.test_images['landscape']}
+                ],
+                'format': 'webp',
+                'resizeMode': 'crop1000'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['processed'], 3)
+        self.assertEqual(data['deduplicated'], 1)
+        
+        first, _, duplicate = data['images']
+        self.assertEqual(first['name'], 'shot_1000x1000.webp')
+        self.assertEqual(duplicate['name'], 'copy of shot_1000x1000.webp')
+        self.assertEqual(duplicate['duplicate_of'], 0)
+        self.assertEqual(duplicate['data'], first['data'])
+        self.assertNotIn('duplicate_of', first)
+    
+    def test_33_priority_classes(self):
+        """우선순위 테스트 (대량 요청이 슬롯을 채워도 대화형 요청은 예약 슬롯으로 처리)"""
+        heavy = self.image_to_base64(Image.effect_noise((1600, 1600), 64).convert('RGB'), 'PNG')
+        
+        def bulk(index):
+            return requests.post(
+                f'{self.base_url}/convert',
+                json={'images': [{'name': f'bulk_{index}.png', 'data': heavy}], 'format': 'webp', 'maxSize': 1600},
+                headers={'X-Priority': 'bulk'}
+            )
+        
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            bulk_futures = [executor.submit(bulk, i) for i in range(6)]
+            time.sleep(0.5)
+            interactive = requests.post(
+                f'{self.base_url}/convert',
+                json={'images': [{'name': 'small.png', 'data': self.test_images['simple_rgb']}], 'format': 'jpg'}
+            )
+            bulk_responses = [f.result() for f in bulk_futures]
+        
+        self.assertEqual(interactive.status_code, 200)
+        
+        # 대량 요청은 예약분을 뺀 슬롯만 사용하고 BULK_WAIT_MS 안에 자리가 나지 않으면 거부
+        shed = [r for r in bulk_responses if r.status_code == 503]
+        self.assertGreater(len(shed), 0)
+        self.assertEqual(shed[0].json()['priority'], 'bulk')
+        self.assertIn('Retry-After', shed[0].headers)
+        
+        scheduler = requests.get(f'{self.base_url}/health').json()['scheduler']
+        self.assertGreater(scheduler['shed']['bulk'], 0)
+        self.assertEqual(scheduler['active'], {'interactive': 0, 'bulk': 0})
+
+        # 짧은 대량 요청은 잠시 기다렸다가 낮은 노력으로 처리 (바로 거부하지 않음)
+        def short_bulk(index):
+            data = self.image_to_base64(Image.effect_noise((320, 320), 64).convert('RGB'), 'PNG')
+            return requests.post(
+                f'{self.base_url}/convert',
+                json={'images': [{'name': f'short_{index}.png', 'data': data}], 'format': 'webp'},
+                headers={'X-Priority': 'bulk'}
+            )
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            short_responses = list(executor.map(short_bulk, range(4)))
+        self.assertEqual([r.status_code for r in short_responses], [200] * 4)
+        efforts = [r.json()['images'][0].get('effort', 'normal') for r in short_responses]
+        self.assertIn('fast', efforts)
+
+        # API 키별 우선순위 설정은 시작 시 검증
+        from app import parse_api_key_priorities
+        self.assertEqual(parse_api_key_priorities('{"partner": "Bulk"}'), {'partner': 'bulk'})
+        with self.assertRaises(ValueError):
+            parse_api_key_priorities('{"partner": "urgent"}')
+        with self.assertRaises(ValueError):
+            parse_api_key_priorities('["bulk"]')
+    
+    def test_34_resource_accounting(self):
+        """자원 사용량 테스트 (이미지별/요청별 CPU, 픽셀, 입출력 바이트)"""
+        noisy = self.image_to_base64(Image.effect_noise((640, 480), 48).convert('RGB'), 'PNG')
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={
+                'images': [
+                    {'name': 'a.png', 'data': noisy},
+                    {'name': 'b.png', 'data': noisy}
+                ],
+                'format': 'webp'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        first, duplicate = data['images']
+        
+        usage = first['usage']
+        self.assertEqual(usage['pixels'], 640 * 480)
+        self.assertEqual(usage['bytes_out'], first['size'])
+        self.assertGreater(usage['cpu_ms'], 0)
+        self.assertGreater(usage['estimated_peak_bytes'], 640 * 480 * 3)
+        
+        # 중복 이미지는 변환하지 않았으므로 사용량 없음, 요청 합계는 원본만 집계
+        self.assertNotIn('usage', duplicate)
+        total = data['usage']
+        self.assertEqual(total['pixels'], 640 * 480)
+        self.assertEqual(total['bytes_out'], first['size'] + duplicate['size'])
+        self.assertEqual(total['bytes_in'], len(response.request.body))
+        self.assertGreaterEqual(total['cpu_ms'], usage['cpu_ms'])
+    
+    def test_35_structured_logging(self):
+        """구조화 로깅 테스트 (로그는 큐를 거쳐 출력, 실패해도 응답은 정상)"""
+        logging_info = requests.get(f'{self.base_url}/health').json()['logging']
+        self.assertIn(logging_info['format'], ('json', 'text'))
+        self.assertTrue(0 <= logging_info['sample_rate'] <= 1)
+        
+        # 오류 레코드(트레이스백 포함)는 리스너 스레드에서 포맷되므로 응답에 영향 없음
+        response = requests.post(
+            f'{self.base_url}/convert',
+            json={'images': [
+                {'name': 'broken.png', 'data': base64.b64encode(b'not an image').decode()},
+                {'name': 'ok.png', 'data': self.test_images['simple_rgb']}
+            ]}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['processed'], 1)
+        self.assertEqual(data['errors'][0]['name'], 'broken.png')
+        
+        # 큐가 밀리지 않고 비워짐
+        time.sleep(0.2)
+        self.assertLess(requests.get(f'{self.base_url}/health').json()['logging']['queued'], 10)
+
+        # 큐에는 트레이스백 문자열만 넣고 예외 객체(프레임 참조)는 넣지 않음
+        import logging
+        import sys
+        from app import DeferredQueueHandler, JsonFormatter
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            record = logging.LogRecord('test', logging.ERROR, __file__, 1, '실패', None, sys.exc_info())
+        queued = DeferredQueueHandler(None).prepare(record)
+        self.assertIsNone(queued.exc_info)
+        self.assertIn('ZeroDivisionError', queued.exc_text)
+        self.assertIsNotNone(record.exc_info)
+        self.assertIn('ZeroDivisionError', json.loads(JsonFormatter().format(queued))['exc'])
+    
+    def test_36_load_harness(self):
+        """부하 테스트 도구 테스트 (같은 시드면 같은 일정, 짧은 열린 루프 실행 보고서)"""
+        import loadtest
+        
+        mix = loadtest.parse_mix('thumbnail=3,graphic=1')
+        schedule = loadtest.build_schedule(mix, 4, 2, seed='test')
+        self.assertEqual(schedule, loadtest.build_schedule(mix, 4, 2, seed='test'))
+        self.assertTrue(all(0 < at < 2 for at, _ in schedule))
+        
+        # 최근접 순위 백분위
+        self.assertEqual(loadtest.percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(loadtest.percentile(list(range(1, 101)), 99), 99)
+        self.assertEqual(loadtest.percentile(list(range(1, 11)), 50), 5)
+        
+        inputs = loadtest.build_inputs(mix, seed='test')
+        self.assertEqual(inputs['thumbnail'][0]['raw'], loadtest.build_inputs({'thumbnail': 1}, seed='test')['thumbnail'][0]['raw'])
+        
+        report = loadtest.run(self.base_url, schedule[:4], inputs, upload='multipart')
+        self.assertEqual(report['requests']['sent'], len(schedule[:4]))
+        self.assertEqual(report['requests']['ok'], report['requests']['statuses'].get('200', 0))
+        self.assertGreater(report['requests']['ok'], 0)
+        self.assertIsNotNone(report['latency_ms']['p50'])
+    
+    def test_37_soak_smoke(self):
+        """메모리 회귀 도구 테스트 (짧은 실행으로 보고서와 임시 파일/디스크립터 정리 확인)"""
+        import soaktest
+        
+        report = soaktest.run_soak(iterations=30, mix={'thumbnail': 2, 'graphic': 1}, warmup=10,
+                                   sample_every=10, zip_every=5, trace=False)
+        self.assertEqual(report['failures'], 0)
+        self.assertEqual([s['iteration'] for s in report['samples']], [10, 20, 30])
+        self.assertEqual(report['growth']['temp_files'], 0)
+        self.assertLessEqual(report['growth']['open_fds'], 2)
+        
+        # 기준 초과 판정
+        self.assertEqual(soaktest.check_thresholds(report, max_rss_growth_mb=1024, max_rss_slope_mb=1024), [])
+        inflated = {**report, 'growth': {**report['growth'], 'open_fds': 50}}
+        self.assertTrue(soaktest.check_thresholds(inflated))
 
 def run_performance_test():
     """성능 테스트"""